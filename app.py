@@ -1,29 +1,126 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify
+from flask import Blueprint, Flask, current_app, render_template, request, redirect, url_for, session, jsonify, Response, stream_with_context
 import os
+import threading
 from werkzeug.utils import secure_filename
 import uuid
-from graph import create_workflow
+from pipeline import (
+    analysis_progress, catalog_upsert, confirm_session, discard_session, get_job_catalog, get_session_state, rank_catalog,
+    resume_analysis, run_intake, speculate_analysis, speculation_keys, start_intake_session, start_session
+)
+from utils.cache import IdleRegistry
+from utils.jobs import AnalysisJob, JobManager
+from utils.metrics import GaugeCallback, registry
+from utils.session_store import ServerSideSessionInterface, create_session_store
+from utils.speculation import Speculator
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-app = Flask(__name__)
-app.secret_key = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-here')
-app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
-app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
-
-# Ensure upload directory exists
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
-# Store workflow instances by session ID
-workflows = {}
-
-@app.route('/')
+# The workflow graph, the nodes and the LLM clients are imported on first use,
+# so importing this module and creating the app stays fast
+bp = Blueprint('main', __name__)
+
+def _discard_session(session_id, state, idle_seconds=None):
+    """
+    Remove the upload and checkpoints belonging to a session.
+
+    With idle_seconds nothing is removed unless the session's checkpoints are idle
+    too, so a session evicted for capacity or served by another worker keeps its CV.
+    """
+    # The registry entry may be gone already, so fall back to the checkpointed path
+    file_path = state.get('cv_file_path') or get_session_state(session_id).get('cv_file_path')
+    if not discard_session(session_id, idle_seconds=idle_seconds):
+        return
+    if file_path and os.path.exists(file_path):
+        os.remove(file_path)
+    speculations.discard(session_id)
+
+# Per-session workflow state, dropped after WORKFLOW_IDLE_SECONDS without a request
+workflows = IdleRegistry(
+    idle_seconds=float(os.getenv('WORKFLOW_IDLE_SECONDS', 1800)),
+    max_entries=int(os.getenv('WORKFLOW_MAX_SESSIONS', 1000)),
+    # The session may still be active (capacity eviction, another worker), so wait until its checkpoints are idle
+    on_evict=lambda session_id, state: _discard_session(session_id, state, workflows.idle_seconds)
+)
+registry.register(GaugeCallback(
+    "rolesync_workflow_sessions", "Sessions held in the workflow registry", [],
+    lambda: {(): workflows.stats()["entries"]}
+))
+registry.register(GaugeCallback(
+    "rolesync_workflow_session_evictions", "Workflow sessions evicted since start-up", ["reason"],
+    lambda: {(reason,): count for reason, count in workflows.stats()["evictions"].items()}
+))
+
+# Server-sent progress events hold a worker for the whole analysis, so they need
+# a threaded or async worker class; by default the pages poll /status instead
+ANALYSIS_SSE = os.getenv('ANALYSIS_SSE', 'false').lower() == 'true'
+
+# Stream the final summary to the result page as it is generated (over the event stream)
+SUMMARY_STREAMING = ANALYSIS_SSE and os.getenv('SUMMARY_STREAMING', 'true').lower() == 'true'
+
+# Background executor for job analyses
+analysis_jobs = JobManager(
+    max_workers=int(os.getenv('ANALYSIS_WORKERS', 4)),
+    retention_seconds=float(os.getenv('ANALYSIS_RETENTION_SECONDS', 3600))
+)
+registry.register(GaugeCallback(
+    "rolesync_analysis_jobs", "Background analysis jobs by status", ["status"],
+    lambda: {(status,): count for status, count in analysis_jobs.stats().items()}
+))
+
+# Opt-in: parse the job and compare while the user is still typing the job description
+SPECULATIVE_ANALYSIS = os.getenv('SPECULATIVE_ANALYSIS', 'false').lower() == 'true'
+SPECULATIVE_MIN_CHARS = int(os.getenv('SPECULATIVE_MIN_CHARS', 100))
+SPECULATIVE_DEBOUNCE_MS = int(os.getenv('SPECULATIVE_DEBOUNCE_MS', 1500))
+speculations = Speculator(
+    max_workers=int(os.getenv('SPECULATIVE_WORKERS', 2)),
+    max_age_seconds=workflows.idle_seconds
+)
+
+# /api/intake analyzes without human review unless the request asks for it
+INTAKE_SKIP_CONFIRMATION = os.getenv('INTAKE_SKIP_CONFIRMATION', 'true').lower() == 'true'
+
+def create_app(config=None):
+    """
+    Create the Flask application.
+
+    Args:
+        config: Optional mapping of config values overriding the environment
+
+    Returns:
+        Configured Flask app
+    """
+    app = Flask(__name__)
+    app.secret_key = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-here')
+    app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
+    app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+    app.config['SESSION_BACKEND'] = os.getenv('SESSION_BACKEND', 'sqlite')
+    if config:
+        app.config.update(config)
+
+    # Keep session payloads (parsed CVs can exceed the 4 KB cookie limit) on the server;
+    # the cookie only carries a signed session id
+    session_store = create_session_store(app.config['SESSION_BACKEND'])
+    if session_store is not None:
+        app.session_interface = ServerSideSessionInterface(session_store)
+        session_store.start_sweeper(float(os.getenv('SESSION_SWEEP_INTERVAL_SECONDS', 60)))
+        registry.register(GaugeCallback(
+            "rolesync_sessions", "Server-side sessions currently stored", [],
+            lambda: {(): session_store.stats()["entries"]}
+        ))
+
+    # Ensure upload directory exists
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+
+    app.register_blueprint(bp)
+    return app
+
+@bp.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/upload_cv', methods=['POST'])
+@bp.route('/upload_cv', methods=['POST'])
 def upload_cv():
     if 'cv_file' not in request.files:
         return redirect(request.url)
@@ -37,29 +134,19 @@ def upload_cv():
         session_id = str(uuid.uuid4())
         session['session_id'] = session_id
 
-        # Create workflow instance for this session
-        workflows[session_id] = create_workflow()
-
         # Save uploaded file
         filename = secure_filename(file.filename)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{session_id}_{filename}")
+        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{session_id}_{filename}")
         file.save(file_path)
 
-        # Parse CV directly without workflow for now
-        from nodes.parse_cv import parse_cv_node
-
-        initial_state = {
-            "cv_file_path": file_path,
-            "session_id": session_id
-        }
+        # Track this session's workflow state
+        workflows.set(session_id, {"cv_file_path": file_path})
 
-        # Execute CV parsing
+        # Run the workflow graph up to the CV review interrupt
         try:
-            result = parse_cv_node(initial_state)
+            result = start_session(file_path, session_id)
 
             if result.get('cv_data') and not result.get('error_message'):
-                # Store result for later use
-                session['cv_parse_result'] = result
                 return render_template('confirm_cv.html', cv_data=result['cv_data'])
             else:
                 error_msg = result.get('error_message', 'Unknown error processing CV')
@@ -67,13 +154,14 @@ def upload_cv():
         except Exception as e:
             return f"CV parsing error: {str(e)}", 500
 
-    return redirect(url_for('index'))
+    return redirect(url_for('.index'))
 
-@app.route('/confirm_cv', methods=['POST'])
+@bp.route('/confirm_cv', methods=['POST'])
 def confirm_cv():
     session_id = session.get('session_id')
-    if not session_id or session_id not in workflows:
-        return redirect(url_for('index'))
+    if not session_id or not get_session_state(session_id).get('cv_data'):
+        return redirect(url_for('.index'))
+    workflows.touch(session_id)
 
     # Get confirmed CV data from form with improved parsing
     confirmed_data = {
@@ -88,10 +176,19 @@ def confirm_cv():
         'certifications': [cert.strip() for cert in request.form.getlist('certifications') if cert.strip()]
     }
 
-    # Store confirmed CV data in session
-    session['confirmed_cv_data'] = confirmed_data
+    # Resume the graph with the reviewed data; it pauses again until a job description arrives
+    result = confirm_session(session_id, confirmed_data)
+    if result.get('error_message'):
+        return f"CV confirmation error: {result['error_message']}", 500
 
-    return render_template('job_input.html')
+    from nodes.summary import REPORT_MODE
+    return render_template(
+        'job_input.html',
+        report_mode=REPORT_MODE,
+        speculate_url=url_for('.speculate') if SPECULATIVE_ANALYSIS else None,
+        speculate_min_chars=SPECULATIVE_MIN_CHARS,
+        speculate_debounce_ms=SPECULATIVE_DEBOUNCE_MS
+    )
 
 def parse_experience_data(form):
     """Parse experience data from form fields"""
@@ -135,71 +232,301 @@ def parse_education_data(form):
 
     return education
 
-@app.route('/analyze_job', methods=['POST'])
+@bp.route('/analyze_job', methods=['POST'])
 def analyze_job():
     session_id = session.get('session_id')
     if not session_id:
-        return redirect(url_for('index'))
+        return redirect(url_for('.index'))
 
     job_description = request.form.get('job_description')
-    confirmed_cv_data = session.get('confirmed_cv_data')
+    confirmed_cv_data = get_session_state(session_id).get('confirmed_cv_data')
+    workflows.touch(session_id)
 
     if not job_description or not confirmed_cv_data:
         return "Missing data", 400
 
+    if SPECULATIVE_ANALYSIS:
+        # Count the speculative work as used or discarded; matching work is picked up from the caches
+        speculations.settle(session_id, speculation_keys(job_description, confirmed_cv_data))
+
+    # Report mode can be chosen per request, falling back to the deployment default
+    from nodes.summary import REPORT_MODES
+    report_mode = request.form.get('report_mode')
+    if report_mode not in REPORT_MODES:
+        report_mode = None
+
+    # Run the analysis in the background so the request returns immediately
+    job = analysis_jobs.submit(
+        session_id, _analysis_task, job_description, session_id, report_mode
+    )
+
+    if request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            "job_id": job.id,
+            "status_url": url_for('.analysis_status', job_id=job.id),
+            "events_url": url_for('.analysis_events', job_id=job.id) if ANALYSIS_SSE else None,
+            "result_url": url_for('.analysis_result', job_id=job.id)
+        }), 202
+
+    return redirect(url_for('.analysis_result', job_id=job.id))
+
+@bp.route('/speculate', methods=['POST'])
+def speculate():
+    if not SPECULATIVE_ANALYSIS:
+        return jsonify({"error": "Speculative analysis is disabled"}), 404
+
+    session_id = session.get('session_id')
+    if not session_id:
+        return jsonify({"error": "No active session"}), 400
+
+    data = request.get_json(silent=True) or request.form
+    job_description = data.get('job_description') or ''
+    if len(job_description.strip()) < SPECULATIVE_MIN_CHARS:
+        return jsonify({"status": "ignored"}), 202
+
+    # Before confirmation, speculate on the CV as the review form would submit it unedited
+    state = get_session_state(session_id)
+    confirmed_cv_data = state.get('confirmed_cv_data')
+    if not confirmed_cv_data and state.get('cv_data'):
+        from nodes.confirm_cv import unconfirmed_cv_data
+        confirmed_cv_data = unconfirmed_cv_data(state['cv_data'])
+    if not confirmed_cv_data:
+        return jsonify({"error": "No CV data for this session"}), 400
+
+    started = speculations.start(
+        session_id, speculation_keys(job_description, confirmed_cv_data),
+        speculate_analysis, job_description, confirmed_cv_data
+    )
+    return jsonify({"status": "started" if started else "unchanged"}), 202
+
+def _analysis_task(job, job_description, session_id, report_mode=None):
+    """Resume the session's workflow graph, reporting each completed stage on the job"""
+    on_partial_summary = None
+    if SUMMARY_STREAMING:
+        on_partial_summary = lambda analysis: job.publish('partial', analysis)
+
+    return resume_analysis(
+        session_id,
+        job_description,
+        report_mode=report_mode,
+        on_stage=lambda stage, state: job.stage_complete(stage),
+        on_partial_summary=on_partial_summary,
+        analysis_id=job.id
+    )
+
+def _get_analysis_job(job_id):
+    session_id = session.get('session_id')
+    job = analysis_jobs.get(job_id, owner=session_id)
+    if job is None and session_id:
+        # Started by another worker process: report on it from the session's checkpoint
+        progress = analysis_progress(session_id, job_id)
+        if progress:
+            job = AnalysisJob.restore(
+                job_id, session_id, progress['status'], progress['stages'],
+                result=progress['state'], error=progress['error']
+            )
+    return job
+
+@bp.route('/analysis/<job_id>')
+def analysis_result(job_id):
+    job = _get_analysis_job(job_id)
+    if job is None:
+        return "Analysis not found", 404
+
+    if job.status == 'error':
+        return job.error, 500
+
+    if job.status == 'done':
+        return render_template('result.html', analysis=job.result.get('final_analysis'))
+
+    if SUMMARY_STREAMING:
+        # The result page fills itself in from the event stream
+        return render_template('result.html', analysis=None, stream=job.to_dict())
+
+    return render_template('progress.html', job=job.to_dict(), use_events=ANALYSIS_SSE)
+
+@bp.route('/analysis/<job_id>/status')
+def analysis_status(job_id):
+    job = _get_analysis_job(job_id)
+    if job is None:
+        return jsonify({"error": "Analysis not found"}), 404
+    return jsonify(job.to_dict())
+
+@bp.route('/analysis/<job_id>/events')
+def analysis_events(job_id):
+    if not ANALYSIS_SSE:
+        return jsonify({"error": "Event streams are disabled; poll the status URL"}), 404
+
+    job = _get_analysis_job(job_id)
+    if job is None:
+        return jsonify({"error": "Analysis not found"}), 404
+
+    return Response(
+        stream_with_context(analysis_jobs.stream(job)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@bp.route('/api/intake', methods=['POST'])
+def api_intake():
+    file = request.files.get('cv_file')
+    if not file or not file.filename.lower().endswith('.pdf'):
+        return jsonify({"error": "A PDF cv_file is required"}), 400
+
+    job_description = request.form.get('job_description')
+    if not job_description:
+        return jsonify({"error": "Missing job_description"}), 400
+
+    from nodes.compare import COMPARE_MODES
+    from nodes.summary import REPORT_MODES
+    report_mode = request.form.get('report_mode')
+    if report_mode not in REPORT_MODES:
+        report_mode = None
+    compare_mode = request.form.get('compare_mode')
+    if compare_mode not in COMPARE_MODES:
+        compare_mode = None
+    skip_confirmation = request.form.get('skip_confirmation', str(INTAKE_SKIP_CONFIRMATION)).lower() == 'true'
+
+    session_id = str(uuid.uuid4())
+    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{session_id}_{secure_filename(file.filename)}")
+    file.save(file_path)
+
+    if not skip_confirmation:
+        # Continue through the usual review: POST /confirm_cv, then /analyze_job with the same job description
+        session['session_id'] = session_id
+        workflows.set(session_id, {"cv_file_path": file_path})
+        result = start_intake_session(file_path, job_description, session_id)
+        if result.get('error_message'):
+            return jsonify({"error": result['error_message'], "failed_stage": result['failed_stage']}), 422
+        return jsonify({
+            "session_id": session_id,
+            "status": "awaiting_confirmation",
+            "cv_data": result['cv_data'],
+            "job_requirements": result['job_requirements'],
+            "confirm_url": url_for('.confirm_cv'),
+            "analyze_url": url_for('.analyze_job')
+        })
+
     try:
-        # Import nodes for direct execution
-        from nodes.parse_job import parse_job_node
-        from nodes.compare import compare_node
-        from nodes.summary import summary_node
-
-        # Parse job description
-        job_state = {
-            "job_description": job_description,
-            "session_id": session_id
-        }
-        job_result = parse_job_node(job_state)
-
-        if job_result.get('error_message'):
-            return f"Job parsing error: {job_result['error_message']}", 500
-
-        # Compare CV with job
-        compare_state = {
-            "confirmed_cv_data": confirmed_cv_data,
-            "job_requirements": job_result.get('job_requirements'),
-            "session_id": session_id
-        }
-        compare_result = compare_node(compare_state)
-
-        if compare_result.get('error_message'):
-            return f"Comparison error: {compare_result['error_message']}", 500
-
-        # Generate summary
-        summary_state = {
-            "comparison_result": compare_result.get('comparison_result'),
-            "job_requirements": job_result.get('job_requirements'),
-            "confirmed_cv_data": confirmed_cv_data,
-            "session_id": session_id
-        }
-        final_result = summary_node(summary_state)
-
-        if final_result.get('error_message'):
-            return f"Summary error: {final_result['error_message']}", 500
-
-        return render_template('result.html', analysis=final_result.get('final_analysis'))
-
-    except Exception as e:
-        return f"Analysis error: {str(e)}", 500
-
-@app.route('/cleanup')
+        result = run_intake(file_path, job_description, session_id, report_mode=report_mode, compare_mode=compare_mode)
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+    if result.get('error_message'):
+        status = 422 if result['failed_stage'] in ('parse_cv', 'parse_job') else 500
+        return jsonify({
+            "error": result['error_message'],
+            "failed_stage": result['failed_stage'],
+            "timings": result.get('timings')
+        }), status
+
+    return jsonify({
+        "session_id": session_id,
+        "status": "done",
+        "cv_data": result['cv_data'],
+        "job_requirements": result['job_requirements'],
+        "comparison_result": result['comparison_result'],
+        "final_analysis": result['final_analysis'],
+        "timings": result['timings']
+    })
+
+@bp.route('/catalog')
+def catalog_list():
+    return jsonify({"jobs": get_job_catalog().list()})
+
+@bp.route('/catalog/jobs', methods=['POST'])
+def catalog_add_job():
+    data = request.get_json(silent=True) or request.form
+    job_description = data.get('job_description')
+    if not job_description:
+        return jsonify({"error": "Missing job_description"}), 400
+
+    job_id = secure_filename(str(data.get('job_id') or '')) or str(uuid.uuid4())
+    result = catalog_upsert(job_id, job_description, title=data.get('title') or None)
+    if result.get('error_message'):
+        return jsonify({"job_id": job_id, "error": result['error_message']}), 422
+    return jsonify(result), 201 if result['status'] == 'created' else 200
+
+@bp.route('/catalog/jobs/<job_id>', methods=['GET', 'DELETE'])
+def catalog_job(job_id):
+    catalog = get_job_catalog()
+    if request.method == 'DELETE':
+        if not catalog.remove(job_id):
+            return jsonify({"error": "Job not found"}), 404
+        return '', 204
+
+    job = catalog.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@bp.route('/catalog/rank', methods=['POST'])
+def catalog_rank():
+    data = request.get_json(silent=True) or request.form
+    confirmed_cv_data = data.get('confirmed_cv_data') if request.is_json else None
+    if not confirmed_cv_data:
+        # Default to the CV confirmed in this session
+        session_id = session.get('session_id')
+        confirmed_cv_data = get_session_state(session_id).get('confirmed_cv_data') if session_id else None
+    if not confirmed_cv_data:
+        return jsonify({"error": "No confirmed CV data"}), 400
+
+    try:
+        top_k = int(data.get('top_k', 10))
+        compare_top = int(data.get('compare_top', 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "top_k and compare_top must be integers"}), 400
+
+    return jsonify(rank_catalog(confirmed_cv_data, top_k=top_k, compare_top=compare_top))
+
+@bp.route('/metrics')
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/cache_stats')
+def cache_stats():
+    store = getattr(current_app.session_interface, 'store', None)
+    from nodes.parse_cv import cv_cache
+    from nodes.parse_job import job_cache, job_parse_flight
+    from nodes.compare import compare_flight, section_cache
+    return jsonify({
+        "cv_parse": cv_cache.stats(),
+        "job_parse": {**job_cache.stats(), "coalesced": job_parse_flight.coalesced},
+        "compare_sections": {**section_cache.stats(), "coalesced": compare_flight.coalesced},
+        "sessions": store.stats() if store is not None else {"backend": "cookie"},
+        "workflows": workflows.stats(),
+        "speculation": speculations.stats()
+    })
+
+@bp.route('/cleanup')
 def cleanup():
     session_id = session.get('session_id')
     if session_id:
-        # Clean up uploaded file
-        # (In production, you might want a more sophisticated cleanup strategy)
+        # Clean up the uploaded file and the session's checkpoints
+        _discard_session(session_id, workflows.pop(session_id) or {})
         session.clear()
 
-    return redirect(url_for('index'))
+    return redirect(url_for('.index'))
+
+_app = None
+_app_lock = threading.Lock()
+
+def __getattr__(name):
+    """
+    Build the module-level app for WSGI servers pointed at app:app on first access.
+
+    It is not created at import: the PDF extraction pool spawns workers that
+    re-import __main__, and each would otherwise build an app and start its
+    own session sweeper.
+    """
+    global _app
+    if name != 'app':
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _app_lock:
+        if _app is None:
+            _app = create_app()
+    return _app
 
 if __name__ == '__main__':
-    app.run(debug=True, port=5001)
\ No newline at end of file
+    create_app().run(debug=True, port=5001)
\ No newline at end of file
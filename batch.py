@@ -0,0 +1,346 @@
+"""
+Headless batch screening: one job description against a directory of CVs.
+
+Usage:
+    python batch.py --job job.txt --cv-dir cvs/ --output results.ndjson
+
+The job description is parsed once, then every PDF in the directory goes
+through parse_cv -> compare -> summary on a bounded worker pool. One NDJSON
+line is appended per CV as soon as it finishes, so an interrupted run can be
+restarted with the same arguments and will skip CVs that are already done.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Set
+
+from dotenv import load_dotenv
+
+from utils.rate_limiter import RateLimiter
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["parse_cv", "compare", "summary"]
+
+def load_completed(output_path: str, retry_failed: bool = False) -> Set[str]:
+    """
+    Collect the CV files already recorded in a previous run's output.
+
+    Args:
+        output_path: NDJSON results file
+        retry_failed: Whether failed CVs should be processed again
+
+    Returns:
+        Set of CV file paths to skip
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A crash can leave a truncated last line behind
+                continue
+            if record.get('status') in ('ok', 'skipped') or not retry_failed:
+                completed.add(record.get('cv_file'))
+    return completed
+
+def find_cv_files(cv_dir: str) -> List[str]:
+    """Return the PDF files in cv_dir, sorted by name."""
+    return sorted(
+        os.path.join(cv_dir, name)
+        for name in os.listdir(cv_dir)
+        if name.lower().endswith('.pdf')
+    )
+
+def parse_candidate(cv_file: str, limiter: RateLimiter) -> Dict[str, Any]:
+    """
+    Parse one CV ahead of shortlisting.
+
+    Returns:
+        parse_cv_node state with the stage's duration under "parse_seconds"
+    """
+    from nodes.parse_cv import parse_cv_node
+
+    limiter.acquire()
+    started = time.perf_counter()
+    state = parse_cv_node({"cv_file_path": cv_file, "session_id": f"batch-{uuid.uuid4()}"})
+    return {**state, "parse_seconds": time.perf_counter() - started}
+
+def screen_cv(cv_file: str, job_requirements: Dict[str, Any], limiter: RateLimiter,
+              report_mode: Optional[str] = None, compare_mode: Optional[str] = None,
+              cv_data: Optional[Dict[str, Any]] = None, parse_seconds: float = 0.0) -> Dict[str, Any]:
+    """
+    Run a single CV through parsing, comparison and summary.
+
+    Args:
+        cv_file: Path to the CV PDF
+        job_requirements: Parsed job requirements shared by every CV
+        limiter: Rate limiter acquired before each LLM stage
+        report_mode: "deep" or "fast" summary; defaults to the deployment's REPORT_MODE
+        compare_mode: "llm", "evidence" or "fast" comparison; defaults to the deployment's COMPARE_MODE
+        cv_data: Already parsed CV data (skips parse_cv)
+        parse_seconds: Time spent parsing cv_data, reported with the timings
+
+    Returns:
+        NDJSON record for this CV
+    """
+    from nodes.parse_cv import parse_cv_node
+    from nodes.compare import compare_node, COMPARE_MODE
+    from nodes.summary import summary_node, REPORT_MODE
+
+    timings = {"parse_cv": parse_seconds} if cv_data is not None else {}
+    state = {
+        "cv_file_path": cv_file,
+        "job_requirements": job_requirements,
+        "session_id": f"batch-{uuid.uuid4()}",
+        "report_mode": report_mode or REPORT_MODE,
+        "compare_mode": compare_mode or COMPARE_MODE
+    }
+
+    if cv_data is not None:
+        state["cv_data"] = state["confirmed_cv_data"] = cv_data
+
+    for stage, node in (("parse_cv", parse_cv_node), ("compare", compare_node), ("summary", summary_node)):
+        if stage == "parse_cv" and cv_data is not None:
+            continue
+        local = (stage == "summary" and state.get("report_mode") == "fast") or \
+            (stage == "compare" and state.get("compare_mode") == "fast")
+        if not local:
+            limiter.acquire()
+        started = time.perf_counter()
+        state = node(state)
+        timings[stage] = time.perf_counter() - started
+
+        if state.get('error_message'):
+            return {
+                "cv_file": cv_file,
+                "status": "error",
+                "stage": stage,
+                "error": state['error_message'],
+                "timings": timings
+            }
+
+        if stage == "parse_cv":
+            # No human review in batch mode: the parsed data is taken as confirmed
+            state["confirmed_cv_data"] = state["cv_data"]
+
+    final_analysis = state.get('final_analysis', {})
+    return {
+        "cv_file": cv_file,
+        "status": "ok",
+        "candidate_name": state["confirmed_cv_data"].get("name"),
+        "match_score": final_analysis.get("match_score"),
+        "recommendation": final_analysis.get("recommendation"),
+        "final_analysis": final_analysis,
+        "timings": timings
+    }
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+def print_report(records: List[Dict[str, Any]], elapsed: float, out=sys.stderr) -> None:
+    """Print throughput and per-stage latency for the records processed in this run."""
+    ok = sum(1 for record in records if record['status'] == 'ok')
+    skipped = sum(1 for record in records if record['status'] == 'skipped')
+    rate = len(records) / elapsed * 60 if elapsed > 0 else 0.0
+
+    print(f"\nProcessed {len(records)} CVs ({ok} ok, {skipped} not shortlisted, "
+          f"{len(records) - ok - skipped} failed) in {elapsed:.1f}s", file=out)
+    print(f"Throughput: {rate:.2f} CVs/min", file=out)
+    print(f"{'stage':<10} {'count':>6} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8}", file=out)
+    for stage in STAGES:
+        values = [record['timings'][stage] for record in records if stage in record['timings']]
+        if not values:
+            continue
+        print(
+            f"{stage:<10} {len(values):>6} {sum(values) / len(values):>7.2f}s "
+            f"{percentile(values, 50):>7.2f}s {percentile(values, 95):>7.2f}s {max(values):>7.2f}s",
+            file=out
+        )
+
+def shortlist_candidates(cv_files: List[str], job_requirements: Dict[str, Any], limiter: RateLimiter,
+                         concurrency: int, top_k: int, index_dir: Optional[str] = None):
+    """
+    Rank CVs with the local candidate index and keep the best top_k.
+
+    CVs missing from the index, or modified since they were indexed, are
+    parsed and added first; the rest are ranked without any LLM call.
+
+    Returns:
+        (shortlist entries best first, parse_cv states of the CVs parsed in
+        this run, error records of CVs that could not be parsed)
+    """
+    from utils.candidate_index import CandidateIndex
+
+    index = CandidateIndex(index_dir)
+    indexed = {candidate["key"]: candidate for candidate in index.candidates if candidate.get("active", True)}
+    stale = [
+        cv_file for cv_file in cv_files
+        if cv_file not in indexed or indexed[cv_file].get("mtime") != os.path.getmtime(cv_file)
+    ]
+
+    parsed, errors = {}, []
+    if stale:
+        print(f"Indexing {len(stale)} of {len(cv_files)} CVs", file=sys.stderr)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {executor.submit(parse_candidate, cv_file, limiter): cv_file for cv_file in stale}
+            for future in as_completed(futures):
+                cv_file = futures[future]
+                try:
+                    state = future.result()
+                except Exception as e:
+                    state = {"error_message": str(e), "parse_seconds": 0.0}
+                if state.get("error_message"):
+                    errors.append({"cv_file": cv_file, "status": "error", "stage": "parse_cv",
+                                   "error": state["error_message"], "timings": {"parse_cv": state["parse_seconds"]}})
+                    continue
+                parsed[cv_file] = state
+                index.add(cv_file, state["cv_data"], {"cv_file": cv_file, "mtime": os.path.getmtime(cv_file)})
+        index.flush()
+
+    shortlist = index.shortlist(job_requirements, top_k, keys=cv_files)
+    return shortlist, parsed, errors
+
+def run_batch(job_description: str, cv_dir: str, output_path: str, concurrency: int = 4,
+              requests_per_minute: float = 0, retry_failed: bool = False,
+              report_mode: Optional[str] = None, compare_mode: Optional[str] = None,
+              shortlist: int = 0, index_dir: Optional[str] = None) -> int:
+    """
+    Screen every CV in cv_dir against one job description.
+
+    With shortlist > 0 every CV is ranked locally first and only the best
+    shortlist CVs are compared and summarized; the others are recorded as
+    "skipped".
+
+    Returns:
+        Process exit code
+    """
+    from nodes.parse_job import parse_job_node
+
+    cv_files = find_cv_files(cv_dir)
+    completed = load_completed(output_path, retry_failed)
+    pending = [cv_file for cv_file in cv_files if cv_file not in completed]
+    if completed:
+        print(f"Resuming: {len(cv_files) - len(pending)} of {len(cv_files)} CVs already done", file=sys.stderr)
+    if not pending:
+        print("Nothing to do", file=sys.stderr)
+        return 0
+
+    limiter = RateLimiter(requests_per_minute, burst=concurrency)
+
+    # Parse the job description once for the whole batch
+    limiter.acquire()
+    job_result = parse_job_node({"job_description": job_description, "session_id": "batch"})
+    if job_result.get('error_message'):
+        print(f"Job parsing error: {job_result['error_message']}", file=sys.stderr)
+        return 1
+    job_requirements = job_result['job_requirements']
+
+    records = []
+    total = len(pending)
+    started = time.perf_counter()
+    with open(output_path, 'a', encoding='utf-8') as out:
+        def write(record: Dict[str, Any]) -> None:
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            records.append(record)
+            print(f"[{len(records)}/{total}] {record['status']:<5} {record['cv_file']}", file=sys.stderr)
+
+        parsed = {}
+        ranks = {}
+        if shortlist:
+            entries, parsed, errors = shortlist_candidates(
+                cv_files, job_requirements, limiter, concurrency, shortlist, index_dir
+            )
+            ranks = {entry["key"]: (rank, entry) for rank, entry in enumerate(entries, start=1)}
+            for record in errors:
+                if record["cv_file"] in pending:
+                    write(record)
+            failed = {record["cv_file"] for record in errors}
+            for cv_file in pending:
+                if cv_file not in ranks and cv_file not in failed:
+                    write({"cv_file": cv_file, "status": "skipped", "timings": {}})
+            pending = [cv_file for cv_file in pending if cv_file in ranks]
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                executor.submit(
+                    screen_cv, cv_file, job_requirements, limiter, report_mode, compare_mode,
+                    parsed[cv_file]["cv_data"] if cv_file in parsed else None,
+                    parsed[cv_file]["parse_seconds"] if cv_file in parsed else 0.0
+                ): cv_file
+                for cv_file in pending
+            }
+            for future in as_completed(futures):
+                cv_file = futures[future]
+                try:
+                    record = future.result()
+                except Exception as e:
+                    logger.error(f"Unexpected error screening {cv_file}: {str(e)}")
+                    record = {"cv_file": cv_file, "status": "error", "error": str(e), "timings": {}}
+                if cv_file in ranks:
+                    rank, entry = ranks[cv_file]
+                    record.update({"shortlist_rank": rank, "shortlist_score": entry["score"]})
+                write(record)
+
+    print_report(records, time.perf_counter() - started)
+    return 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Screen a directory of CVs against one job description")
+    parser.add_argument('--job', required=True, help="Path to a text file containing the job description")
+    parser.add_argument('--cv-dir', required=True, help="Directory of CV PDFs")
+    parser.add_argument('--output', default='results.ndjson', help="NDJSON output file (appended to, used for resume)")
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('BATCH_CONCURRENCY', 4)),
+                        help="Maximum number of CVs processed at once")
+    parser.add_argument('--rpm', type=float, default=float(os.getenv('BATCH_LLM_RPM', 0)),
+                        help="Maximum LLM requests per minute (0 for unlimited)")
+    parser.add_argument('--retry-failed', action='store_true', help="Re-run CVs that failed in a previous run")
+    parser.add_argument('--report-mode', choices=['deep', 'fast'], default=None,
+                        help="'fast' builds the summary from the comparison without a second LLM call")
+    parser.add_argument('--compare-mode', choices=['llm', 'evidence', 'fast'], default=None,
+                        help="'evidence' sends locally ranked evidence instead of every CV responsibility; "
+                             "'fast' compares locally without an LLM call")
+    parser.add_argument('--shortlist', type=int, default=0,
+                        help="Rank all CVs locally and only compare the best N (0 compares every CV)")
+    parser.add_argument('--index-dir', default=None,
+                        help="Candidate index directory used with --shortlist (defaults to CANDIDATE_INDEX_DIR)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+
+    with open(args.job, 'r', encoding='utf-8') as f:
+        job_description = f.read()
+
+    return run_batch(
+        job_description,
+        args.cv_dir,
+        args.output,
+        concurrency=max(1, args.concurrency),
+        requests_per_minute=args.rpm,
+        retry_failed=args.retry_failed,
+        report_mode=args.report_mode,
+        compare_mode=args.compare_mode,
+        shortlist=max(0, args.shortlist),
+        index_dir=args.index_dir
+    )
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Benchmark page-parallel PDF extraction against single-process extraction.
+
+Usage:
+    python benchmarks/bench_pdf_extract.py --pages 10 20 40 --workers 4
+
+A synthetic multi-page CV is generated for each page count so the benchmark
+needs no fixture files.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.pdf_parser import extract_pages  # noqa: E402
+
+LINES_PER_PAGE = 45
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def write_sample_pdf(path: str, pages: int) -> None:
+    """Write a text-only PDF with the given number of pages."""
+    objects = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    pages_id = len(objects) + 1
+    objects.append(None)  # placeholder for the page tree
+
+    page_ids = []
+    for page in range(pages):
+        lines = [
+            f"Page {page + 1} line {line + 1}: Led development of distributed data pipelines in Python and Go"
+            for line in range(LINES_PER_PAGE)
+        ]
+        stream = "BT /F1 10 Tf 40 800 Td 14 TL " + " ".join(f"({_escape(line)}) '" for line in lines) + " ET"
+        content = stream.encode("latin-1")
+        content_id = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content))
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (pages_id, content_id, font_id)
+        ))
+
+    kids = b" ".join(b"%d 0 R" % page_id for page_id in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, body in enumerate(objects, start=1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+            len(objects) + 1, catalog_id, xref))
+
+def time_extraction(path: str, backend: str, workers: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        text = extract_pages(path, backend, workers=workers, max_pages=0)
+        best = min(best, time.perf_counter() - started)
+        if not text:
+            raise RuntimeError(f"{backend} extracted no text from {path}")
+    return best
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark page-parallel PDF extraction")
+    parser.add_argument("--pages", type=int, nargs="+", default=[5, 10, 20, 40])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--backends", nargs="+", default=["pypdf2", "pdfplumber"])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is kept)")
+    args = parser.parse_args(argv)
+
+    print(f"{'backend':<11} {'pages':>5} {'1 worker':>10} {f'{args.workers} workers':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for pages in args.pages:
+            path = os.path.join(tmp, f"cv_{pages}.pdf")
+            write_sample_pdf(path, pages)
+            for backend in args.backends:
+                # Warm the pool so worker start-up is not counted
+                extract_pages(path, backend, workers=args.workers, max_pages=0)
+                sequential = time_extraction(path, backend, 1, args.repeat)
+                parallel = time_extraction(path, backend, args.workers, args.repeat)
+                print(f"{backend:<11} {pages:>5} {sequential:>9.3f}s {parallel:>9.3f}s {sequential / parallel:>7.2f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
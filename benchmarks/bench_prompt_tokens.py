@@ -0,0 +1,84 @@
+"""
+Benchmark the prompt payloads compare_node and summary_node send to the LLM.
+
+Usage:
+    python benchmarks/bench_prompt_tokens.py
+    python benchmarks/bench_prompt_tokens.py --corpus my_corpus.json --cv-budget 1000
+
+Each corpus entry holds the cv_data, job_requirements and comparison_result a
+run would produce. The payloads are serialized the original way (indent=2
+JSON) and with utils.prompt_serializer under the configured token budgets,
+and the tokens saved are reported per node.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from nodes.compare import PROMPT_CV_TOKEN_BUDGET, PROMPT_JOB_TOKEN_BUDGET
+from nodes.summary import PROMPT_COMPARISON_TOKEN_BUDGET
+from utils.prompt_serializer import _encoding, count_tokens, serialize_for_prompt
+
+CORPUS_PATH = os.path.join(ROOT, "benchmarks", "fixtures", "prompt_corpus.json")
+
+def measure(payloads, budget_by_field):
+    """Return (original tokens, serialized tokens, serialization seconds) for one node."""
+    original = serialized = 0
+    elapsed = 0.0
+    for field, data in payloads.items():
+        original += count_tokens(json.dumps(data, indent=2))
+        started = time.perf_counter()
+        text = serialize_for_prompt(data, budget_by_field[field])
+        elapsed += time.perf_counter() - started
+        serialized += count_tokens(text)
+    return original, serialized, elapsed
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark prompt token usage per node")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--cv-budget", type=int, default=PROMPT_CV_TOKEN_BUDGET)
+    parser.add_argument("--job-budget", type=int, default=PROMPT_JOB_TOKEN_BUDGET)
+    parser.add_argument("--comparison-budget", type=int, default=PROMPT_COMPARISON_TOKEN_BUDGET)
+    args = parser.parse_args(argv)
+
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    budgets = {
+        "cv_data": args.cv_budget,
+        "job_requirements": args.job_budget,
+        "comparison_result": args.comparison_budget,
+    }
+    nodes = {
+        "compare": ("cv_data", "job_requirements"),
+        "summary": ("comparison_result",),
+    }
+
+    tokenizer = "tiktoken" if _encoding() is not None else "length estimate (tiktoken unavailable)"
+    print(f"tokenizer: {tokenizer}")
+    print(f"budgets: cv={args.cv_budget} job={args.job_budget} comparison={args.comparison_budget}")
+    print(f"{'case':<20} {'node':<8} {'before':>7} {'after':>7} {'saved':>7} {'saved %':>8} {'ms':>7}")
+
+    totals = {node: [0, 0] for node in nodes}
+    for case in corpus:
+        for node, fields in nodes.items():
+            payloads = {field: case[field] for field in fields}
+            before, after, elapsed = measure(payloads, budgets)
+            totals[node][0] += before
+            totals[node][1] += after
+            saved = before - after
+            print(f"{case['name']:<20} {node:<8} {before:>7} {after:>7} {saved:>7} "
+                  f"{saved / before if before else 0:>8.1%} {elapsed * 1000:>7.2f}")
+
+    print("totals:")
+    for node, (before, after) in totals.items():
+        saved = before - after
+        print(f"  {node:<8} {before:>7} -> {after:>7} tokens, saved {saved} ({saved / before if before else 0:.1%})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Benchmark local evidence ranking between CV statements and job requirements.
+
+Usage:
+    python benchmarks/bench_similarity.py --repeat 50
+
+Runs utils.similarity.rank_evidence on every case of the prompt fixture
+corpus and reports the matrix size, latency and coverage, plus the best
+evidence pairs so the ranking can be eyeballed.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.similarity import cv_evidence_items, job_requirement_items, rank_evidence
+
+CORPUS_PATH = os.path.join(ROOT, "benchmarks", "fixtures", "prompt_corpus.json")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark local evidence ranking")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--show", type=int, default=3, help="Evidence pairs printed per case")
+    args = parser.parse_args(argv)
+
+    with open(args.corpus, "r", encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    print(f"{'case':<20} {'matrix':>9} {'median':>9} {'max':>9} {'coverage':>9}")
+    for case in corpus:
+        cv_data, job_requirements = case["cv_data"], case["job_requirements"]
+        timings = []
+        for _ in range(max(1, args.repeat)):
+            started = time.perf_counter()
+            result = rank_evidence(cv_data, job_requirements)
+            timings.append(time.perf_counter() - started)
+
+        shape = f"{len(cv_evidence_items(cv_data))}x{len(job_requirement_items(job_requirements))}"
+        print(f"{case['name']:<20} {shape:>9} {statistics.median(timings) * 1000:>7.2f}ms "
+              f"{max(timings) * 1000:>7.2f}ms {result['coverage_ratio']:>9.0%}")
+        for item in result["evidence"][:args.show]:
+            print(f"    {item['score']:.2f}  {item['requirement'][:50]!r} <- {item['cv_evidence'][:50]!r}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
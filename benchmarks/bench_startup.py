@@ -0,0 +1,138 @@
+"""
+Benchmark cold start: import app, create it and serve the first request.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --write-baseline
+    python benchmarks/bench_startup.py --baseline benchmarks/startup_baseline.json
+
+Each run starts a fresh interpreter with `python -X importtime`, so nothing is
+cached between runs. The benchmark fails (exit code 1) when:
+  * a module that should only load on first use (langchain_openai, langgraph,
+    the nodes, ...) is imported during start-up, or
+  * with --baseline, the median time-to-first-request exceeds the baseline by
+    more than --tolerance, or
+  * with --max-seconds, the median exceeds that limit.
+
+Timings depend on the machine, so no baseline is committed; record one with
+--write-baseline on the machine (or CI runner) that compares against it.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "startup_baseline.json")
+
+# Modules that must stay out of the start-up path
+LAZY_MODULES = [
+    "langchain_openai",
+    "langchain",
+    "langgraph",
+    "openai",
+    "graph",
+    "nodes.parse_cv",
+    "nodes.parse_job",
+    "nodes.compare",
+    "nodes.summary",
+    "utils.llm",
+]
+
+STARTUP_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app({"TESTING": True})
+created = time.perf_counter()
+response = app.test_client().get("/")
+served = time.perf_counter()
+assert response.status_code == 200, response.status_code
+print(json.dumps({
+    "import_seconds": imported - started,
+    "create_seconds": created - imported,
+    "first_request_seconds": served - created,
+    "total_seconds": served - started,
+    "modules": sorted(sys.modules),
+}))
+"""
+
+def run_once(python: str) -> dict:
+    """Start a fresh interpreter and return its timings and slowest imports."""
+    env = {**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "benchmark"),
+           "SESSION_SWEEP_INTERVAL_SECONDS": "0"}
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", STARTUP_SCRIPT],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Start-up failed:\n{result.stderr[-2000:]}")
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    imports = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = [part.strip() for part in line[len("import time:"):].split("|")]
+        if parts[1].isdigit():
+            imports.append((int(parts[1]), parts[2].strip()))
+    timings["slowest_imports"] = sorted(imports, reverse=True)[:10]
+    return timings
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark app cold start")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="Allowed slowdown over the baseline median (0.5 = 50%%)")
+    parser.add_argument("--max-seconds", type=float, default=None,
+                        help="Absolute limit on the median time-to-first-request")
+    parser.add_argument("--baseline", default=None,
+                        help="Compare against a baseline recorded on this machine with --write-baseline")
+    parser.add_argument("--write-baseline", action="store_true",
+                        help=f"Record this run as the baseline (at --baseline, default {os.path.relpath(BASELINE_PATH, ROOT)})")
+    args = parser.parse_args(argv)
+
+    runs = [run_once(sys.executable) for _ in range(max(1, args.runs))]
+    median = statistics.median(run["total_seconds"] for run in runs)
+    print(f"{'import':>8} {'create':>8} {'request':>8} {'total':>8}")
+    for run in runs:
+        print(f"{run['import_seconds']:>7.3f}s {run['create_seconds']:>7.3f}s "
+              f"{run['first_request_seconds']:>7.3f}s {run['total_seconds']:>7.3f}s")
+    print(f"median time-to-first-request: {median:.3f}s")
+    print("slowest imports (cumulative):")
+    for microseconds, module in runs[-1]["slowest_imports"]:
+        print(f"  {microseconds / 1e6:>7.3f}s {module}")
+
+    failures = []
+    loaded = set(runs[-1]["modules"])
+    eager = [module for module in LAZY_MODULES if module in loaded]
+    if eager:
+        failures.append(f"modules imported at start-up that should load lazily: {', '.join(eager)}")
+
+    if args.write_baseline:
+        baseline_path = args.baseline or BASELINE_PATH
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump({"median_total_seconds": round(median, 4)}, f, indent=2)
+            f.write("\n")
+        print(f"baseline written to {baseline_path}")
+    elif args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["median_total_seconds"]
+        limit = baseline * (1 + args.tolerance)
+        print(f"baseline: {baseline:.3f}s (limit {limit:.3f}s)")
+        if median > limit:
+            failures.append(f"median {median:.3f}s exceeds baseline {baseline:.3f}s by more than {args.tolerance:.0%}")
+
+    if args.max_seconds is not None and median > args.max_seconds:
+        failures.append(f"median {median:.3f}s exceeds --max-seconds {args.max_seconds:.3f}s")
+
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,25 +1,87 @@
+import logging
+import os
+import sqlite3
+import threading
 from langgraph.graph import StateGraph, START, END
-from typing import TypedDict, List, Dict, Any
+from langgraph.checkpoint.memory import InMemorySaver
+from langchain_core.runnables import RunnableConfig
+from typing import TypedDict, List, Dict, Any, Optional
 from nodes.parse_cv import parse_cv_node
 from nodes.confirm_cv import confirm_cv_node
 from nodes.parse_job import parse_job_node
 from nodes.compare import compare_node
 from nodes.summary import summary_node
 
-class WorkflowState(TypedDict):
+logger = logging.getLogger(__name__)
+
+# "sqlite" persists checkpoints to CHECKPOINT_DB so any worker can resume a session
+CHECKPOINTER = os.getenv('CHECKPOINTER', 'sqlite').lower()
+CHECKPOINT_DB = os.getenv('CHECKPOINT_DB', 'cache/checkpoints.db')
+
+# The graph pauses before these nodes for human input: CV review, then the job description
+INTERRUPT_BEFORE = ["confirm_cv", "parse_job"]
+
+_compiled_workflow = None
+_compile_lock = threading.Lock()
+
+class WorkflowState(TypedDict, total=False):
     cv_file_path: str
     cv_text: str
     cv_data: Dict[str, Any]
+    formatted_cv_data: Dict[str, Any]
     confirmed_cv_data: Dict[str, Any]
+    requires_human_input: bool
     job_description: str
     job_requirements: Dict[str, Any]
     comparison_result: Dict[str, Any]
     final_analysis: Dict[str, Any]
     session_id: str
+    report_mode: str
+    compare_mode: str
     current_step: str
     error_message: str
+    analysis_id: str
+
+def summary_graph_node(state: Dict[str, Any], config: RunnableConfig) -> Dict[str, Any]:
+    """Run summary_node, streaming to the on_partial_summary callback passed in the run config"""
+    on_partial = config.get("configurable", {}).get("on_partial_summary")
+    return summary_node(state, on_partial=on_partial)
+
+def _continue_unless_failed(next_node: str):
+    """Route to next_node, or end the run when the previous node reported an error"""
+    def route(state: Dict[str, Any]) -> str:
+        return END if state.get("error_message") else next_node
+    return route
+
+def create_checkpointer(kind: Optional[str] = None):
+    """
+    Build the checkpointer that persists graph state between requests.
 
-def create_workflow():
+    Args:
+        kind: "sqlite" or "memory" (defaults to CHECKPOINTER)
+
+    Returns:
+        LangGraph checkpoint saver
+    """
+    kind = kind or CHECKPOINTER
+    if kind == "sqlite":
+        try:
+            from langgraph.checkpoint.sqlite import SqliteSaver
+        except ImportError:
+            logger.warning("langgraph-checkpoint-sqlite not installed, keeping checkpoints in memory")
+        else:
+            directory = os.path.dirname(CHECKPOINT_DB)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(CHECKPOINT_DB, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            return SqliteSaver(conn)
+    elif kind != "memory":
+        raise ValueError(f"Unknown CHECKPOINTER: {kind}")
+
+    return InMemorySaver()
+
+def create_workflow(checkpointer=None):
     # Create the state graph
     workflow = StateGraph(WorkflowState)
 
@@ -28,18 +90,29 @@ def create_workflow():
     workflow.add_node("confirm_cv", confirm_cv_node)
     workflow.add_node("parse_job", parse_job_node)
     workflow.add_node("compare", compare_node)
-    workflow.add_node("summary", summary_node)
+    workflow.add_node("summary", summary_graph_node)
 
-    # Add edges
+    # Add edges; a node that sets error_message ends the run
     workflow.add_edge(START, "parse_cv")
-    workflow.add_edge("parse_cv", "confirm_cv")
-
-    # Direct flow - no conditional edges for now since we handle confirmation in Flask
-    workflow.add_edge("confirm_cv", END)
-
-    workflow.add_edge("parse_job", "compare")
-    workflow.add_edge("compare", "summary")
+    workflow.add_conditional_edges("parse_cv", _continue_unless_failed("confirm_cv"), ["confirm_cv", END])
+    workflow.add_conditional_edges("confirm_cv", _continue_unless_failed("parse_job"), ["parse_job", END])
+    workflow.add_conditional_edges("parse_job", _continue_unless_failed("compare"), ["compare", END])
+    workflow.add_conditional_edges("compare", _continue_unless_failed("summary"), ["summary", END])
     workflow.add_edge("summary", END)
 
     # Compile the workflow
-    return workflow.compile()
\ No newline at end of file
+    return workflow.compile(checkpointer=checkpointer, interrupt_before=INTERRUPT_BEFORE)
+
+def get_workflow():
+    """
+    Return the compiled workflow, building it on first use.
+
+    The compiled graph holds no per-run state, so one instance is shared by
+    every session instead of recompiling the StateGraph on each upload.
+    Session state lives in the checkpointer, keyed by thread_id = session id.
+    """
+    global _compiled_workflow
+    with _compile_lock:
+        if _compiled_workflow is None:
+            _compiled_workflow = create_workflow(create_checkpointer())
+        return _compiled_workflow
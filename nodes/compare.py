@@ -1,93 +1,149 @@
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import copy
 import json
 import logging
 import os
 from dotenv import load_dotenv
+from utils.cache import SingleFlight, TTLCache, fingerprint, prompt_fingerprint, schema_fingerprint
+from utils.skills import match_skills, normalize_skill
+from utils.llm import get_llm, llm_config, llm_model_name
+from utils.metrics import COMPARE_SECTIONS, instrument
+from utils.prompt_serializer import serialize_for_prompt
+from utils.schemas import (
+    ComparisonResult, ComparisonSynthesis, CredentialsAssessment, ExperienceAssessment, SkillsAssessment
+)
+from utils.experience import experience_years, required_years
+from utils.similarity import rank_evidence
+from utils.structured import bind_structured_output, parse_structured
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-# Initialize LLM
-llm = ChatOpenAI(model="gpt-4", temperature=0)
+# Compute skill matches locally and only ask the LLM for evidence
+LOCAL_SKILL_MATCHING = os.getenv('LOCAL_SKILL_MATCHING', 'true').lower() == 'true'
 
-COMPARISON_PROMPT = ChatPromptTemplate.from_template("""
-You are an expert HR analyst specializing in candidate evaluation. Analyze how well a candidate's CV matches a job's requirements.
+# "llm" sends the whole CV to the LLM, "evidence" replaces the CV's individual
+# responsibilities with locally ranked evidence pairs, "fast" skips the LLM
+COMPARE_MODES = ("llm", "evidence", "fast")
+COMPARE_MODE = os.getenv('COMPARE_MODE', 'llm').lower()
+if COMPARE_MODE not in COMPARE_MODES:
+    logger.warning(f"Unknown COMPARE_MODE {COMPARE_MODE!r}, using 'llm'")
+    COMPARE_MODE = "llm"
 
-Candidate CV Data:
-{cv_data}
+# Split the LLM comparison into concurrent sub-analyses (skills, experience,
+# education and certifications) followed by a short synthesis prompt
+COMPARE_FANOUT = os.getenv('COMPARE_FANOUT', 'false').lower() == 'true'
 
-Job Requirements:
-{job_requirements}
+# Token budgets for the serialized CV and job requirements (0 disables trimming)
+PROMPT_CV_TOKEN_BUDGET = int(os.getenv('PROMPT_CV_TOKEN_BUDGET', 1500))
+PROMPT_JOB_TOKEN_BUDGET = int(os.getenv('PROMPT_JOB_TOKEN_BUDGET', 1000))
 
-Please provide a comprehensive analysis and return it as a JSON object:
+# Comparison sections keyed on the content of the CV fields they depend on, so
+# after a CV edit only the affected sections are assessed again
+COMPARE_CACHE_ENABLED = os.getenv('COMPARE_CACHE_ENABLED', 'true').lower() == 'true'
+section_cache = TTLCache(
+    ttl_seconds=float(os.getenv('COMPARE_CACHE_TTL_SECONDS', 6 * 60 * 60)),
+    max_entries=int(os.getenv('COMPARE_CACHE_MAX_ENTRIES', 4096))
+)
+compare_flight = SingleFlight()
 
-{{
-    "overall_match_score": "Percentage score (0-100) indicating overall fit",
-    "match_level": "Excellent/Good/Fair/Poor",
-    "skills_analysis": {{
+SKILLS_ANALYSIS_SCHEMA = """{
         "matching_skills": [
-            {{
+            {
                 "skill": "Skill name",
                 "cv_evidence": "Evidence from CV",
                 "job_requirement": "How it matches job requirement",
                 "match_strength": "Strong/Moderate/Weak"
-            }}
+            }
         ],
         "missing_required_skills": [
-            {{
+            {
                 "skill": "Missing required skill",
                 "importance": "Critical/High/Medium/Low",
                 "alternative_skills": ["Related skills candidate has"]
-            }}
+            }
         ],
         "additional_skills": [
-            {{
+            {
                 "skill": "Extra skill candidate has",
                 "value": "How this adds value to the role"
-            }}
+            }
+        ]
+    }"""
+
+SKILL_EVIDENCE_SCHEMA = """{
+        "matching_skills": [
+            {
+                "skill": "Skill name exactly as listed in the pre-computed matches",
+                "cv_evidence": "Evidence from CV"
+            }
+        ],
+        "missing_required_skills": [
+            {
+                "skill": "Skill name exactly as listed in the pre-computed gaps",
+                "alternative_skills": ["Related skills candidate has"]
+            }
         ]
-    }},
-    "experience_analysis": {{
+    }"""
+
+EVIDENCE_SECTION = """
+Pre-computed Evidence (closest CV statement for each job responsibility or requirement by text similarity; the CV's individual responsibilities are only given here):
+{evidence}
+"""
+
+SKILL_MATCHES_SECTION = """
+Pre-computed Skill Matches (authoritative: do not add or remove skills, only supply the evidence requested below):
+{skill_matches}
+"""
+
+EXPERIENCE_ANALYSIS_SCHEMA = """{
         "total_years_experience": "Candidate's total years",
         "required_years": "Job's required years",
         "experience_match": "Exceeds/Meets/Below requirements",
         "relevant_experience": [
-            {{
+            {
                 "role": "Previous role",
                 "relevance": "How it relates to target job",
                 "skills_gained": ["Key skills from this role"]
-            }}
+            }
         ],
         "experience_gaps": [
             "Areas where candidate lacks experience"
         ]
-    }},
-    "education_analysis": {{
+    }"""
+
+EDUCATION_ANALYSIS_SCHEMA = """{
         "meets_requirements": true,
         "candidate_education": ["Candidate's education"],
         "required_education": ["Job's education requirements"],
         "education_match": "Explanation of how education aligns"
-    }},
-    "certification_analysis": {{
+    }"""
+
+CERTIFICATION_ANALYSIS_SCHEMA = """{
         "matching_certifications": ["Certifications that match"],
         "missing_certifications": ["Required certifications candidate lacks"],
         "additional_certifications": ["Extra certifications candidate has"]
-    }},
-    "strengths": [
-        "Key strengths that make candidate attractive"
-    ],
-    "concerns": [
-        "Potential concerns or red flags"
-    ],
-    "growth_potential": "Assessment of candidate's growth potential",
-    "cultural_fit_indicators": [
-        "Indicators of potential cultural fit"
-    ],
-    "recommendations": {{
+    }"""
+
+# Fields of comparison_result in prompt order; skills_analysis takes the
+# skills schema chosen at run time
+COMPARISON_FIELDS = [
+    ("overall_match_score", '"Percentage score (0-100) indicating overall fit"'),
+    ("match_level", '"Excellent/Good/Fair/Poor"'),
+    ("skills_analysis", None),
+    ("experience_analysis", EXPERIENCE_ANALYSIS_SCHEMA),
+    ("education_analysis", EDUCATION_ANALYSIS_SCHEMA),
+    ("certification_analysis", CERTIFICATION_ANALYSIS_SCHEMA),
+    ("strengths", '[\n        "Key strengths that make candidate attractive"\n    ]'),
+    ("concerns", '[\n        "Potential concerns or red flags"\n    ]'),
+    ("growth_potential", '"Assessment of candidate\'s growth potential"'),
+    ("cultural_fit_indicators", '[\n        "Indicators of potential cultural fit"\n    ]'),
+    ("recommendations", """{
         "hiring_recommendation": "Strong Hire/Hire/No Hire/Need More Info",
         "interview_focus_areas": [
             "Areas to explore in interview"
@@ -95,9 +151,36 @@ Please provide a comprehensive analysis and return it as a JSON object:
         "development_areas": [
             "Skills/areas for potential development"
         ]
-    }}
-}}
+    }"""),
+]
+
+# Sections of comparison_result and the CV fields each one is assessed from;
+# the remaining fields (score, strengths, recommendations, ...) weigh everything
+SECTION_DEPENDENCIES = {
+    "skills_analysis": ("skills", "projects"),
+    "experience_analysis": ("experience",),
+    "education_analysis": ("education",),
+    "certification_analysis": ("certifications",),
+}
+
+def response_schema(skills_analysis_schema: str, omit=(), include=None) -> str:
+    """JSON object layout requested from the LLM: the fields in include (default all), without those in omit."""
+    fields = [
+        f'    "{name}": {skills_analysis_schema if schema is None else schema}'
+        for name, schema in COMPARISON_FIELDS
+        if name not in omit and (include is None or name in include)
+    ]
+    return "{\n" + ",\n".join(fields) + "\n}"
 
+COMPARISON_INPUTS = """
+Candidate CV Data:
+{cv_data}
+
+Job Requirements:
+{job_requirements}
+{skill_matches}{evidence}"""
+
+COMPARISON_GUIDELINES = """
 Important:
 - Be objective and evidence-based in your analysis
 - Consider both technical and soft skill requirements
@@ -105,14 +188,521 @@ Important:
 - Be realistic about match percentages
 - Consider transferable skills and potential for growth
 - Highlight both positives and areas of concern
-""")
+"""
+
+COMPARISON_PROMPT = ChatPromptTemplate.from_template("""
+You are an expert HR analyst specializing in candidate evaluation. Analyze how well a candidate's CV matches a job's requirements.
+""" + COMPARISON_INPUTS + """
+Please provide a comprehensive analysis and return it as a JSON object:
+
+{response_schema}
+""" + COMPARISON_GUIDELINES)
+
+COMPARISON_UPDATE_PROMPT = ChatPromptTemplate.from_template("""
+You are an expert HR analyst specializing in candidate evaluation. The candidate edited their CV after it was compared with this job, and the analysis is being updated.
+""" + COMPARISON_INPUTS + """
+Sections of the previous analysis that the edit does not affect (still valid, do not return them):
+{unchanged_sections}
+
+Re-assess the other sections and the overall verdict against the current CV, and return them as a JSON object:
+
+{response_schema}
+""" + COMPARISON_GUIDELINES)
+
+SUB_ANALYSIS_PROMPT = ChatPromptTemplate.from_template("""
+You are an expert HR analyst specializing in candidate evaluation. Assess one aspect of how well a candidate's CV matches a job's requirements: {focus}. Other aspects are assessed separately.
+""" + COMPARISON_INPUTS + """
+Return your assessment as a JSON object:
+
+{response_schema}
+""" + COMPARISON_GUIDELINES)
+
+SYNTHESIS_PROMPT = ChatPromptTemplate.from_template("""
+You are an expert HR analyst specializing in candidate evaluation. A candidate's skills, experience, education and certifications have been assessed against a job's requirements. Weigh these assessments into an overall verdict.
+
+Candidate:
+{candidate}
+
+Job:
+{job}
+
+Assessments:
+{assessments}
+
+Return the overall verdict as a JSON object:
+
+{response_schema}
+""" + COMPARISON_GUIDELINES)
+
+# Sub-analyses run concurrently when COMPARE_FANOUT is on: the comparison
+# sections each one produces, the job requirement fields it is given, and
+# what it should focus on
+SUB_ANALYSES = {
+    "skills": {
+        "schema": SkillsAssessment,
+        "sections": ("skills_analysis",),
+        "job_fields": ("job_title", "required_skills", "preferred_skills", "technologies", "soft_skills"),
+        "focus": "the candidate's skills"
+    },
+    "experience": {
+        "schema": ExperienceAssessment,
+        "sections": ("experience_analysis",),
+        "job_fields": ("job_title", "experience_level", "required_experience", "responsibilities"),
+        "focus": "the candidate's work experience"
+    },
+    "credentials": {
+        "schema": CredentialsAssessment,
+        "sections": ("education_analysis", "certification_analysis"),
+        "job_fields": ("job_title", "required_education", "preferred_education",
+                       "required_certifications", "preferred_certifications"),
+        "focus": "the candidate's education and certifications"
+    },
+}
+
+SYNTHESIS_FIELDS = tuple(name for name, _ in COMPARISON_FIELDS if name not in SECTION_DEPENDENCIES)
+SYNTHESIS_JOB_FIELDS = ("job_title", "company", "experience_level", "employment_type", "job_summary")
+
+def merge_skill_evidence(local_skills: Dict[str, Any], llm_skills: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Attach the LLM's qualitative evidence to the locally computed skill lists.
+
+    Args:
+        local_skills: Output of utils.skills.match_skills
+        llm_skills: skills_analysis section returned by the LLM
+
+    Returns:
+        skills_analysis section in the comparison_result schema
+    """
+    evidence = {}
+    for field in ("matching_skills", "missing_required_skills"):
+        for item in (llm_skills or {}).get(field) or []:
+            if isinstance(item, dict) and item.get("skill"):
+                evidence[(field, normalize_skill(item["skill"]))] = item
+
+    merged = {}
+    for field in ("matching_skills", "missing_required_skills"):
+        merged[field] = []
+        for item in local_skills[field]:
+            extra = evidence.get((field, normalize_skill(item["skill"])), {})
+            if field == "matching_skills":
+                merged[field].append({
+                    "skill": item["skill"],
+                    "cv_evidence": extra.get("cv_evidence") or f"Listed in CV skills as {item['cv_skill']}",
+                    "job_requirement": item["job_requirement"],
+                    "match_strength": item["match_strength"]
+                })
+            else:
+                merged[field].append({
+                    "skill": item["skill"],
+                    "importance": item["importance"],
+                    "alternative_skills": extra.get("alternative_skills") or item["alternative_skills"]
+                })
+    merged["additional_skills"] = local_skills["additional_skills"]
+    return merged
+
+def _without_responsibilities(cv_data: Dict[str, Any]) -> Dict[str, Any]:
+    """CV data with each role's responsibilities left out (they are sent as evidence instead)."""
+    return {
+        **cv_data,
+        "experience": [
+            {key: value for key, value in job.items() if key != "responsibilities"} if isinstance(job, dict) else job
+            for job in cv_data.get("experience") or []
+        ]
+    }
+
+def build_fast_comparison(cv_data: Dict[str, Any], job_requirements: Dict[str, Any],
+                          local_skills: Dict[str, Any], evidence: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Derive comparison_result locally from skill matches and ranked evidence.
+
+    The score weighs required-skill coverage (50%), responsibility coverage
+    (30%) and years of experience (20%).
+
+    Args:
+        cv_data: Confirmed CV data
+        job_requirements: Parsed job requirements
+        local_skills: Output of utils.skills.match_skills
+        evidence: Output of utils.similarity.rank_evidence
+
+    Returns:
+        comparison_result in the same shape as the LLM comparison
+    """
+    required_matches = [item for item in local_skills["matching_skills"] if item["job_requirement"] != "Preferred skill"]
+    missing = local_skills["missing_required_skills"]
+    skill_coverage = len(required_matches) / (len(required_matches) + len(missing)) if required_matches or missing else 1.0
+
+    years = experience_years(cv_data.get("experience"))
+    years_required = required_years(job_requirements)
+    if years_required is None:
+        experience_match, experience_score = "Meets", 1.0
+    elif years is None:
+        experience_match, experience_score = "Unknown", 0.5
+    else:
+        experience_score = min(1.0, years / years_required) if years_required else 1.0
+        experience_match = "Exceeds" if years > years_required else "Meets" if years >= years_required else "Below"
+
+    score = int(round(100 * (0.5 * skill_coverage + 0.3 * evidence["coverage_ratio"] + 0.2 * experience_score)))
+    if score >= 85:
+        match_level, hiring = "Excellent", "Strong Hire"
+    elif score >= 70:
+        match_level, hiring = "Good", "Hire"
+    elif score >= 50:
+        match_level, hiring = "Fair", "Need More Info"
+    else:
+        match_level, hiring = "Poor", "No Hire"
 
+    relevant = {}
+    for item in evidence["evidence"]:
+        relevant.setdefault(item["cv_source"], []).append(item["requirement"])
+    uncovered = [item["requirement"] for item in evidence["coverage"] if not item["covered"]]
+
+    cv_certifications = {
+        normalize_skill(item.get("name") if isinstance(item, dict) else item): item.get("name") if isinstance(item, dict) else item
+        for item in cv_data.get("certifications") or [] if (item.get("name") if isinstance(item, dict) else item)
+    }
+    required_certifications = [str(item) for item in job_requirements.get("required_certifications") or []]
+
+    return {
+        "overall_match_score": score,
+        "match_level": match_level,
+        "skills_analysis": merge_skill_evidence(local_skills, {}),
+        "experience_analysis": {
+            "total_years_experience": years,
+            "required_years": years_required,
+            "experience_match": experience_match,
+            "relevant_experience": [
+                {"role": source, "relevance": f"Evidence for: {'; '.join(requirements[:2])}", "skills_gained": []}
+                for source, requirements in relevant.items()
+            ],
+            "experience_gaps": uncovered[:5]
+        },
+        "education_analysis": {
+            "meets_requirements": None,
+            "candidate_education": [
+                str(item.get("degree")) for item in cv_data.get("education") or [] if isinstance(item, dict) and item.get("degree")
+            ],
+            "required_education": [
+                " ".join(str(item[key]) for key in ("level", "field") if item.get(key)) if isinstance(item, dict) else str(item)
+                for item in job_requirements.get("required_education") or []
+            ],
+            "education_match": "Not assessed in fast mode"
+        },
+        "certification_analysis": {
+            "matching_certifications": [name for name in required_certifications if normalize_skill(name) in cv_certifications],
+            "missing_certifications": [name for name in required_certifications if normalize_skill(name) not in cv_certifications],
+            "additional_certifications": [
+                name for key, name in cv_certifications.items()
+                if key not in {normalize_skill(required) for required in required_certifications}
+            ]
+        },
+        "strengths": [f"{item['cv_evidence']} ({item['cv_source']})" for item in evidence["evidence"][:3]]
+                     + [f"Has {item['skill']}" for item in required_matches[:3]],
+        "concerns": [f"Missing {item['skill']}" for item in missing[:3]]
+                    + [f"No evidence for: {requirement}" for requirement in uncovered[:2]],
+        "growth_potential": "Not assessed in fast mode",
+        "cultural_fit_indicators": [],
+        "recommendations": {
+            "hiring_recommendation": hiring,
+            "interview_focus_areas": uncovered[:3],
+            "development_areas": [item["skill"] for item in missing[:3]]
+        }
+    }
+
+def comparison_cache_keys(cv_data: Dict[str, Any], job_requirements: Dict[str, Any],
+                          compare_mode: str) -> Dict[str, str]:
+    """
+    Build the section cache keys of a comparison.
+
+    Every key covers the job requirements, the compare mode, the prompts and
+    the model; a section's key also covers the CV fields it depends on (see
+    SECTION_DEPENDENCIES), and "full" covers the whole CV.
+
+    Args:
+        cv_data: Confirmed CV data
+        job_requirements: Parsed job requirements
+        compare_mode: "llm" or "evidence"
+
+    Returns:
+        Dict mapping each section name, "full" and "context" (the shared part) to a hex digest
+    """
+    context = fingerprint(
+        json.dumps(job_requirements, sort_keys=True, default=str),
+        compare_mode,
+        LOCAL_SKILL_MATCHING,
+        COMPARE_FANOUT,
+        prompt_fingerprint(COMPARISON_PROMPT),
+        prompt_fingerprint(COMPARISON_UPDATE_PROMPT),
+        prompt_fingerprint(SUB_ANALYSIS_PROMPT),
+        prompt_fingerprint(SYNTHESIS_PROMPT),
+        schema_fingerprint(ComparisonResult),
+        llm_model_name("compare")
+    )
+    keys = {
+        section: fingerprint(context, section, json.dumps([cv_data.get(field) for field in fields], sort_keys=True, default=str))
+        for section, fields in SECTION_DEPENDENCIES.items()
+    }
+    keys["full"] = fingerprint(context, json.dumps(cv_data, sort_keys=True, default=str))
+    keys["context"] = context
+    return keys
+
+def _cached_sections(cache_keys: Dict[str, str]) -> Dict[str, Any]:
+    """Sections of a previous comparison still valid for the current CV"""
+    sections = {}
+    for section in SECTION_DEPENDENCIES:
+        cached = section_cache.get(cache_keys[section])
+        if cached is not None:
+            sections[section] = copy.deepcopy(cached)
+    return sections
+
+def _cache_comparison(cache_keys: Dict[str, str], comparison_result: Dict[str, Any], reused) -> None:
+    for section in SECTION_DEPENDENCIES:
+        COMPARE_SECTIONS.inc(section=section, outcome="cached" if section in reused else "computed")
+        if section not in reused:
+            section_cache.set(cache_keys[section], copy.deepcopy(comparison_result.get(section)))
+    section_cache.set(cache_keys["full"], copy.deepcopy(comparison_result))
+
+def _compare_and_cache(cv_data: Dict[str, Any], job_requirements: Dict[str, Any], compare_mode: str,
+                       cache_keys: Dict[str, str], cached_sections: Dict[str, Any]) -> Dict[str, Any]:
+    if COMPARE_FANOUT:
+        comparison_result = fanout_comparison(cv_data, job_requirements, compare_mode, cached_sections, cache_keys)
+    else:
+        comparison_result = single_comparison(cv_data, job_requirements, compare_mode, cached_sections)
+    _cache_comparison(cache_keys, comparison_result, cached_sections)
+    return comparison_result
+
+def _evidence_section(cv_data: Dict[str, Any], job_requirements: Dict[str, Any]) -> str:
+    """Prompt section with the locally ranked evidence pairs (evidence mode)"""
+    evidence = rank_evidence(cv_data, job_requirements)
+    return EVIDENCE_SECTION.format(evidence=serialize_for_prompt({
+        "evidence": [
+            {key: item[key] for key in ("requirement", "cv_evidence", "cv_source", "score")}
+            for item in evidence["evidence"]
+        ],
+        "requirements_without_evidence": [
+            item["requirement"] for item in evidence["coverage"] if not item["covered"]
+        ]
+    }))
+
+def _skill_matches_section(local_skills: Dict[str, Any]) -> str:
+    """Prompt section with the locally computed skill matches"""
+    return SKILL_MATCHES_SECTION.format(skill_matches=serialize_for_prompt({
+        "matching_skills": [
+            {"skill": item["skill"], "cv_skill": item["cv_skill"]}
+            for item in local_skills["matching_skills"]
+        ],
+        "missing_required_skills": [item["skill"] for item in local_skills["missing_required_skills"]]
+    }))
+
+def _invoke_structured(prompt: ChatPromptTemplate, inputs: Dict[str, Any], schema) -> Dict[str, Any]:
+    """
+    Run one comparison prompt and validate the answer against schema.
+
+    Raises:
+        ValueError: If no valid answer could be obtained, even after repair
+    """
+    llm = get_llm("compare")
+    chain = prompt | bind_structured_output(llm, schema, "compare")
+    response = chain.invoke(inputs, config=llm_config("compare"))
+
+    # Parse and validate the JSON response, repairing it if needed
+    return parse_structured(
+        response.content, schema, "compare", llm,
+        finish_reason=response.response_metadata.get("finish_reason")
+    )
+
+def single_comparison(cv_data: Dict[str, Any], job_requirements: Dict[str, Any], compare_mode: str,
+                      cached_sections: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the comparison as one prompt.
+
+    With cached_sections, the update prompt asks only for the other sections
+    and the overall verdict.
+
+    Returns:
+        comparison_result
+
+    Raises:
+        ValueError: If the LLM answer could not be used
+    """
+    # Convert data to compact JSON strings within the prompt budgets
+    evidence_section = ""
+    cv_for_prompt = cv_data
+    if compare_mode == "evidence":
+        evidence_section = _evidence_section(cv_data, job_requirements)
+        cv_for_prompt = _without_responsibilities(cv_data)
+
+    local_skills = None
+    if LOCAL_SKILL_MATCHING and "skills_analysis" not in cached_sections:
+        local_skills = match_skills(cv_data.get("skills") or [], job_requirements)
+        skill_matches = _skill_matches_section(local_skills)
+        skills_analysis_schema = SKILL_EVIDENCE_SCHEMA
+    else:
+        skill_matches = ""
+        skills_analysis_schema = SKILLS_ANALYSIS_SCHEMA
+
+    inputs = {
+        "cv_data": serialize_for_prompt(cv_for_prompt, PROMPT_CV_TOKEN_BUDGET),
+        "job_requirements": serialize_for_prompt(job_requirements, PROMPT_JOB_TOKEN_BUDGET),
+        "skill_matches": skill_matches,
+        "evidence": evidence_section,
+        "response_schema": response_schema(skills_analysis_schema, omit=cached_sections)
+    }
+    if cached_sections:
+        # Only the sections affected by the CV edit and the overall verdict are requested
+        prompt = COMPARISON_UPDATE_PROMPT
+        inputs["unchanged_sections"] = serialize_for_prompt(cached_sections)
+    else:
+        prompt = COMPARISON_PROMPT
+
+    comparison_result = _invoke_structured(prompt, inputs, ComparisonResult)
+    if local_skills is not None:
+        comparison_result["skills_analysis"] = merge_skill_evidence(
+            local_skills, comparison_result.get("skills_analysis")
+        )
+    comparison_result.update(cached_sections)
+    return comparison_result
+
+def _sub_analysis_inputs(name: str, cv_data: Dict[str, Any], job_requirements: Dict[str, Any],
+                         compare_mode: str) -> Tuple[Dict[str, Any], Any]:
+    """Prompt inputs of one sub-analysis, plus the local skill matches for the skills analysis"""
+    spec = SUB_ANALYSES[name]
+    fields = [field for section in spec["sections"] for field in SECTION_DEPENDENCIES[section]]
+    cv_part = {field: cv_data[field] for field in fields if cv_data.get(field)}
+    job_part = {field: job_requirements[field] for field in spec["job_fields"] if job_requirements.get(field)}
+
+    evidence_section = ""
+    if name == "experience" and compare_mode == "evidence":
+        evidence_section = _evidence_section(cv_data, job_requirements)
+        cv_part = _without_responsibilities(cv_part)
+
+    local_skills = None
+    skill_matches = ""
+    skills_analysis_schema = SKILLS_ANALYSIS_SCHEMA
+    if name == "skills" and LOCAL_SKILL_MATCHING:
+        local_skills = match_skills(cv_data.get("skills") or [], job_requirements)
+        skill_matches = _skill_matches_section(local_skills)
+        skills_analysis_schema = SKILL_EVIDENCE_SCHEMA
+
+    return {
+        "focus": spec["focus"],
+        "cv_data": serialize_for_prompt(cv_part, PROMPT_CV_TOKEN_BUDGET),
+        "job_requirements": serialize_for_prompt(job_part, PROMPT_JOB_TOKEN_BUDGET),
+        "skill_matches": skill_matches,
+        "evidence": evidence_section,
+        "response_schema": response_schema(skills_analysis_schema, include=spec["sections"])
+    }, local_skills
+
+async def _gather_structured(calls: List[Tuple[ChatPromptTemplate, Dict[str, Any], Any]]) -> list:
+    # The blocking client calls run on worker threads, so they share the keep-alive
+    # connection pool and the rate limiter with every other LLM call
+    return await asyncio.gather(
+        *(asyncio.to_thread(_invoke_structured, *call) for call in calls),
+        return_exceptions=True
+    )
+
+def _run_concurrently(calls: List[Tuple[ChatPromptTemplate, Dict[str, Any], Any]]) -> list:
+    """Run _invoke_structured calls concurrently; failed calls yield their exception"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_gather_structured(calls))
+    # Already inside an event loop (e.g. an async graph run): use a loop on another thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, _gather_structured(calls)).result()
+
+def fanout_comparison(cv_data: Dict[str, Any], job_requirements: Dict[str, Any], compare_mode: str,
+                      cached_sections: Dict[str, Any], cache_keys: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Run the comparison as concurrent sub-analyses and a synthesis step.
+
+    Skills, experience and education+certifications are assessed by three
+    smaller prompts running concurrently, each given only the CV and job
+    fields it needs. A short synthesis prompt then weighs their results into
+    the score, strengths, concerns and recommendations. Sub-analyses whose
+    sections are all in cached_sections are skipped, and with cache_keys every
+    sub-result is cached as soon as it is available, so a failed run keeps the
+    parts that succeeded.
+
+    Args:
+        cv_data: Confirmed CV data
+        job_requirements: Parsed job requirements
+        compare_mode: "llm" or "evidence"
+        cached_sections: Comparison sections that are still valid
+        cache_keys: Output of comparison_cache_keys, or None to disable caching
+
+    Returns:
+        comparison_result
+
+    Raises:
+        ValueError: If an LLM answer could not be used (other errors of a
+            failed sub-analysis are raised as they are)
+    """
+    sections = dict(cached_sections)
+    pending = [name for name, spec in SUB_ANALYSES.items()
+               if not all(section in cached_sections for section in spec["sections"])]
+    prepared = {name: _sub_analysis_inputs(name, cv_data, job_requirements, compare_mode) for name in pending}
+    results = _run_concurrently([
+        (SUB_ANALYSIS_PROMPT, inputs, SUB_ANALYSES[name]["schema"]) for name, (inputs, _) in prepared.items()
+    ])
+
+    failures = []
+    for name, result in zip(pending, results):
+        if isinstance(result, Exception):
+            logger.error(f"Comparison {name} sub-analysis failed: {str(result)}")
+            failures.append(result)
+            continue
+        local_skills = prepared[name][1]
+        if local_skills is not None:
+            result["skills_analysis"] = merge_skill_evidence(local_skills, result.get("skills_analysis"))
+        for section in SUB_ANALYSES[name]["sections"]:
+            sections[section] = result.get(section) or {}
+            if cache_keys:
+                section_cache.set(cache_keys[section], copy.deepcopy(sections[section]))
+    if failures:
+        raise failures[0]
+
+    # Sections in prompt order, then the synthesis over them
+    assessments = serialize_for_prompt({section: sections[section] for section in SECTION_DEPENDENCIES})
+    candidate = serialize_for_prompt({
+        field: value for field, value in cv_data.items()
+        if field not in {dependency for fields in SECTION_DEPENDENCIES.values() for dependency in fields}
+    }, PROMPT_CV_TOKEN_BUDGET)
+    job = serialize_for_prompt({field: job_requirements[field] for field in SYNTHESIS_JOB_FIELDS if job_requirements.get(field)})
+
+    synthesis_key = fingerprint(cache_keys["context"], "synthesis", candidate, assessments) if cache_keys else None
+    synthesis = section_cache.get(synthesis_key) if synthesis_key else None
+    if synthesis is None:
+        synthesis = _invoke_structured(SYNTHESIS_PROMPT, {
+            "candidate": candidate,
+            "job": job,
+            "assessments": assessments,
+            "response_schema": response_schema(SKILLS_ANALYSIS_SCHEMA, include=SYNTHESIS_FIELDS)
+        }, ComparisonSynthesis)
+        if synthesis_key:
+            section_cache.set(synthesis_key, copy.deepcopy(synthesis))
+    else:
+        synthesis = copy.deepcopy(synthesis)
+
+    # Assemble in the field order of the single-prompt comparison
+    combined = {**synthesis, **sections}
+    return ComparisonResult.model_validate(
+        {name: combined[name] for name, _ in COMPARISON_FIELDS if name in combined}
+    ).model_dump(mode="json")
+
+@instrument("compare")
 def compare_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Compare CV data against job requirements using LLM analysis.
 
+    Sections of an earlier comparison whose CV fields have not changed since
+    (e.g. after the user edits one skill and resubmits) are reused from
+    section_cache; the LLM is only asked for the other sections and the
+    overall verdict. With COMPARE_FANOUT the comparison runs as concurrent
+    sub-analyses (see fanout_comparison) instead of one large prompt.
+
     Args:
-        state: Current workflow state containing confirmed_cv_data and job_requirements
+        state: Current workflow state containing confirmed_cv_data and job_requirements;
+            an optional compare_mode ("llm", "evidence" or "fast") overrides COMPARE_MODE
 
     Returns:
         Updated state with comparison_result
@@ -133,39 +723,59 @@ def compare_node(state: Dict[str, Any]) -> Dict[str, Any]:
                 "error_message": "No job requirements available for comparison"
             }
 
-        # Convert data to JSON strings for the prompt
-        cv_data_str = json.dumps(confirmed_cv_data, indent=2)
-        job_requirements_str = json.dumps(job_requirements, indent=2)
-
-        # Use LLM to perform comparison analysis
-        chain = COMPARISON_PROMPT | llm
-        response = chain.invoke({
-            "cv_data": cv_data_str,
-            "job_requirements": job_requirements_str
-        })
+        compare_mode = (state.get("compare_mode") or COMPARE_MODE).lower()
+        if compare_mode not in COMPARE_MODES:
+            logger.warning(f"Unknown compare_mode {compare_mode!r}, using {COMPARE_MODE!r}")
+            compare_mode = COMPARE_MODE
+        if compare_mode == "fast":
+            comparison_result = build_fast_comparison(
+                confirmed_cv_data, job_requirements,
+                match_skills(confirmed_cv_data.get("skills") or [], job_requirements),
+                rank_evidence(confirmed_cv_data, job_requirements)
+            )
+            return {
+                **state,
+                "comparison_result": comparison_result,
+                "current_step": "comparison_complete"
+            }
 
-        # Parse JSON response
-        try:
-            comparison_result = json.loads(response.content)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM response as JSON: {str(e)}")
-            # Fallback: try to extract JSON from response
-            content = response.content
-            start_idx = content.find('{')
-            end_idx = content.rfind('}') + 1
-            if start_idx != -1 and end_idx != 0:
-                try:
-                    comparison_result = json.loads(content[start_idx:end_idx])
-                except json.JSONDecodeError:
-                    return {
-                        **state,
-                        "error_message": "Failed to parse comparison result from LLM response"
-                    }
-            else:
+        cache_keys = None
+        cached_sections = {}
+        if COMPARE_CACHE_ENABLED:
+            cache_keys = comparison_cache_keys(confirmed_cv_data, job_requirements, compare_mode)
+            cached_result = section_cache.get(cache_keys["full"])
+            if cached_result is not None:
+                logger.info("Comparison cache hit")
+                for section in SECTION_DEPENDENCIES:
+                    COMPARE_SECTIONS.inc(section=section, outcome="cached")
                 return {
                     **state,
-                    "error_message": "Invalid JSON format in LLM response"
+                    "comparison_result": copy.deepcopy(cached_result),
+                    "current_step": "comparison_complete"
                 }
+            cached_sections = _cached_sections(cache_keys)
+            if cached_sections:
+                logger.info(f"Comparison reusing cached sections: {', '.join(cached_sections)}")
+
+        # Use LLM to perform comparison analysis
+        try:
+            if cache_keys:
+                # A comparison of the same data already running (e.g. a speculative
+                # one) is joined instead of repeated
+                comparison_result = copy.deepcopy(compare_flight.do(
+                    cache_keys["full"], _compare_and_cache,
+                    confirmed_cv_data, job_requirements, compare_mode, cache_keys, cached_sections
+                ))
+            elif COMPARE_FANOUT:
+                comparison_result = fanout_comparison(confirmed_cv_data, job_requirements, compare_mode, {})
+            else:
+                comparison_result = single_comparison(confirmed_cv_data, job_requirements, compare_mode, {})
+        except ValueError as e:
+            logger.error(str(e))
+            return {
+                **state,
+                "error_message": "Failed to parse comparison result from LLM response"
+            }
 
         return {
             **state,
@@ -178,4 +788,4 @@ def compare_node(state: Dict[str, Any]) -> Dict[str, Any]:
         return {
             **state,
             "error_message": f"Comparison analysis failed: {str(e)}"
-        }
\ No newline at end of file
+        }
@@ -1,18 +1,22 @@
 from typing import Dict, Any
 import logging
+from utils.metrics import instrument
 
 logger = logging.getLogger(__name__)
 
+@instrument("confirm_cv")
 def confirm_cv_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Human-in-the-loop node for CV data confirmation.
-    This node prepares the CV data for human review and waits for confirmation.
+    The graph is interrupted before this node; it runs once the reviewer has
+    submitted confirmed_cv_data (or prepares the CV data for review if not).
 
     Args:
-        state: Current workflow state containing cv_data
+        state: Current workflow state containing cv_data and, after review,
+            confirmed_cv_data
 
     Returns:
-        Updated state ready for human confirmation
+        Updated state ready for human confirmation, or marked as confirmed
     """
     try:
         cv_data = state.get("cv_data")
@@ -22,6 +26,13 @@ def confirm_cv_node(state: Dict[str, Any]) -> Dict[str, Any]:
                 "error_message": "No CV data available for confirmation"
             }
 
+        if state.get("confirmed_cv_data"):
+            return {
+                **state,
+                "current_step": "cv_confirmed",
+                "requires_human_input": False
+            }
+
         # Format CV data for display in the web interface
         formatted_cv_data = format_cv_for_display(cv_data)
 
@@ -100,4 +111,64 @@ def format_cv_for_display(cv_data: Dict[str, Any]) -> Dict[str, Any]:
         }
         formatted["certifications"].append(formatted_cert)
 
-    return formatted
\ No newline at end of file
+    return formatted
+
+def _form_value(value: Any) -> str:
+    """A value as a review form text field renders and submits it"""
+    return str(value).strip() if value else ""
+
+def unconfirmed_cv_data(cv_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The confirmed_cv_data the review form submits if the reviewer changes nothing.
+
+    Mirrors how confirm_cv.html renders cv_data and how the /confirm_cv route
+    reads the form back, so work started on it ahead of confirmation (see
+    speculative analysis) matches the real confirmation exactly.
+
+    Args:
+        cv_data: Parsed CV data shown on the review page
+
+    Returns:
+        CV data in the shape of confirmed_cv_data
+    """
+    experience = []
+    for exp in cv_data.get("experience") or []:
+        if not isinstance(exp, dict) or not _form_value(exp.get("title")):
+            continue
+        responsibilities = "; ".join(str(resp) for resp in exp.get("responsibilities") or [])
+        experience.append({
+            "title": _form_value(exp.get("title")),
+            "company": _form_value(exp.get("company")),
+            "start_date": _form_value(exp.get("start_date")),
+            "end_date": _form_value(exp.get("end_date")),
+            "responsibilities": [resp.strip() for resp in responsibilities.split(";") if resp.strip()]
+        })
+
+    education = []
+    for edu in cv_data.get("education") or []:
+        if not isinstance(edu, dict) or not _form_value(edu.get("degree")):
+            continue
+        education.append({
+            "degree": _form_value(edu.get("degree")),
+            "institution": _form_value(edu.get("institution")),
+            "graduation_date": _form_value(edu.get("graduation_date")),
+            "gpa": _form_value(edu.get("gpa")) or None
+        })
+
+    certifications = []
+    for cert in cv_data.get("certifications") or []:
+        name = _form_value((cert.get("name") or cert) if isinstance(cert, dict) else cert)
+        if name:
+            certifications.append(name)
+
+    return {
+        "name": str(cv_data.get("name") or ""),
+        "email": str(cv_data.get("email") or ""),
+        "phone": str(cv_data.get("phone") or ""),
+        "location": str(cv_data.get("location") or ""),
+        "summary": str(cv_data.get("summary") or ""),
+        "skills": [_form_value(skill) for skill in cv_data.get("skills") or [] if _form_value(skill)],
+        "experience": experience,
+        "education": education,
+        "certifications": certifications
+    }
@@ -1,19 +1,36 @@
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
+import hashlib
 import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from utils.pdf_parser import extract_text_from_pdf
+from utils.cv_preprocess import preprocess_cv_text, segment_sections, split_long_section
+from utils.cache import DiskCache, fingerprint, prompt_fingerprint, schema_fingerprint
+from utils.llm import get_llm, llm_config, llm_model_name
+from utils.metrics import instrument
+from utils.schemas import CVData
+from utils.structured import bind_structured_output, parse_structured_outcome
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-# Initialize LLM
-llm = ChatOpenAI(model="gpt-4", temperature=0)
+# Persistent cache of parse results, keyed on the PDF bytes
+CV_CACHE_ENABLED = os.getenv('CV_CACHE_ENABLED', 'true').lower() == 'true'
+cv_cache = DiskCache(
+    os.getenv('CV_CACHE_DIR', os.path.join('cache', 'cv')),
+    max_bytes=int(os.getenv('CV_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+)
+
+# Long CVs are split into sections that are parsed concurrently and merged
+CV_SECTION_PARSING = os.getenv('CV_SECTION_PARSING', 'true').lower() == 'true'
+CV_SECTION_MIN_CHARS = int(os.getenv('CV_SECTION_MIN_CHARS', 4000))
+CV_SECTION_MAX_CHARS = int(os.getenv('CV_SECTION_MAX_CHARS', 6000))
+CV_SECTION_WORKERS = int(os.getenv('CV_SECTION_WORKERS', 4))
 
 CV_PARSING_PROMPT = ChatPromptTemplate.from_template("""
 You are an expert HR assistant specializing in CV analysis. Extract structured information from the following CV text.
@@ -84,6 +101,216 @@ Important:
 - Be accurate and do not hallucinate information
 """)
 
+SECTION_PARSING_PROMPT = ChatPromptTemplate.from_template("""
+You are an expert HR assistant specializing in CV analysis. Below is one part of a CV ({section}). Extract structured information from it.
+
+CV Section:
+{section_text}
+
+Return a JSON object with only these keys:
+
+{fields}
+
+Important:
+- Only use information from this part of the CV
+- If any information is not available, use null or empty array as appropriate
+- Ensure all dates are in a consistent format
+- Be accurate and do not hallucinate information
+""")
+
+# Keys each section's prompt asks for ("profile" is the contact block plus any unrecognized sections)
+SECTION_FIELDS = {
+    "profile": """{
+    "name": "Full name of the person",
+    "email": "Email address",
+    "phone": "Phone number",
+    "location": "Current location/address",
+    "summary": "Professional summary or objective",
+    "skills": ["Technical and professional skills mentioned here"]
+}""",
+    "experience": """{
+    "experience": [
+        {
+            "title": "Job title",
+            "company": "Company name",
+            "location": "Job location",
+            "start_date": "Start date",
+            "end_date": "End date or 'Present'",
+            "duration": "Duration (e.g., '2 years 3 months')",
+            "responsibilities": ["Key responsibilities and achievements"]
+        }
+    ],
+    "skills": ["Technologies and skills named in these roles"]
+}""",
+    "education": """{
+    "education": [
+        {
+            "degree": "Degree type and field",
+            "institution": "Educational institution",
+            "location": "Institution location",
+            "graduation_date": "Graduation date or expected date",
+            "gpa": "GPA if mentioned",
+            "relevant_coursework": ["Relevant courses if mentioned"]
+        }
+    ]
+}""",
+    "skills": """{
+    "skills": ["List of technical and professional skills"]
+}""",
+    "certifications": """{
+    "certifications": [
+        {
+            "name": "Certification name",
+            "issuer": "Issuing organization",
+            "date": "Date obtained",
+            "expiry": "Expiry date if applicable"
+        }
+    ]
+}""",
+    "projects": """{
+    "projects": [
+        {
+            "name": "Project name",
+            "description": "Brief description",
+            "technologies": ["Technologies used"],
+            "date": "Project date or duration"
+        }
+    ]
+}""",
+    "languages": """{
+    "languages": [
+        {
+            "language": "Language name",
+            "proficiency": "Proficiency level"
+        }
+    ]
+}""",
+}
+
+def cv_cache_key(pdf_bytes: bytes) -> str:
+    """
+    Build the cache key for a CV upload.
+
+    The key covers the file contents, the parsing prompts and the model, so
+    editing CV_PARSING_PROMPT or switching models invalidates old entries.
+
+    Args:
+        pdf_bytes: Raw bytes of the uploaded PDF
+
+    Returns:
+        Hex digest used as the cache key
+    """
+    return fingerprint(
+        hashlib.sha256(pdf_bytes).hexdigest(),
+        prompt_fingerprint(CV_PARSING_PROMPT),
+        prompt_fingerprint(SECTION_PARSING_PROMPT) if CV_SECTION_PARSING else "",
+        fingerprint(*SECTION_FIELDS.values()) if CV_SECTION_PARSING else "",
+        schema_fingerprint(CVData),
+        llm_model_name("parse_cv")
+    )
+
+def plan_sections(cv_text: str) -> List[Tuple[str, str]]:
+    """
+    Decide how a CV is split for parsing.
+
+    Short CVs, and CVs without recognizable section headings, are parsed in
+    one call. Otherwise every section becomes one call (long sections are
+    split further at blank lines), and the summary and unrecognized sections
+    are parsed together with the contact block.
+
+    Args:
+        cv_text: Preprocessed CV text
+
+    Returns:
+        (section, text) pairs to parse; empty for a single whole-document call
+    """
+    if not CV_SECTION_PARSING or len(cv_text) < CV_SECTION_MIN_CHARS:
+        return []
+
+    sections = segment_sections(cv_text)
+    if sum(1 for section, _ in sections if section in SECTION_FIELDS and section != "profile") < 2:
+        return []
+
+    profile = [text for section, text in sections if section not in SECTION_FIELDS or section == "profile"]
+    plan = [("profile", "\n\n".join(profile))] if profile else []
+    for section, text in sections:
+        if section in SECTION_FIELDS and section != "profile":
+            plan.extend((section, chunk) for chunk in split_long_section(text, CV_SECTION_MAX_CHARS))
+    return plan
+
+def merge_section_results(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge per-section parse results into one cv_data object.
+
+    Single values keep the first non-empty answer in document order; lists are
+    concatenated without duplicates.
+    """
+    merged: Dict[str, Any] = {}
+    seen: Dict[str, set] = {}
+    for part in parts:
+        for key, value in part.items():
+            if isinstance(value, list):
+                items = merged.setdefault(key, [])
+                keys = seen.setdefault(key, set())
+                for item in value:
+                    item_key = item.strip().lower() if isinstance(item, str) else json.dumps(item, sort_keys=True)
+                    if item_key not in keys:
+                        keys.add(item_key)
+                        items.append(item)
+            elif value not in (None, "", {}) and merged.get(key) in (None, "", {}):
+                merged[key] = value
+            else:
+                merged.setdefault(key, value)
+    return CVData.model_validate(merged).model_dump(mode="json")
+
+def _parse_section(llm, section: str, section_text: str) -> Tuple[Dict[str, Any], str]:
+    """Parse one section with its focused prompt; returns the data and its parse outcome."""
+    chain = SECTION_PARSING_PROMPT | bind_structured_output(llm, CVData, "parse_cv")
+    response = chain.invoke({
+        "section": section,
+        "section_text": section_text,
+        "fields": SECTION_FIELDS[section]
+    }, config=llm_config("parse_cv"))
+    return parse_structured_outcome(
+        response.content, CVData, "parse_cv", llm,
+        finish_reason=response.response_metadata.get("finish_reason")
+    )
+
+def parse_sections(llm, plan: List[Tuple[str, str]]) -> Tuple[Dict[str, Any], bool]:
+    """
+    Parse CV sections concurrently and merge the results.
+
+    The wall-clock time is roughly that of the slowest section. Sections
+    that fail are logged and left out; the merged data is still shown to the
+    user for confirmation.
+
+    Returns:
+        Merged CV data, and whether any section failed or was only salvaged
+        from a truncated answer (the data is then incomplete and must not be
+        cached)
+
+    Raises:
+        ValueError: If no section could be parsed
+    """
+    with ThreadPoolExecutor(max_workers=max(1, min(CV_SECTION_WORKERS, len(plan)))) as executor:
+        futures = [executor.submit(_parse_section, llm, section, text) for section, text in plan]
+
+    parts = []
+    salvaged = False
+    for (section, _), future in zip(plan, futures):
+        try:
+            part, outcome = future.result()
+            parts.append(part)
+            salvaged = salvaged or outcome == "salvaged"
+        except Exception as e:
+            logger.warning(f"Failed to parse CV section {section}: {str(e)}")
+
+    if not parts:
+        raise ValueError("No CV section could be parsed")
+    logger.info(f"Parsed CV in {len(plan)} sections ({len(plan) - len(parts)} failed)")
+    return merge_section_results(parts), salvaged or len(parts) < len(plan)
+
+@instrument("parse_cv")
 def parse_cv_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Parse CV text using LLM to extract structured information.
@@ -102,40 +329,60 @@ def parse_cv_node(state: Dict[str, Any]) -> Dict[str, Any]:
                 "error_message": "No CV file path provided"
             }
 
-        # Extract text from PDF
+        cache_key = None
+        if CV_CACHE_ENABLED:
+            with open(cv_file_path, 'rb') as f:
+                cache_key = cv_cache_key(f.read())
+
+            cached = cv_cache.get(cache_key)
+            if cached:
+                logger.info(f"CV cache hit for {cv_file_path}")
+                return {
+                    **state,
+                    "cv_text": cached["cv_text"],
+                    "cv_data": cached["cv_data"],
+                    "current_step": "cv_parsed"
+                }
+
+        # Extract text from PDF and drop page numbers, running headers and stray whitespace
         cv_text = extract_text_from_pdf(cv_file_path)
+        if cv_text:
+            cv_text = preprocess_cv_text(cv_text)
         if not cv_text:
             return {
                 **state,
                 "error_message": "Failed to extract text from CV PDF"
             }
 
-        # Use LLM to parse CV text
-        chain = CV_PARSING_PROMPT | llm
-        response = chain.invoke({"cv_text": cv_text})
-
-        # Parse JSON response
+        # Use LLM to parse CV text, section by section for long CVs
+        llm = get_llm("parse_cv")
+        plan = plan_sections(cv_text)
+        incomplete = False
         try:
-            cv_data = json.loads(response.content)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM response as JSON: {str(e)}")
-            # Fallback: try to extract JSON from response
-            content = response.content
-            start_idx = content.find('{')
-            end_idx = content.rfind('}') + 1
-            if start_idx != -1 and end_idx != 0:
-                try:
-                    cv_data = json.loads(content[start_idx:end_idx])
-                except json.JSONDecodeError:
-                    return {
-                        **state,
-                        "error_message": "Failed to parse CV data from LLM response"
-                    }
+            if plan:
+                cv_data, incomplete = parse_sections(llm, plan)
             else:
-                return {
-                    **state,
-                    "error_message": "Invalid JSON format in LLM response"
-                }
+                chain = CV_PARSING_PROMPT | bind_structured_output(llm, CVData, "parse_cv")
+                response = chain.invoke({"cv_text": cv_text}, config=llm_config("parse_cv"))
+
+                # Parse and validate the JSON response, repairing it if needed
+                cv_data, outcome = parse_structured_outcome(
+                    response.content, CVData, "parse_cv", llm,
+                    finish_reason=response.response_metadata.get("finish_reason")
+                )
+                incomplete = outcome == "salvaged"
+        except ValueError as e:
+            logger.error(str(e))
+            return {
+                **state,
+                "error_message": "Failed to parse CV data from LLM response"
+            }
+
+        if incomplete:
+            # A transient section failure must not be served to every later upload of this PDF
+            logger.warning(f"Not caching incomplete CV parse for {cv_file_path}")
+        elif cache_key:
+            cv_cache.set(cache_key, {"cv_text": cv_text, "cv_data": cv_data})
 
         return {
             **state,
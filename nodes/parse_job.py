@@ -1,18 +1,31 @@
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from typing import Dict, Any
-import json
+import copy
 import logging
 import os
+import re
 from dotenv import load_dotenv
+from utils.cache import SingleFlight, TTLCache, fingerprint, prompt_fingerprint, schema_fingerprint
+from utils.llm import get_llm, llm_config, llm_model_name
+from utils.metrics import instrument
+from utils.schemas import JobRequirements
+from utils.structured import bind_structured_output, parse_structured
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-# Initialize LLM
-llm = ChatOpenAI(model="gpt-4", temperature=0)
+# Parsed requirements keyed on the normalized description
+JOB_CACHE_ENABLED = os.getenv('JOB_CACHE_ENABLED', 'true').lower() == 'true'
+job_cache = TTLCache(
+    ttl_seconds=float(os.getenv('JOB_CACHE_TTL_SECONDS', 24 * 60 * 60)),
+    max_entries=int(os.getenv('JOB_CACHE_MAX_ENTRIES', 1024))
+)
+job_parse_flight = SingleFlight()
+
+BULLET_PATTERN = re.compile(r"^[ \t]*[-*+\u2022\u2023\u2043\u2013\u2014\u25aa\u25cf\u25e6\u00b7]+[ \t]*", re.MULTILINE)
+WHITESPACE_PATTERN = re.compile(r"\s+")
 
 JOB_PARSING_PROMPT = ChatPromptTemplate.from_template("""
 You are an expert HR assistant specializing in job requirement analysis. Extract structured information from the following job description.
@@ -87,6 +100,66 @@ Important:
 - Do not hallucinate information not present in the job description
 """)
 
+def normalize_job_description(job_description: str) -> str:
+    """
+    Normalize a job description so trivially different pastes share a cache key.
+
+    Bullet glyphs are stripped, whitespace is collapsed and case is folded.
+
+    Args:
+        job_description: Raw job description text
+
+    Returns:
+        Normalized text
+    """
+    text = BULLET_PATTERN.sub("", job_description)
+    text = WHITESPACE_PATTERN.sub(" ", text)
+    return text.strip().casefold()
+
+def job_cache_key(job_description: str) -> str:
+    """
+    Build the cache key for a job description.
+
+    Args:
+        job_description: Raw job description text
+
+    Returns:
+        Hex digest covering the normalized text, the prompt and the model
+    """
+    return fingerprint(
+        normalize_job_description(job_description),
+        prompt_fingerprint(JOB_PARSING_PROMPT),
+        schema_fingerprint(JobRequirements),
+        llm_model_name("parse_job")
+    )
+
+def _parse_job_requirements(job_description: str) -> Dict[str, Any]:
+    """
+    Run the LLM and decode its JSON answer.
+
+    Raises:
+        ValueError: If no valid job requirements could be obtained, even after repair
+    """
+    llm = get_llm("parse_job")
+    chain = JOB_PARSING_PROMPT | bind_structured_output(llm, JobRequirements, "parse_job")
+    response = chain.invoke({"job_description": job_description}, config=llm_config("parse_job"))
+
+    # Parse and validate the JSON response, repairing it if needed
+    try:
+        return parse_structured(
+            response.content, JobRequirements, "parse_job", llm,
+            finish_reason=response.response_metadata.get("finish_reason")
+        )
+    except ValueError as e:
+        logger.error(str(e))
+        raise ValueError("Failed to parse job requirements from LLM response")
+
+def _parse_and_cache(cache_key: str, job_description: str) -> Dict[str, Any]:
+    job_requirements = _parse_job_requirements(job_description)
+    job_cache.set(cache_key, job_requirements)
+    return job_requirements
+
+@instrument("parse_job")
 def parse_job_node(state: Dict[str, Any]) -> Dict[str, Any]:
     """
     Parse job description using LLM to extract structured requirements.
@@ -105,32 +178,26 @@ def parse_job_node(state: Dict[str, Any]) -> Dict[str, Any]:
                 "error_message": "No job description provided"
             }
 
-        # Use LLM to parse job description
-        chain = JOB_PARSING_PROMPT | llm
-        response = chain.invoke({"job_description": job_description})
-
-        # Parse JSON response
         try:
-            job_requirements = json.loads(response.content)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM response as JSON: {str(e)}")
-            # Fallback: try to extract JSON from response
-            content = response.content
-            start_idx = content.find('{')
-            end_idx = content.rfind('}') + 1
-            if start_idx != -1 and end_idx != 0:
-                try:
-                    job_requirements = json.loads(content[start_idx:end_idx])
-                except json.JSONDecodeError:
-                    return {
-                        **state,
-                        "error_message": "Failed to parse job requirements from LLM response"
-                    }
+            if JOB_CACHE_ENABLED:
+                cache_key = job_cache_key(job_description)
+                job_requirements = job_cache.get(cache_key)
+                if job_requirements is None:
+                    # Identical concurrent requests share one LLM call
+                    job_requirements = job_parse_flight.do(
+                        cache_key, _parse_and_cache, cache_key, job_description
+                    )
+                else:
+                    logger.info("Job description cache hit")
+                # Callers get their own copy of the shared cached dict
+                job_requirements = copy.deepcopy(job_requirements)
             else:
-                return {
-                    **state,
-                    "error_message": "Invalid JSON format in LLM response"
-                }
+                job_requirements = _parse_job_requirements(job_description)
+        except ValueError as e:
+            return {
+                **state,
+                "error_message": str(e)
+            }
 
         return {
             **state,
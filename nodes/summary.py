@@ -1,18 +1,31 @@
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
-from typing import Dict, Any
-import json
+from typing import Dict, Any, Callable, Optional, Tuple
 import logging
 import os
+import re
+import time
 from dotenv import load_dotenv
+from utils.partial_json import parse_partial_json
+from utils.llm import get_llm, llm_config
+from utils.metrics import instrument
+from utils.prompt_serializer import serialize_for_prompt
+from utils.schemas import FinalAnalysis
+from utils.structured import bind_structured_output, parse_structured
 
 # Load environment variables
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
-# Initialize LLM
-llm = ChatOpenAI(model="gpt-4", temperature=0)
+# "deep" asks the LLM for a narrative report, "fast" derives it from the comparison
+REPORT_MODES = ("deep", "fast")
+REPORT_MODE = os.getenv('REPORT_MODE', 'deep').lower()
+
+# Minimum delay between two partial summary updates while streaming
+STREAM_UPDATE_INTERVAL = float(os.getenv('SUMMARY_STREAM_INTERVAL_SECONDS', 0.15))
+
+# Token budget for the serialized comparison result (0 disables trimming)
+PROMPT_COMPARISON_TOKEN_BUDGET = int(os.getenv('PROMPT_COMPARISON_TOKEN_BUDGET', 2000))
 
 SUMMARY_PROMPT = ChatPromptTemplate.from_template("""
 You are an expert HR consultant. Create a comprehensive, actionable summary report for a job fit analysis.
@@ -88,12 +101,200 @@ Important:
 - Include practical next steps for the hiring process
 """)
 
-def summary_node(state: Dict[str, Any]) -> Dict[str, Any]:
+def _stream_completion(chain, inputs: Dict[str, Any],
+                       on_partial: Callable[[Dict[str, Any]], None]) -> Tuple[str, Optional[str]]:
+    """
+    Stream the completion, reporting the fields parsed so far as tokens arrive.
+
+    Returns:
+        The full completion text and its finish reason
+    """
+    content = ""
+    finish_reason = None
+    last_sent = None
+    last_time = 0.0
+    for chunk in chain.stream(inputs, config=llm_config("summary")):
+        content += chunk.content
+        finish_reason = chunk.response_metadata.get("finish_reason") or finish_reason
+        now = time.monotonic()
+        if now - last_time < STREAM_UPDATE_INTERVAL:
+            continue
+
+        partial = parse_partial_json(content)
+        if partial and partial != last_sent:
+            on_partial(partial)
+            last_sent = partial
+            last_time = now
+    return content, finish_reason
+
+IMPORTANCE_ORDER = {"critical": 0, "high": 1, "medium": 2, "low": 3}
+
+def _to_number(value: Any) -> Optional[float]:
+    """Extract the first number from values such as 75, "75%" or "5+ years"."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = re.search(r"\d+(\.\d+)?", str(value or ""))
+    return float(match.group()) if match else None
+
+def _as_list(value: Any) -> list:
+    return value if isinstance(value, list) else []
+
+def _dedupe(items) -> list:
+    seen = set()
+    result = []
+    for item in items:
+        if item and item not in seen:
+            seen.add(item)
+            result.append(item)
+    return result
+
+def build_fast_report(comparison_result: Dict[str, Any], job_title: str, candidate_name: str) -> Dict[str, Any]:
+    """
+    Derive the final_analysis structure from comparison_result with fixed rules.
+
+    This produces everything result.html renders without a second LLM call.
+
+    Args:
+        comparison_result: Output of compare_node
+        job_title: Title of the target job
+        candidate_name: Name of the candidate
+
+    Returns:
+        final_analysis dict in the same shape as the LLM summary
+    """
+    skills = comparison_result.get("skills_analysis") or {}
+    experience = comparison_result.get("experience_analysis") or {}
+    education = comparison_result.get("education_analysis") or {}
+    certifications = comparison_result.get("certification_analysis") or {}
+    recommendations = comparison_result.get("recommendations") or {}
+    strengths = _as_list(comparison_result.get("strengths"))
+    concerns = _as_list(comparison_result.get("concerns"))
+
+    score = _to_number(comparison_result.get("overall_match_score"))
+    score = int(round(min(max(score, 0), 100))) if score is not None else 0
+
+    hiring = str(recommendations.get("hiring_recommendation") or "")
+    if hiring in ("Strong Hire", "Hire", "No Hire"):
+        recommendation = hiring
+    elif hiring == "Need More Info":
+        recommendation = "Maybe"
+    elif score >= 85:
+        recommendation = "Strong Hire"
+    elif score >= 70:
+        recommendation = "Hire"
+    elif score >= 50:
+        recommendation = "Maybe"
+    else:
+        recommendation = "No Hire"
+
+    matching = [item for item in _as_list(skills.get("matching_skills")) if isinstance(item, dict)]
+    matching.sort(key=lambda item: 0 if item.get("match_strength") == "Strong" else 1)
+    missing = [item for item in _as_list(skills.get("missing_required_skills")) if isinstance(item, dict)]
+    missing.sort(key=lambda item: IMPORTANCE_ORDER.get(str(item.get("importance", "")).lower(), 4))
+
+    strong_matches = _dedupe(item.get("skill") for item in matching)[:5]
+    skill_gaps = _dedupe(item.get("skill") for item in missing)[:3]
+    transferable = _dedupe(
+        alternative for item in missing for alternative in _as_list(item.get("alternative_skills"))
+    )[:5]
+
+    years = _to_number(experience.get("total_years_experience"))
+    if years is None:
+        experience_level = "Not determined"
+    elif years < 3:
+        experience_level = "Junior"
+    elif years < 7:
+        experience_level = "Mid"
+    else:
+        experience_level = "Senior"
+
+    relevant_roles = [item for item in _as_list(experience.get("relevant_experience")) if isinstance(item, dict)]
+    relevant_experience = "; ".join(
+        f"{item.get('role')}: {item.get('relevance')}" if item.get('relevance') else str(item.get('role'))
+        for item in relevant_roles[:2] if item.get('role')
+    ) or "No directly relevant experience identified"
+
+    experience_match = str(experience.get("experience_match") or "").split(" ")[0].lower()
+    experience_verb = {
+        "exceeds": "exceeds",
+        "meets": "meets",
+        "below": "falls below"
+    }.get(experience_match, "could not be compared with")
+    match_level = comparison_result.get("match_level") or recommendation
+    executive_summary = (
+        f"{candidate_name} is a {str(match_level).lower()} match ({score}%) for the {job_title} role. "
+        f"The CV covers {len(matching)} of the skills the role asks for with {len(missing)} required skill gap(s), "
+        f"and their experience {experience_verb} the requirement."
+    )
+
+    low_risk = []
+    if experience_match in ("meets", "exceeds"):
+        low_risk.append(f"Experience {experience_verb} the role's requirements")
+    if education.get("meets_requirements") is True:
+        low_risk.append("Education meets the stated requirements")
+    low_risk.extend(f"Strong match on {skill}" for skill in strong_matches[:2])
+    high_risk = [
+        f"Missing {str(item.get('importance', 'required')).lower()} skill: {item.get('skill')}"
+        for item in missing if str(item.get("importance", "")).lower() == "critical"
+    ]
+
+    development_areas = _as_list(recommendations.get("development_areas"))
+    missing_certifications = _as_list(certifications.get("missing_certifications"))
+
+    return {
+        "executive_summary": executive_summary,
+        "match_score": score,
+        "recommendation": recommendation,
+        "key_highlights": strengths[:5] or [f"Matches {skill}" for skill in strong_matches],
+        "main_concerns": concerns[:3] or [f"No evidence of {skill}" for skill in skill_gaps],
+        "skill_summary": {
+            "strong_matches": strong_matches,
+            "skill_gaps": skill_gaps,
+            "transferable_skills": transferable
+        },
+        "experience_summary": {
+            "relevant_experience": relevant_experience,
+            "experience_level": experience_level,
+            "growth_trajectory": comparison_result.get("growth_potential") or "Not assessed"
+        },
+        "next_steps": {
+            "interview_recommended": recommendation != "No Hire",
+            "interview_focus": _as_list(recommendations.get("interview_focus_areas"))[:5],
+            "reference_check_focus": [str(item.get("role")) for item in relevant_roles[:2] if item.get("role")],
+            "skills_assessment": _dedupe(strong_matches[:3] + skill_gaps)
+        },
+        "development_plan": {
+            "immediate_training_needs": development_areas[:3] or skill_gaps,
+            "long_term_development": development_areas[3:] + missing_certifications
+        },
+        "salary_considerations": {
+            "market_positioning": "Not assessed in fast report",
+            "negotiation_factors": []
+        },
+        "risk_assessment": {
+            "low_risk_factors": low_risk,
+            "medium_risk_factors": concerns[3:] + _as_list(experience.get("experience_gaps"))[:3],
+            "high_risk_factors": high_risk
+        },
+        "timeline_recommendation": {
+            "Strong Hire": "Move to interview within the week",
+            "Hire": "Schedule interviews within two weeks",
+            "Maybe": "Hold until stronger candidates have been reviewed"
+        }.get(recommendation, "No further action recommended"),
+        "additional_notes": "Fast report derived directly from the comparison analysis. Request a deep report for a narrative assessment."
+    }
+
+@instrument("summary")
+def summary_node(state: Dict[str, Any],
+                 on_partial: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
     """
     Generate final comprehensive summary and recommendations.
 
     Args:
-        state: Current workflow state containing comparison_result and other data
+        state: Current workflow state containing comparison_result and other data;
+            an optional report_mode ("deep" or "fast") overrides REPORT_MODE
+        on_partial: Optional callback that switches to streaming mode and
+            receives the partially generated final_analysis as tokens arrive
 
     Returns:
         Updated state with final_analysis
@@ -113,46 +314,58 @@ def summary_node(state: Dict[str, Any]) -> Dict[str, Any]:
         job_title = job_requirements.get("job_title", "Unknown Position")
         candidate_name = confirmed_cv_data.get("name", "Unknown Candidate")
 
-        # Convert comparison result to JSON string for the prompt
-        comparison_result_str = json.dumps(comparison_result, indent=2)
+        report_mode = (state.get("report_mode") or REPORT_MODE).lower()
+        if report_mode == "fast":
+            final_analysis = build_fast_report(comparison_result, job_title, candidate_name)
+            final_analysis["metadata"] = {
+                "analysis_date": state.get("session_id", ""),
+                "job_title": job_title,
+                "candidate_name": candidate_name,
+                "workflow_version": "1.0",
+                "report_mode": "fast"
+            }
+            if on_partial:
+                on_partial(final_analysis)
+            return {
+                **state,
+                "final_analysis": final_analysis,
+                "current_step": "analysis_complete"
+            }
+
+        # Convert comparison result to a compact JSON string within the prompt budget
+        comparison_result_str = serialize_for_prompt(comparison_result, PROMPT_COMPARISON_TOKEN_BUDGET)
 
         # Use LLM to generate final summary
-        chain = SUMMARY_PROMPT | llm
-        response = chain.invoke({
+        llm = get_llm("summary")
+        chain = SUMMARY_PROMPT | bind_structured_output(llm, FinalAnalysis, "summary")
+        inputs = {
             "comparison_result": comparison_result_str,
             "job_title": job_title,
             "candidate_name": candidate_name
-        })
+        }
+        if on_partial:
+            content, finish_reason = _stream_completion(chain, inputs, on_partial)
+        else:
+            response = chain.invoke(inputs, config=llm_config("summary"))
+            content, finish_reason = response.content, response.response_metadata.get("finish_reason")
 
-        # Parse JSON response
+        # Parse and validate the JSON response, repairing it if needed
         try:
-            final_analysis = json.loads(response.content)
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse LLM response as JSON: {str(e)}")
-            # Fallback: try to extract JSON from response
-            content = response.content
-            start_idx = content.find('{')
-            end_idx = content.rfind('}') + 1
-            if start_idx != -1 and end_idx != 0:
-                try:
-                    final_analysis = json.loads(content[start_idx:end_idx])
-                except json.JSONDecodeError:
-                    return {
-                        **state,
-                        "error_message": "Failed to parse final analysis from LLM response"
-                    }
-            else:
-                return {
-                    **state,
-                    "error_message": "Invalid JSON format in LLM response"
-                }
+            final_analysis = parse_structured(content, FinalAnalysis, "summary", llm, finish_reason=finish_reason)
+        except ValueError as e:
+            logger.error(str(e))
+            return {
+                **state,
+                "error_message": "Failed to parse final analysis from LLM response"
+            }
 
         # Add metadata to final analysis
         final_analysis["metadata"] = {
             "analysis_date": state.get("session_id", ""),
             "job_title": job_title,
             "candidate_name": candidate_name,
-            "workflow_version": "1.0"
+            "workflow_version": "1.0",
+            "report_mode": "deep"
         }
 
         return {
@@ -0,0 +1,447 @@
+import json
+import os
+import time
+from typing import Any, Callable, Dict, Optional
+
+from utils.cache import fingerprint
+
+# Error prefixes reported for each analysis stage
+STAGE_ERRORS = {
+    "parse_cv": "CV parsing error",
+    "confirm_cv": "CV confirmation error",
+    "parse_job": "Job parsing error",
+    "compare": "Comparison error",
+    "summary": "Summary error",
+}
+
+# Pending node of an interrupted analysis -> node it is resumed after
+RESUMABLE_AFTER = {
+    ("compare",): "parse_job",
+    ("summary",): "compare",
+}
+
+# Analysis stages completed once the graph has reached each current_step
+ANALYSIS_STAGES = ("parse_job", "compare", "summary")
+COMPLETED_STAGES = {
+    "cv_confirmed": 0,
+    "job_parsed": 1,
+    "comparison_complete": 2,
+    "analysis_complete": 3,
+}
+
+# Upper bound on LLM comparisons a single catalog ranking may request
+JOB_CATALOG_MAX_COMPARE = int(os.getenv('JOB_CATALOG_MAX_COMPARE', 5))
+
+def thread_config(session_id: str) -> Dict[str, Any]:
+    """Checkpointer config addressing the graph thread of a session"""
+    return {"configurable": {"thread_id": session_id}}
+
+def get_session_state(session_id: str) -> Dict[str, Any]:
+    """
+    Load the checkpointed workflow state of a session.
+
+    Returns:
+        State values (empty if the session has no checkpoint)
+    """
+    from graph import get_workflow
+    return get_workflow().get_state(thread_config(session_id)).values or {}
+
+def start_session(cv_file_path: str, session_id: str) -> Dict[str, Any]:
+    """
+    Run the workflow graph up to the CV review interrupt.
+
+    Args:
+        cv_file_path: Path of the uploaded CV
+        session_id: Session the run belongs to, used as the checkpoint thread id
+
+    Returns:
+        Checkpointed state containing cv_data, or error_message on failure
+    """
+    from graph import get_workflow
+
+    workflow = get_workflow()
+    config = thread_config(session_id)
+    workflow.invoke({"cv_file_path": cv_file_path, "session_id": session_id}, config)
+    return workflow.get_state(config).values
+
+def confirm_session(session_id: str, confirmed_cv_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Resume the graph with the reviewer's CV data and run confirm_cv.
+
+    The run pauses again before parse_job until a job description is submitted.
+
+    Args:
+        session_id: Session whose graph thread is resumed
+        confirmed_cv_data: CV data edited and confirmed by the user
+
+    Returns:
+        Checkpointed state after confirmation
+    """
+    from graph import get_workflow
+
+    workflow = get_workflow()
+    config = thread_config(session_id)
+    if workflow.get_state(config).next == ("confirm_cv",):
+        workflow.update_state(config, {"confirmed_cv_data": confirmed_cv_data})
+        workflow.invoke(None, config)
+    else:
+        # Already past review (e.g. the form was resubmitted): replace the confirmed data
+        workflow.update_state(
+            config,
+            {"confirmed_cv_data": confirmed_cv_data, "error_message": ""},
+            as_node="confirm_cv"
+        )
+    return workflow.get_state(config).values
+
+def resume_analysis(session_id: str, job_description: str, report_mode: Optional[str] = None,
+                    on_stage: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                    on_partial_summary: Optional[Callable[[Dict[str, Any]], None]] = None,
+                    analysis_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Resume a confirmed session's graph with a job description and run it to the end.
+
+    A run interrupted part way (crash or redeploy) with the same job description
+    continues from its last checkpoint, so completed nodes are not executed again.
+    Otherwise the thread is rewound to just after CV confirmation.
+
+    Args:
+        session_id: Session whose graph thread is resumed
+        job_description: Raw job description text
+        report_mode: "deep" or "fast"; defaults to the deployment's REPORT_MODE
+        on_stage: Optional callback invoked with (stage, state) after each stage completes
+        on_partial_summary: Optional callback receiving the partially generated
+            final_analysis as tokens arrive
+        analysis_id: Id of the background job running the analysis, recorded in
+            the checkpoint so other worker processes can report on it
+
+    Returns:
+        Final state containing final_analysis, or error_message and failed_stage on failure
+    """
+    from graph import get_workflow
+
+    workflow = get_workflow()
+    config = thread_config(session_id)
+    snapshot = workflow.get_state(config)
+    if not snapshot.values.get("confirmed_cv_data"):
+        return {"failed_stage": "confirm_cv", "error_message": "No confirmed CV data for this session"}
+
+    # Continue an interrupted run from its last completed node; the report mode may still change
+    values = {"report_mode": report_mode or "", "analysis_id": analysis_id or ""}
+    as_node = RESUMABLE_AFTER.get(snapshot.next)
+    if not (as_node and snapshot.values.get("job_description") == job_description):
+        values.update(job_description=job_description, error_message="", current_step="cv_confirmed")
+        as_node = "confirm_cv"
+    workflow.update_state(config, values, as_node=as_node)
+
+    run_config = {"configurable": {**config["configurable"], "on_partial_summary": on_partial_summary}}
+    last_stage = None
+    for update in workflow.stream(None, run_config, stream_mode="updates"):
+        for stage, stage_state in update.items():
+            if stage.startswith("__"):
+                continue
+            last_stage = stage
+            if on_stage and not (stage_state or {}).get("error_message"):
+                on_stage(stage, stage_state)
+
+    state = workflow.get_state(config).values
+    if state.get("error_message"):
+        return {
+            **state,
+            "failed_stage": last_stage,
+            "error_message": f"{STAGE_ERRORS.get(last_stage, 'Analysis error')}: {state['error_message']}"
+        }
+    return state
+
+def analysis_progress(session_id: str, analysis_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Progress of a session's analysis as recorded in its checkpoint.
+
+    Lets any worker process report on an analysis running (or finished) in
+    another one.
+
+    Args:
+        session_id: Session the analysis belongs to
+        analysis_id: Id of the background job that started the analysis
+
+    Returns:
+        Dict with "status" ("running", "done" or "error"), completed "stages",
+        "error" and the final "state", or None if the session's latest
+        analysis is not analysis_id
+    """
+    from graph import get_workflow
+
+    snapshot = get_workflow().get_state(thread_config(session_id))
+    state = snapshot.values or {}
+    if not analysis_id or state.get("analysis_id") != analysis_id:
+        return None
+
+    stages = list(ANALYSIS_STAGES[:COMPLETED_STAGES.get(state.get("current_step"), 0)])
+    if snapshot.next:
+        return {"status": "running", "stages": stages, "error": None, "state": state}
+    if state.get("error_message"):
+        failed_stage = ANALYSIS_STAGES[min(len(stages), len(ANALYSIS_STAGES) - 1)]
+        error = f"{STAGE_ERRORS[failed_stage]}: {state['error_message']}"
+        return {"status": "error", "stages": stages, "error": error, "state": state}
+    return {"status": "done", "stages": stages, "error": None, "state": state}
+
+def discard_session(session_id: str, idle_seconds: Optional[float] = None) -> bool:
+    """
+    Delete a session's checkpoints.
+
+    Args:
+        session_id: Session whose graph thread is deleted
+        idle_seconds: Only delete if the latest checkpoint is at least this old, so a
+            session still active in another worker process is left alone
+
+    Returns:
+        True if the checkpoints were deleted
+    """
+    from datetime import datetime, timezone
+    from graph import get_workflow
+
+    workflow = get_workflow()
+    config = thread_config(session_id)
+    if idle_seconds is not None:
+        created_at = workflow.get_state(config).created_at
+        if created_at:
+            age = (datetime.now(timezone.utc) - datetime.fromisoformat(created_at)).total_seconds()
+            if age < idle_seconds:
+                return False
+
+    workflow.checkpointer.delete_thread(session_id)
+    return True
+
+# Job catalog for reverse matching, opened on first use
+_job_catalog = None
+
+def get_job_catalog():
+    """Return the shared job catalog, loading it on first use"""
+    global _job_catalog
+    if _job_catalog is None:
+        from utils.job_catalog import JobCatalog
+        _job_catalog = JobCatalog()
+    return _job_catalog
+
+def catalog_upsert(job_id: str, job_description: str, title: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Add or refresh a job in the catalog.
+
+    The posting is parsed with parse_job_node only if it is new or its text
+    changed since it was last stored.
+
+    Args:
+        job_id: Catalog id of the job
+        job_description: Raw job description text
+        title: Optional display title (defaults to the parsed job title)
+
+    Returns:
+        Dict with "job_id" and "status" ("created", "updated" or "unchanged"),
+        or error_message if parsing failed
+    """
+    from nodes.parse_job import parse_job_node
+
+    catalog = get_job_catalog()
+    existing = catalog.get(job_id)
+    if existing and catalog.is_current(job_id, job_description) and (title is None or title == existing.get("title")):
+        return {"job_id": job_id, "status": "unchanged"}
+
+    if existing and catalog.is_current(job_id, job_description):
+        job_requirements = existing["job_requirements"]
+    else:
+        state = parse_job_node({"job_description": job_description})
+        if state.get("error_message"):
+            return {"job_id": job_id, "error_message": f"{STAGE_ERRORS['parse_job']}: {state['error_message']}"}
+        job_requirements = state["job_requirements"]
+
+    catalog.put(job_id, job_description, job_requirements, title=title)
+    return {"job_id": job_id, "status": "updated" if existing else "created"}
+
+def rank_catalog(confirmed_cv_data: Dict[str, Any], top_k: int = 10, compare_top: int = 0) -> Dict[str, Any]:
+    """
+    Rank the job catalog for a confirmed CV.
+
+    Every job is scored locally in one vectorized pass; only the best
+    compare_top matches (capped by JOB_CATALOG_MAX_COMPARE) additionally go
+    through compare_node, concurrently.
+
+    Args:
+        confirmed_cv_data: CV data confirmed by the user
+        top_k: Number of jobs to return
+        compare_top: Number of leading matches to compare with the LLM
+
+    Returns:
+        Dict with "matches" (best first, with "comparison_result" or
+        "error_message" for the compared ones) and "catalog_size"
+    """
+    catalog = get_job_catalog()
+    matches = catalog.rank(confirmed_cv_data, top_k=top_k)
+    compared = matches[:max(0, min(compare_top, JOB_CATALOG_MAX_COMPARE))]
+
+    if compared:
+        from concurrent.futures import ThreadPoolExecutor
+        from nodes.compare import compare_node
+
+        def compare(match):
+            job = catalog.get(match["job_id"])
+            if job is None:
+                return {"error_message": "Job removed from the catalog"}
+            return compare_node({
+                "confirmed_cv_data": confirmed_cv_data,
+                "job_requirements": job["job_requirements"]
+            })
+
+        with ThreadPoolExecutor(max_workers=len(compared)) as executor:
+            for match, state in zip(compared, executor.map(compare, compared)):
+                if state.get("error_message"):
+                    match["error_message"] = f"{STAGE_ERRORS['compare']}: {state['error_message']}"
+                else:
+                    match["comparison_result"] = state["comparison_result"]
+
+    return {"matches": matches, "catalog_size": len(catalog)}
+
+def speculation_keys(job_description: str, confirmed_cv_data: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Keys identifying the input of each stage an analysis would run.
+
+    Returns:
+        Dict with a "parse_job" key (the job parse cache key) and a "compare"
+        key covering the job and the CV data
+    """
+    from nodes.parse_job import job_cache_key
+
+    job_key = job_cache_key(job_description)
+    return {
+        "parse_job": job_key,
+        "compare": fingerprint(job_key, json.dumps(confirmed_cv_data, sort_keys=True, default=str))
+    }
+
+def speculate_analysis(begin_stage: Callable[[str], bool], job_description: str,
+                       confirmed_cv_data: Dict[str, Any]) -> None:
+    """
+    Run job parsing and comparison ahead of the real analysis.
+
+    Results are not returned: the nodes' caches (and in-flight call
+    coalescing) hand them to the real run if its input turns out to match.
+
+    Args:
+        begin_stage: Called before each stage; the stage is skipped, and the
+            run ends, if it returns False (the speculation was superseded)
+        job_description: Job description typed so far
+        confirmed_cv_data: Confirmed CV data, or the unconfirmed CV data as
+            the review form would submit it
+    """
+    from nodes.parse_job import parse_job_node
+    from nodes.compare import compare_node
+
+    if not begin_stage("parse_job"):
+        return
+    state = parse_job_node({"job_description": job_description})
+    if state.get("error_message") or not begin_stage("compare"):
+        return
+    compare_node({"confirmed_cv_data": confirmed_cv_data, "job_requirements": state["job_requirements"]})
+
+def _timed(timings: Dict[str, float], stage: str, node: Callable[[Dict[str, Any]], Dict[str, Any]],
+           state: Dict[str, Any]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        return node(state)
+    finally:
+        timings[stage] = round(time.perf_counter() - started, 3)
+
+def run_intake(cv_file_path: str, job_description: str, session_id: str,
+               report_mode: Optional[str] = None, compare_mode: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Analyze a CV file against a job description in one pass, without human review.
+
+    CV extraction/parsing and job parsing run concurrently, and the parsed CV
+    is used as the confirmed CV, so the latency is
+    max(parse_cv, parse_job) + compare + summary.
+
+    Args:
+        cv_file_path: Path of the uploaded CV
+        job_description: Raw job description text
+        session_id: Id the run belongs to (used for logging and upload names)
+        report_mode: "deep" or "fast"; defaults to the deployment's REPORT_MODE
+        compare_mode: "llm", "evidence" or "fast"; defaults to the deployment's COMPARE_MODE
+
+    Returns:
+        Final state with cv_data, job_requirements, comparison_result,
+        final_analysis and per-stage "timings" in seconds, or error_message
+        and failed_stage on failure
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from nodes.parse_cv import parse_cv_node
+    from nodes.parse_job import parse_job_node
+    from nodes.compare import compare_node
+    from nodes.summary import summary_node
+
+    started = time.perf_counter()
+    timings: Dict[str, float] = {}
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        cv_future = executor.submit(_timed, timings, "parse_cv", parse_cv_node,
+                                    {"cv_file_path": cv_file_path, "session_id": session_id})
+        job_future = executor.submit(_timed, timings, "parse_job", parse_job_node,
+                                     {"job_description": job_description})
+        parsed = {"parse_cv": cv_future.result(), "parse_job": job_future.result()}
+
+    for stage, stage_state in parsed.items():
+        if stage_state.get("error_message"):
+            return {
+                "failed_stage": stage,
+                "error_message": f"{STAGE_ERRORS[stage]}: {stage_state['error_message']}",
+                "timings": timings
+            }
+
+    state = {
+        "cv_data": parsed["parse_cv"]["cv_data"],
+        "confirmed_cv_data": parsed["parse_cv"]["cv_data"],
+        "job_description": job_description,
+        "job_requirements": parsed["parse_job"]["job_requirements"],
+        "session_id": session_id,
+        "report_mode": report_mode or "",
+        "compare_mode": compare_mode or ""
+    }
+    for stage, node in (("compare", compare_node), ("summary", summary_node)):
+        state = _timed(timings, stage, node, state)
+        if state.get("error_message"):
+            return {
+                **state,
+                "failed_stage": stage,
+                "error_message": f"{STAGE_ERRORS[stage]}: {state['error_message']}",
+                "timings": timings
+            }
+
+    timings["total"] = round(time.perf_counter() - started, 3)
+    return {**state, "timings": timings}
+
+def start_intake_session(cv_file_path: str, job_description: str, session_id: str) -> Dict[str, Any]:
+    """
+    Run a session's graph up to the CV review interrupt while parsing the job concurrently.
+
+    The session then continues through the usual review: once confirmed,
+    submitting the same job description is served from the job parse cache.
+
+    Args:
+        cv_file_path: Path of the uploaded CV
+        job_description: Raw job description text
+        session_id: Session the run belongs to, used as the checkpoint thread id
+
+    Returns:
+        Checkpointed state with cv_data plus job_requirements, or
+        error_message and failed_stage on failure
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from nodes.parse_job import parse_job_node
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        cv_future = executor.submit(start_session, cv_file_path, session_id)
+        job_future = executor.submit(parse_job_node, {"job_description": job_description})
+        state, job_state = cv_future.result(), job_future.result()
+
+    if state.get("error_message"):
+        return {**state, "failed_stage": "parse_cv",
+                "error_message": f"{STAGE_ERRORS['parse_cv']}: {state['error_message']}"}
+    if job_state.get("error_message"):
+        return {**state, "failed_stage": "parse_job",
+                "error_message": f"{STAGE_ERRORS['parse_job']}: {job_state['error_message']}"}
+    return {**state, "job_requirements": job_state["job_requirements"]}
@@ -0,0 +1,56 @@
+import os
+
+from utils.cache import DiskCache
+
+def _entry(size: int) -> str:
+    # json.dump adds the two quotes
+    return "x" * (size - 2)
+
+def test_directory_is_created_on_first_write(tmp_path):
+    directory = tmp_path / "cv"
+    cache = DiskCache(str(directory))
+    assert not directory.exists()
+    assert cache.get("missing") is None
+    assert cache.stats()["entries"] == 0
+    assert not directory.exists()
+
+    cache.set("key", {"name": "A"})
+    assert directory.is_dir()
+    assert cache.get("key") == {"name": "A"}
+
+def test_evicts_least_recently_used_entries(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=250)
+    cache.set("a", _entry(100))
+    cache.set("b", _entry(100))
+    os.utime(tmp_path / "a.json", (1000, 1000))
+    os.utime(tmp_path / "b.json", (2000, 2000))
+    # Reading a marks it as recently used, so b is now the oldest entry
+    assert cache.get("a") == _entry(100)
+
+    cache.set("c", _entry(100))
+    assert cache.get("b") is None
+    assert cache.get("a") == _entry(100)
+    assert cache.get("c") == _entry(100)
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size_bytes"] == 200
+
+def test_evicts_down_to_ninety_percent_of_the_budget(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=1000)
+    for index in range(10):
+        cache.set(f"k{index}", _entry(100))
+        os.utime(tmp_path / f"k{index}.json", (1000 + index, 1000 + index))
+
+    cache.set("k10", _entry(100))
+    stats = cache.stats()
+    assert stats["size_bytes"] <= 900
+    assert stats["evictions"] == 2
+    assert cache.get("k0") is None and cache.get("k1") is None
+    assert cache.get("k10") == _entry(100)
+
+def test_overwriting_an_entry_does_not_count_its_old_size(tmp_path):
+    cache = DiskCache(str(tmp_path), max_bytes=250)
+    for _ in range(5):
+        cache.set("a", _entry(100))
+    cache.set("b", _entry(100))
+    assert cache.stats()["evictions"] == 0
+    assert cache.get("a") == _entry(100)
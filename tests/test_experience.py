@@ -0,0 +1,68 @@
+import datetime
+
+import pytest
+
+from utils.experience import (
+    education_level, experience_years, highest_education, required_education_level, required_years
+)
+
+def test_experience_years_merges_overlapping_roles():
+    experience = [
+        {"start_date": "Jan 2015", "end_date": "Dec 2017"},
+        {"start_date": "2017-06", "end_date": "12/2019"},
+        {"start_date": "2021", "end_date": "2021"},
+    ]
+    # 2015-01..2019-12 is 60 months, 2021 counts as one month
+    assert experience_years(experience) == round(61 / 12, 1)
+
+def test_experience_years_counts_ongoing_roles_to_today():
+    today = datetime.date.today()
+    start = f"{today.year - 2}-{today.month:02d}"
+    assert experience_years([{"start_date": start, "end_date": "Present"}]) == round(25 / 12, 1)
+    assert experience_years([{"start_date": start}]) == round(25 / 12, 1)
+
+def test_experience_years_without_usable_dates():
+    assert experience_years([]) is None
+    assert experience_years([{"start_date": "unknown"}, "Engineer", {"start_date": "2020", "end_date": "2019"}]) is None
+
+def test_required_years():
+    assert required_years({"required_experience": [{"years": "5+"}, "3-5 years of Python", "Team player"]}) == 5.0
+    assert required_years({"required_experience": []}) is None
+
+@pytest.mark.parametrize("text, level", [
+    ("High School Diploma", 1),
+    ("A-Levels", 1),
+    ("Associate degree in Computer Science", 2),
+    ("Associate of Applied Science", 2),
+    ("BSc Computer Science", 3),
+    ("B.A. History", 3),
+    ("Bachelor's degree", 3),
+    ("Degree in Mathematics", 3),
+    ("Master's in Data Science", 4),
+    ("MSc Physics", 4),
+    ("MBA", 4),
+    ("PhD in Chemistry", 5),
+    ("", 0),
+    (None, 0),
+])
+def test_education_level(text, level):
+    assert education_level(text) == level
+
+@pytest.mark.parametrize("text", [
+    "Scrum Master certified",
+    "Associate Engineer",
+    "Embassy liaison",
+    "Mastery of Python",
+])
+def test_education_level_ignores_words_that_only_contain_a_term(text):
+    assert education_level(text) == 0
+
+def test_associate_degree_ranks_below_a_bachelor():
+    cv_data = {"education": [{"degree": "Associate degree"}]}
+    assert highest_education(cv_data) == 2
+    assert highest_education(cv_data) < required_education_level({"required_education": [{"degree": "Bachelor's"}]})
+
+def test_required_education_level_reads_every_text_field():
+    requirements = {"required_education": [{"degree": "Degree", "field": "Computer Science"}, "MSc preferred"]}
+    assert required_education_level(requirements) == 4
+    assert required_education_level({}) == 0
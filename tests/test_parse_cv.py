@@ -0,0 +1,56 @@
+import pytest
+
+import nodes.parse_cv as parse_cv
+from utils.cache import DiskCache
+
+@pytest.fixture
+def cv_file(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(parse_cv, "cv_cache", cache)
+    monkeypatch.setattr(parse_cv, "CV_CACHE_ENABLED", True)
+    monkeypatch.setattr(parse_cv, "extract_text_from_pdf", lambda path: "CV text")
+    monkeypatch.setattr(parse_cv, "preprocess_cv_text", lambda text: text)
+    monkeypatch.setattr(parse_cv, "plan_sections", lambda text: [("profile", "a"), ("experience", "b")])
+    monkeypatch.setattr(parse_cv, "get_llm", lambda role: None)
+
+    path = tmp_path / "cv.pdf"
+    path.write_bytes(b"%PDF-1.4 test")
+    return str(path)
+
+def _cached(cv_file):
+    with open(cv_file, "rb") as f:
+        return parse_cv.cv_cache.get(parse_cv.cv_cache_key(f.read()))
+
+def _sections(outcomes):
+    def parse_section(llm, section, text):
+        outcome = outcomes[section]
+        if outcome == "failed":
+            raise RuntimeError("timeout")
+        return ({"name": "A"} if section == "profile" else {"experience": [{"title": "Eng"}]}), outcome
+    return parse_section
+
+def test_complete_parse_is_cached(cv_file, monkeypatch):
+    monkeypatch.setattr(parse_cv, "_parse_section", _sections({"profile": "ok", "experience": "repaired"}))
+    result = parse_cv.parse_cv_node({"cv_file_path": cv_file})
+    assert not result.get("error_message")
+    assert result["cv_data"]["name"] == "A"
+    assert _cached(cv_file)["cv_data"] == result["cv_data"]
+
+@pytest.mark.parametrize("experience", ["failed", "salvaged"])
+def test_incomplete_parse_is_not_cached(cv_file, monkeypatch, experience):
+    monkeypatch.setattr(parse_cv, "_parse_section", _sections({"profile": "ok", "experience": experience}))
+    result = parse_cv.parse_cv_node({"cv_file_path": cv_file})
+    # The partial data is still shown for review
+    assert not result.get("error_message")
+    assert result["cv_data"]["name"] == "A"
+    assert _cached(cv_file) is None
+
+def test_cache_hit_skips_extraction(cv_file, monkeypatch):
+    monkeypatch.setattr(parse_cv, "_parse_section", _sections({"profile": "ok", "experience": "ok"}))
+    first = parse_cv.parse_cv_node({"cv_file_path": cv_file})
+
+    def fail(path):
+        raise AssertionError("extraction should be skipped")
+    monkeypatch.setattr(parse_cv, "extract_text_from_pdf", fail)
+    second = parse_cv.parse_cv_node({"cv_file_path": cv_file})
+    assert second["cv_data"] == first["cv_data"]
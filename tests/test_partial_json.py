@@ -0,0 +1,25 @@
+from utils.partial_json import parse_partial_json
+
+def test_complete_object_after_leading_prose():
+    assert parse_partial_json('Here you go: {"a": 1, "b": [1, 2]} trailing') == {"a": 1, "b": [1, 2]}
+
+def test_nothing_usable_yet():
+    assert parse_partial_json("") is None
+    assert parse_partial_json("Sure, here is") is None
+
+def test_unterminated_string_value_is_closed():
+    assert parse_partial_json('{"summary": "Strong Pyth') == {"summary": "Strong Pyth"}
+
+def test_incomplete_members_are_dropped():
+    assert parse_partial_json('{"a": 1, "b') == {"a": 1}
+    assert parse_partial_json('{"a": 1, "b"') == {"a": 1}
+    assert parse_partial_json('{"a": 1, "b":') == {"a": 1}
+    assert parse_partial_json('{"a": 1,') == {"a": 1}
+
+def test_open_arrays_and_objects_are_closed():
+    assert parse_partial_json('{"skills": ["Python", "G') == {"skills": ["Python", "G"]}
+    assert parse_partial_json('{"next": {"steps": [{"a": 1}, {"b": ') == {"next": {"steps": [{"a": 1}, {}]}}
+
+def test_escape_at_the_cut_is_dropped():
+    assert parse_partial_json('{"text": "say \\') == {"text": "say "}
+    assert parse_partial_json('{"text": "a \\"quote\\" b') == {"text": 'a "quote" b'}
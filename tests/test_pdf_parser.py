@@ -0,0 +1,28 @@
+import pytest
+
+from utils.pdf_parser import PDF_QUALITY_THRESHOLD, score_text_quality
+
+CLEAN = ("Jane Doe is a software engineer with ten years of experience building web services.\n"
+         "Skills: Python, PostgreSQL, Kubernetes")
+
+def test_empty_text_scores_zero():
+    assert score_text_quality(None) == 0.0
+    assert score_text_quality("  \n ") == 0.0
+
+def test_clean_text_clears_the_threshold():
+    assert score_text_quality(CLEAN) >= PDF_QUALITY_THRESHOLD
+    assert score_text_quality(CLEAN) <= 1.0
+
+@pytest.mark.parametrize("garbled", [
+    # Spaces dropped by the text layer
+    CLEAN.replace(" ", ""),
+    # Letters split apart
+    " ".join(CLEAN.replace(" ", "")),
+    # Unmapped glyphs
+    "(cid:12)(cid:13)(cid:14) �� engineer (cid:15)",
+    # UTF-8 read as Latin-1
+    CLEAN.replace("e", "Ã©"),
+])
+def test_garbled_text_scores_below_the_threshold(garbled):
+    assert score_text_quality(garbled) < PDF_QUALITY_THRESHOLD
+    assert score_text_quality(garbled) < score_text_quality(CLEAN)
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+import utils.prompt_serializer as prompt_serializer
+from utils.prompt_serializer import fit_to_budget, prune
+
+@pytest.fixture(autouse=True)
+def count_characters(monkeypatch):
+    # Keep budgets exact and avoid loading tiktoken's tables
+    monkeypatch.setattr(prompt_serializer, "count_tokens", len)
+
+def test_prune_drops_empty_values_and_display_keys():
+    data = {"name": " A ", "email": "", "skills": [], "cv_text": "raw", "experience": [{"title": None}], "years": 0}
+    assert prune(data) == {"name": "A", "years": 0}
+
+def test_fits_without_trimming():
+    data = {"skills": ["Python", "Go"]}
+    assert fit_to_budget(data, 1000) == '{"skills":["Python","Go"]}'
+
+def test_trims_the_longest_list_and_marks_it():
+    data = {
+        "responsibilities": [f"responsibility number {index}" for index in range(20)],
+        "skills": ["Python", "Go"]
+    }
+    text = fit_to_budget(data, 300)
+    assert len(text) <= 300
+    result = json.loads(text)
+    assert result["skills"] == ["Python", "Go"]
+    kept = result["responsibilities"][:-1]
+    assert kept == [f"responsibility number {index}" for index in range(len(kept))]
+    assert result["responsibilities"][-1] == f"…{20 - len(kept)} more"
+
+def test_lists_keep_at_least_one_item():
+    data = {"responsibilities": ["a" * 50, "b" * 50]}
+    result = json.loads(fit_to_budget(data, 10))
+    assert result["responsibilities"] == ["a" * 50, "…1 more"]
@@ -0,0 +1,52 @@
+import pytest
+
+from utils.skills import SkillIndex, match_skills, normalize_skill, split_skills
+
+@pytest.mark.parametrize("name, expected", [
+    ("PostgreSQL", "postgresql"),
+    ("Postgres 14", "postgresql"),
+    ("  - Python 3.11.", "python"),
+    ("python3.11", "python"),
+    ("K8s", "kubernetes"),
+    ("Angular 2+", "angular"),
+    ("", ""),
+])
+def test_normalize_skill(name, expected):
+    assert normalize_skill(name) == expected
+
+@pytest.mark.parametrize("name, expected", [
+    (".NET", ".net"),
+    (".NET Core", ".net"),
+    ("ASP.NET", ".net"),
+    ("• .NET", ".net"),
+    ("Node.js.", "node.js"),
+])
+def test_normalize_skill_keeps_leading_dots(name, expected):
+    assert normalize_skill(name) == expected
+
+def test_split_skills_drops_category_prefixes():
+    entries = ["Databases: PostgreSQL, MySQL", {"name": "Amazon Web Services (AWS)"}, "Go; Rust", 42]
+    assert split_skills(entries) == ["PostgreSQL", "MySQL", "Amazon Web Services (AWS)", "Go", "Rust"]
+
+def test_leading_dot_skill_matches_its_alias():
+    result = match_skills(["ASP.NET", "C#"], {"required_skills": [".NET"]})
+    assert [(m["skill"], m["cv_skill"], m["match_strength"]) for m in result["matching_skills"]] == [
+        (".NET", "ASP.NET", "Strong")
+    ]
+    assert result["missing_required_skills"] == []
+    assert result["additional_skills"] == [{"skill": "C#"}]
+
+def test_parenthesised_alias_matches_exactly_and_partially():
+    index = SkillIndex(["Amazon Web Services (AWS)"])
+    assert index.lookup("AWS")["match_strength"] == "Strong"
+    assert index.lookup("AWS Lambda")["match_strength"] == "Moderate"
+    assert index.lookup("Azure") is None
+
+def test_missing_skills_by_importance():
+    result = match_skills(["Python"], {
+        "required_skills": ["Python", "Go"],
+        "technologies": ["Kafka"],
+        "preferred_skills": ["Rust"]
+    })
+    missing = {m["skill"]: m["importance"] for m in result["missing_required_skills"]}
+    assert missing == {"Go": "High", "Kafka": "Medium"}
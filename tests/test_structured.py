@@ -0,0 +1,43 @@
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+import utils.structured as structured
+from utils.schemas import CVData
+from utils.structured import parse_structured_outcome
+
+FULL = json.dumps({"name": "A", "skills": ["Python", "Go"], "experience": [{"title": "Eng"}]})
+
+@pytest.fixture(autouse=True)
+def two_repair_attempts(monkeypatch):
+    monkeypatch.setattr(structured, "STRUCTURED_REPAIR_ATTEMPTS", 2)
+
+def test_valid_answer_is_ok():
+    result, outcome = parse_structured_outcome(f"```json\n{FULL}\n```", CVData, "parse_cv")
+    assert outcome == "ok"
+    assert result["skills"] == ["Python", "Go"]
+
+def test_truncated_answer_is_continued():
+    llm = FakeListChatModel(responses=[FULL[30:]])
+    result, outcome = parse_structured_outcome(FULL[:30], CVData, "parse_cv", llm, finish_reason="length")
+    assert outcome == "repaired"
+    assert result["experience"][0]["title"] == "Eng"
+
+def test_salvage_keeps_what_the_continuation_added():
+    # The continuation is still cut off and the full repair that follows returns garbage
+    llm = FakeListChatModel(responses=[FULL[30:50], "not json"])
+    result, outcome = parse_structured_outcome(FULL[:30], CVData, "parse_cv", llm, finish_reason="length")
+    assert outcome == "salvaged"
+    assert result["name"] == "A"
+    assert result["skills"] == ["Python", "Go"]
+
+def test_salvage_falls_back_to_the_original_answer():
+    llm = FakeListChatModel(responses=["not json", "still not json"])
+    result, outcome = parse_structured_outcome('{"name": "A", "skills": ["Py', CVData, "parse_cv", llm)
+    assert outcome == "salvaged"
+    assert result["name"] == "A"
+
+def test_unusable_answer_raises():
+    with pytest.raises(ValueError):
+        parse_structured_outcome("no JSON here", CVData, "parse_cv")
@@ -0,0 +1,400 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Build a stable SHA-256 fingerprint from arbitrary parts.
+
+    Args:
+        parts: Values to include in the fingerprint (bytes are hashed as-is,
+            everything else through its string form)
+
+    Returns:
+        Hex digest identifying the combination of parts
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else str(part).encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+def prompt_fingerprint(prompt: Any) -> str:
+    """
+    Fingerprint the template text of a ChatPromptTemplate.
+
+    Args:
+        prompt: Prompt template (or plain template string)
+
+    Returns:
+        Hex digest that changes whenever the prompt wording changes
+    """
+    if isinstance(prompt, str):
+        return fingerprint(prompt)
+
+    templates = []
+    for message in getattr(prompt, "messages", []):
+        inner = getattr(message, "prompt", None)
+        templates.append(getattr(inner, "template", None) or repr(message))
+    return fingerprint(*templates)
+
+def schema_fingerprint(schema: Any) -> str:
+    """
+    Fingerprint the JSON schema of a pydantic model.
+
+    Args:
+        schema: Pydantic model class
+
+    Returns:
+        Hex digest that changes whenever the model's fields change
+    """
+    return fingerprint(json.dumps(schema.model_json_schema(), sort_keys=True))
+
+class DiskCache:
+    """
+    Persistent JSON cache stored as one file per key, bounded by total size.
+
+    Entries are evicted least-recently-used first, down to 90% of max_bytes,
+    once the directory grows past max_bytes. Recency is tracked through the
+    file modification time, so it survives process restarts. The directory
+    is created on the first write. Writes keep a running size total, and the
+    directory is only scanned when that total exceeds max_bytes (other
+    processes may write to the same directory, so the scan also
+    re-synchronizes the total).
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+            except FileNotFoundError:
+                self.misses += 1
+                return None
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"Discarding unreadable cache entry {key}: {str(e)}")
+                self._remove(path)
+                self._size = None
+                self.misses += 1
+                return None
+
+            # Mark as recently used
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key and evict old entries if over budget."""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._lock:
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                if self._size is None:
+                    self._size = sum(size for _, size, _ in self._entries())
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(value, f)
+                size = os.path.getsize(tmp_path)
+                previous = os.path.getsize(path) if os.path.exists(path) else 0
+                os.replace(tmp_path, path)
+            except (OSError, TypeError, ValueError) as e:
+                logger.warning(f"Failed to write cache entry {key}: {str(e)}")
+                self._remove(tmp_path)
+                return
+            self._size += size - previous
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        with self._lock:
+            for path, _, _ in self._entries():
+                self._remove(path)
+            self._size = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            entries = self._entries()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(entries),
+                "size_bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes
+            }
+
+    def _entries(self):
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        self._size = total
+        if total <= self.max_bytes:
+            return
+
+        # Oldest access first, down to 90% of the budget so the next few writes do not scan again
+        target = int(self.max_bytes * 0.9)
+        entries.sort(key=lambda entry: entry[2])
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            self._remove(path)
+            total -= size
+            self.evictions += 1
+        self._size = total
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+class TTLCache:
+    """
+    In-process cache whose entries expire ttl_seconds after being stored.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._data: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._data.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key for ttl_seconds."""
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.max_entries:
+                self._purge()
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+
+    def clear(self) -> None:
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._data),
+                "ttl_seconds": self.ttl_seconds
+            }
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, (expires, _) in self._data.items() if expires < now]:
+            del self._data[key]
+
+        # Still full: drop the entries closest to expiry
+        overflow = len(self._data) - self.max_entries + 1
+        if overflow > 0:
+            for key in sorted(self._data, key=lambda k: self._data[k][0])[:overflow]:
+                del self._data[key]
+
+class IdleRegistry:
+    """
+    Bounded in-process registry whose entries expire after idle_seconds without access.
+
+    Entries are kept in least-recently-used order, so expired entries are always
+    at the front and eviction never scans the whole registry. When the registry
+    is full the least recently used entry is dropped. on_evict is called with
+    (key, value) for every entry removed by expiry or capacity; an entry dropped
+    for capacity may belong to a session that is still in use.
+    """
+
+    def __init__(self, idle_seconds: float = 1800, max_entries: int = 1000,
+                 on_evict: Optional[Callable[[str, Any], None]] = None):
+        self.idle_seconds = idle_seconds
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+        self.evictions = {"idle": 0, "capacity": 0}
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value for key and mark it as used, or None if missing or idle too long."""
+        with self._lock:
+            evicted = self._expire()
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data[key] = (time.monotonic(), entry[1])
+                self._data.move_to_end(key)
+        self._notify(evicted)
+        return entry[1] if entry is not None else None
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def touch(self, key: str) -> bool:
+        """Refresh key's idle timer without reading its value; return False if it is not registered."""
+        return self.get(key) is not None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store value under key, evicting idle or least recently used entries if needed."""
+        with self._lock:
+            evicted = self._expire()
+            self._data.pop(key, None)
+            self._data[key] = (time.monotonic(), value)
+            while len(self._data) > self.max_entries:
+                evicted.append(self._data.popitem(last=False))
+                self.evictions["capacity"] += 1
+        self._notify(evicted)
+
+    def pop(self, key: str) -> Optional[Any]:
+        """Remove key without calling on_evict and return its value."""
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def sweep(self) -> int:
+        """Evict every idle entry and return how many were removed."""
+        with self._lock:
+            evicted = self._expire()
+        self._notify(evicted)
+        return len(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current size and eviction counters."""
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "idle_seconds": self.idle_seconds,
+                "evictions": dict(self.evictions)
+            }
+
+    def _expire(self) -> list:
+        cutoff = time.monotonic() - self.idle_seconds
+        evicted = []
+        while self._data:
+            key, (last_used, value) = next(iter(self._data.items()))
+            if last_used > cutoff:
+                break
+            del self._data[key]
+            evicted.append((key, (last_used, value)))
+            self.evictions["idle"] += 1
+        return evicted
+
+    def _notify(self, evicted) -> None:
+        if not self.on_evict:
+            return
+        # Called outside the lock so callbacks may use the registry
+        for key, (_, value) in evicted:
+            try:
+                self.on_evict(key, value)
+            except Exception as e:
+                logger.warning(f"Eviction callback failed for {key}: {str(e)}")
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into a single execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for and share its result (or exception).
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) once for all concurrent callers of key.
+
+        Args:
+            key: Identifier of the work being performed
+            fn: Function to run
+
+        Returns:
+            The result of fn, shared between coalesced callers
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = {"event": threading.Event(), "result": None, "error": None}
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call["event"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn(*args, **kwargs)
+            return call["result"]
+        except BaseException as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["event"].set()
@@ -0,0 +1,327 @@
+import json
+import logging
+import os
+import threading
+import zlib
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.cache import fingerprint
+from utils.experience import experience_years, highest_education, required_education_level, required_years
+from utils.similarity import text_features
+from utils.skills import normalize_skill, split_skills
+
+logger = logging.getLogger(__name__)
+
+CANDIDATE_INDEX_DIR = os.getenv('CANDIDATE_INDEX_DIR', os.path.join('cache', 'candidates'))
+# Width of the hashed term vectors; changing it requires rebuilding the index
+CANDIDATE_INDEX_DIM = int(os.getenv('CANDIDATE_INDEX_DIM', 4096))
+
+# Shortlist score weights
+SKILL_WEIGHT = 0.5
+TEXT_WEIGHT = 0.2
+YEARS_WEIGHT = 0.15
+EDUCATION_WEIGHT = 0.15
+PREFERRED_SKILL_WEIGHT = 0.5
+
+SCORE_BLOCK_ROWS = 4096
+
+def canonical_skills(entries: Any) -> List[str]:
+    """Distinct canonical skill names in free-form skill entries."""
+    skills = []
+    for skill in split_skills(entries or []):
+        canonical = normalize_skill(skill)
+        if canonical and canonical not in skills:
+            skills.append(canonical)
+    return skills
+
+def cv_terms(cv_data: Dict[str, Any]) -> str:
+    """Text of a CV used for its term vector: skills, role titles, responsibilities, projects and summary."""
+    parts = [str(skill) for skill in cv_data.get("skills") or []]
+    for job in cv_data.get("experience") or []:
+        if isinstance(job, dict):
+            parts.append(str(job.get("title") or ""))
+            parts.extend(str(item) for item in job.get("responsibilities") or [])
+    for project in cv_data.get("projects") or []:
+        if isinstance(project, dict):
+            parts.append(str(project.get("description") or ""))
+            parts.extend(str(item) for item in project.get("technologies") or [])
+    parts.append(str(cv_data.get("summary") or ""))
+    return "\n".join(part for part in parts if part)
+
+def job_terms(job_requirements: Dict[str, Any]) -> str:
+    """Text of a job posting used for its term vector."""
+    parts = [str(job_requirements.get(key) or "") for key in ("job_title", "job_summary")]
+    for key in ("required_skills", "preferred_skills", "technologies", "responsibilities", "required_experience"):
+        for item in job_requirements.get(key) or []:
+            parts.append(" ".join(str(value) for value in item.values() if value) if isinstance(item, dict) else str(item))
+    return "\n".join(part for part in parts if part)
+
+def hashed_vector(text: str, dim: int) -> np.ndarray:
+    """L2-normalized sublinear term-frequency vector of text's features, hashed into dim buckets."""
+    vector = np.zeros(dim, dtype=np.float32)
+    features = text_features(text)
+    if not features:
+        return vector
+    buckets = np.fromiter((zlib.crc32(feature.encode("utf-8")) % dim for feature in features),
+                          dtype=np.int64, count=len(features))
+    np.add.at(vector, buckets, 1.0)
+    nonzero = vector > 0
+    vector[nonzero] = 1 + np.log(vector[nonzero])
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+def years_match(years, needed) -> np.ndarray:
+    """
+    Years-of-experience score, vectorized over either argument.
+
+    1.0 when nothing is needed (needed <= 0) or years >= needed, proportional
+    below that, and 0.5 when the years are unknown (years < 0).
+    """
+    years = np.asarray(years, dtype=np.float32)
+    needed = np.asarray(needed, dtype=np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.minimum(1.0, years / needed)
+    return np.where(needed <= 0, 1.0, np.where(years < 0, 0.5, ratio)).astype(np.float32)
+
+def education_match(level, needed) -> np.ndarray:
+    """Education score, vectorized: 1.0 if the level is met, 0.5 if unknown (0), 0.25 if below."""
+    level = np.asarray(level)
+    needed = np.asarray(needed)
+    return np.where(needed <= 0, 1.0, np.where(level >= needed, 1.0, np.where(level == 0, 0.5, 0.25))).astype(np.float32)
+
+def combine_scores(skill_score, text_score, years_score, education_score) -> np.ndarray:
+    """Weighted 0-100 match score from the four components."""
+    return 100 * (SKILL_WEIGHT * skill_score + TEXT_WEIGHT * text_score +
+                  YEARS_WEIGHT * years_score + EDUCATION_WEIGHT * education_score)
+
+class CandidateIndex:
+    """
+    Persistent, incrementally updatable index of parsed CVs.
+
+    Each candidate is stored once: term vectors, years of experience and
+    education level live in memory-mapped arrays (one row per candidate),
+    skills in a posting list (canonical skill -> candidate rows), and the
+    rest in a small JSON manifest. Adding a candidate appends a row;
+    re-adding one whose cv_data changed rewrites its row in place.
+
+    shortlist() scores every candidate against a job in one vectorized pass,
+    so only the best few need the LLM comparison.
+    """
+
+    def __init__(self, directory: Optional[str] = None, dim: Optional[int] = None):
+        self.directory = directory or CANDIDATE_INDEX_DIR
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+        manifest = self._load_manifest()
+        self.dim = manifest.get("dim") or dim or CANDIDATE_INDEX_DIM
+        if dim and dim != self.dim:
+            raise ValueError(f"Index at {self.directory} uses {self.dim} dimensions, not {dim}")
+        self.candidates: List[Dict[str, Any]] = manifest.get("candidates", [])
+        self._rows = {candidate["key"]: row for row, candidate in enumerate(self.candidates)}
+        self._postings: Dict[str, List[int]] = {}
+        for row, candidate in enumerate(self.candidates):
+            if candidate.get("active", True):
+                for skill in candidate["skills"]:
+                    self._postings.setdefault(skill, []).append(row)
+        self._dirty = False
+
+    # Storage
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self._path("manifest.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Candidate index manifest unreadable, starting empty: {str(e)}")
+            for name in ("vectors.f16", "years.f32", "education.i1"):
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+            return {}
+
+    def _array(self, name: str, dtype, width: int = 0, mode: str = "r") -> Optional[np.memmap]:
+        rows = len(self.candidates)
+        if not rows or not os.path.exists(self._path(name)):
+            return None
+        shape = (rows, width) if width else (rows,)
+        return np.memmap(self._path(name), dtype=dtype, mode=mode, shape=shape)
+
+    def _write_row(self, row: int, vector: np.ndarray, years: float, education: int) -> None:
+        """Append a row (row == current size) or overwrite an existing one."""
+        values = (
+            ("vectors.f16", vector.astype(np.float16)),
+            ("years.f32", np.asarray([years], dtype=np.float32)),
+            ("education.i1", np.asarray([education], dtype=np.int8)),
+        )
+        for name, value in values:
+            with open(self._path(name), "r+b" if os.path.exists(self._path(name)) else "wb") as f:
+                f.seek(row * value.nbytes)
+                f.write(value.tobytes())
+
+    def flush(self) -> None:
+        """Persist the manifest; call after a batch of add() calls."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = f"{self._path('manifest.json')}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"dim": self.dim, "candidates": self.candidates}, f)
+            os.replace(tmp_path, self._path("manifest.json"))
+            self._dirty = False
+
+    # Updates
+
+    def add(self, key: str, cv_data: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> bool:
+        """
+        Index or refresh one candidate.
+
+        Args:
+            key: Stable identifier (e.g. the CV file path)
+            cv_data: Parsed CV data
+            metadata: Extra JSON-serializable fields returned with shortlist results
+
+        Returns:
+            True if the candidate was added or changed, False if it was already up to date
+        """
+        digest = fingerprint(json.dumps(cv_data, sort_keys=True))
+        skills = canonical_skills(cv_data.get("skills"))
+        years = experience_years(cv_data.get("experience"))
+        education = highest_education(cv_data)
+        vector = hashed_vector(cv_terms(cv_data), self.dim)
+
+        candidate = {
+            "key": key,
+            "digest": digest,
+            "name": cv_data.get("name"),
+            "skills": skills,
+            "active": True,
+            **(metadata or {})
+        }
+
+        with self._lock:
+            row = self._rows.get(key)
+            if row is not None and self.candidates[row]["digest"] == digest and self.candidates[row].get("active", True):
+                return False
+
+            # Write the row before registering the candidate, so a failed write
+            # leaves no half-added entry behind
+            new = row is None
+            if new:
+                row = len(self.candidates)
+            self._write_row(row, vector, -1.0 if years is None else years, education)
+
+            if new:
+                self.candidates.append(candidate)
+                self._rows[key] = row
+            else:
+                for skill in self.candidates[row].get("skills", []):
+                    if row in self._postings.get(skill, []):
+                        self._postings[skill].remove(row)
+                self.candidates[row] = candidate
+            for skill in skills:
+                self._postings.setdefault(skill, []).append(row)
+            self._dirty = True
+        return True
+
+    def remove(self, key: str) -> bool:
+        """Exclude a candidate from future shortlists (its row is kept and reused if re-added)."""
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None or not self.candidates[row].get("active", True):
+                return False
+            self.candidates[row]["active"] = False
+            for skill in self.candidates[row]["skills"]:
+                if row in self._postings.get(skill, []):
+                    self._postings[skill].remove(row)
+            self._dirty = True
+        return True
+
+    def __len__(self) -> int:
+        return sum(1 for candidate in self.candidates if candidate.get("active", True))
+
+    # Queries
+
+    def shortlist(self, job_requirements: Dict[str, Any], top_k: int = 20,
+                  keys: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Score every indexed candidate against a job and return the best top_k.
+
+        The score (0-100) weighs required/preferred skill coverage (50%), term
+        similarity with the posting (20%, relative to the best candidate),
+        years of experience (15%) and education level (15%).
+
+        Args:
+            job_requirements: Parsed job requirements
+            top_k: Number of candidates to return
+            keys: Restrict the ranking to these candidates
+
+        Returns:
+            Candidate entries with their score and its components, best first
+        """
+        with self._lock:
+            count = len(self.candidates)
+            if not count:
+                return []
+
+            required = canonical_skills((job_requirements.get("required_skills") or []) +
+                                  (job_requirements.get("technologies") or []))
+            preferred = [skill for skill in canonical_skills(job_requirements.get("preferred_skills")) if skill not in required]
+            matched = np.zeros(count, dtype=np.float32)
+            for skill in required:
+                matched[self._postings.get(skill, [])] += 1.0
+            for skill in preferred:
+                matched[self._postings.get(skill, [])] += PREFERRED_SKILL_WEIGHT
+            total_weight = len(required) + PREFERRED_SKILL_WEIGHT * len(preferred)
+            skill_score = matched / total_weight if total_weight else np.ones(count, dtype=np.float32)
+
+            active = np.fromiter((candidate.get("active", True) for candidate in self.candidates), dtype=bool, count=count)
+            if keys is not None:
+                wanted = set(keys)
+                active &= np.fromiter((candidate["key"] in wanted for candidate in self.candidates), dtype=bool, count=count)
+
+            vectors = self._array("vectors.f16", np.float16, self.dim)
+            years = self._array("years.f32", np.float32)
+            education = self._array("education.i1", np.int8)
+
+        # float16 rows are widened block by block; NumPy has no fast float16 matmul
+        query = hashed_vector(job_terms(job_requirements), self.dim)
+        text_score = np.concatenate([
+            vectors[start:start + SCORE_BLOCK_ROWS].astype(np.float32) @ query
+            for start in range(0, count, SCORE_BLOCK_ROWS)
+        ])
+        best_text = text_score[active].max() if active.any() else 0
+        if best_text > 0:
+            text_score = text_score / best_text
+
+        years = np.asarray(years, dtype=np.float32)
+        education = np.asarray(education, dtype=np.int8)
+        scores = combine_scores(
+            skill_score, text_score,
+            years_match(years, required_years(job_requirements) or 0),
+            education_match(education, required_education_level(job_requirements))
+        )
+        scores[~active] = -1
+
+        top_k = min(top_k, int(active.sum()))
+        if top_k <= 0:
+            return []
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [
+            {
+                **{key: value for key, value in self.candidates[row].items() if key not in ("digest", "active")},
+                "score": round(float(scores[row]), 1),
+                "skill_coverage": round(float(skill_score[row]), 3),
+                "text_similarity": round(float(text_score[row]), 3),
+                "years_experience": None if years[row] < 0 else round(float(years[row]), 1),
+                "education_level": int(education[row])
+            }
+            for row in best
+        ]
@@ -0,0 +1,172 @@
+import logging
+import re
+from collections import Counter
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Section headings as they appear on CVs, mapped to the part of cv_data they fill
+SECTION_ALIASES = {
+    "summary": ["summary", "professional summary", "profile", "professional profile", "objective",
+                "career objective", "about me", "about", "personal statement", "overview"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "employment history", "work history", "career history", "relevant experience"],
+    "education": ["education", "academic background", "education and training", "qualifications",
+                  "academic qualifications"],
+    "skills": ["skills", "technical skills", "core skills", "key skills", "skills and tools",
+               "competencies", "core competencies", "technologies", "tools", "expertise"],
+    "certifications": ["certifications", "certificates", "licenses", "licenses and certifications",
+                       "certifications and licenses", "courses", "training"],
+    "projects": ["projects", "personal projects", "selected projects", "key projects", "portfolio"],
+    "languages": ["languages", "language skills"],
+    "other": ["interests", "hobbies", "references", "publications", "awards", "honors", "honours",
+              "achievements", "volunteering", "volunteer experience", "activities"],
+}
+ALIAS_TO_SECTION = {alias: section for section, aliases in SECTION_ALIASES.items() for alias in aliases}
+# Last word of a short heading such as "Cloud Skills" or "Industry Experience"
+HEADING_NOUNS = {"experience": "experience", "skills": "skills", "education": "education",
+                 "certifications": "certifications", "projects": "projects", "languages": "languages"}
+
+PAGE_NUMBER_PATTERN = re.compile(r"^(?:page\s*)?[-–—]?\s*\d{1,3}\s*[-–—]?(?:\s*(?:/|of)\s*\d{1,3})?$", re.IGNORECASE)
+INVISIBLE_PATTERN = re.compile(r"[\u200b\u200c\u200d\u2060\ufeff\u00ad]")
+SPACE_PATTERN = re.compile(r"[ \t\u00a0\u2000-\u200a\u202f\u205f\u3000]+")
+DIGITS_PATTERN = re.compile(r"\d+")
+
+def normalize_whitespace(text: str) -> str:
+    """
+    Normalize spacing without changing the words.
+
+    Unifies line endings, removes invisible characters, collapses runs of
+    spaces and tabs, strips each line and keeps at most one blank line in a
+    row. Page breaks (form feeds) are kept.
+    """
+    text = INVISIBLE_PATTERN.sub("", text.replace("\r\n", "\n").replace("\r", "\n"))
+    pages = []
+    for page in text.split("\f"):
+        lines = []
+        for line in page.split("\n"):
+            line = SPACE_PATTERN.sub(" ", line).strip()
+            if line or (lines and lines[-1]):
+                lines.append(line)
+        pages.append("\n".join(lines).strip())
+    return "\f".join(pages)
+
+def _edge_lines(lines: List[str], count: int = 2) -> List[str]:
+    non_empty = [line for line in lines if line]
+    return non_empty[:count] + non_empty[-count:]
+
+def strip_page_artifacts(text: str) -> str:
+    """
+    Remove page numbers and headers/footers repeated across pages.
+
+    A line counts as a running header or footer when it appears (ignoring
+    digits) among the first or last two lines of most pages. Its first
+    occurrence is kept, since running headers usually carry the candidate's
+    name. Page breaks are removed as well.
+    """
+    pages = [page.split("\n") for page in text.split("\f")]
+
+    repeated = set()
+    if len(pages) >= 2:
+        counts = Counter()
+        for lines in pages:
+            counts.update({DIGITS_PATTERN.sub("#", line.lower()) for line in _edge_lines(lines)})
+        threshold = max(2, int(len(pages) * 0.6 + 0.5))
+        repeated = {line for line, count in counts.items() if count >= threshold}
+
+    kept_pages = []
+    seen = set()
+    removed = 0
+    for lines in pages:
+        edges = set(_edge_lines(lines))
+        kept = []
+        for line in lines:
+            key = DIGITS_PATTERN.sub("#", line.lower())
+            if line and (PAGE_NUMBER_PATTERN.match(line) or (line in edges and key in seen)):
+                removed += 1
+                continue
+            if line in edges and key in repeated:
+                seen.add(key)
+            kept.append(line)
+        kept_pages.append("\n".join(kept).strip())
+
+    if removed:
+        logger.debug(f"Removed {removed} page number/header/footer lines")
+    return "\n\n".join(page for page in kept_pages if page)
+
+def preprocess_cv_text(text: str) -> str:
+    """
+    Clean extracted CV text before it is sent to the LLM.
+
+    Args:
+        text: Raw text from extract_text_from_pdf (pages separated by form feeds)
+
+    Returns:
+        Text with normalized whitespace and without page numbers or running headers/footers
+    """
+    cleaned = strip_page_artifacts(normalize_whitespace(text))
+    return re.sub(r"\n{3,}", "\n\n", cleaned)
+
+def heading_section(line: str) -> str:
+    """Return the section a heading line opens, or "" if the line is not a heading."""
+    if not line or len(line) > 40 or line.endswith(".") or "," in line:
+        return ""
+    heading = re.sub(r"[^a-z& ]", "", line.lower()).replace("&", "and")
+    heading = " ".join(heading.split())
+    if heading in ALIAS_TO_SECTION:
+        return ALIAS_TO_SECTION[heading]
+
+    words = heading.split()
+    if 1 < len(words) <= 3 and words[-1] in HEADING_NOUNS and (line.isupper() or line.rstrip().endswith(":")):
+        return HEADING_NOUNS[words[-1]]
+    return ""
+
+def segment_sections(text: str) -> List[Tuple[str, str]]:
+    """
+    Split preprocessed CV text into its sections.
+
+    Text before the first heading (name and contact details) is returned as
+    "profile". Repeated headings of the same kind are merged.
+
+    Args:
+        text: Output of preprocess_cv_text
+
+    Returns:
+        (section, text) pairs in document order
+    """
+    sections: List[Tuple[str, List[str]]] = [("profile", [])]
+    index = {"profile": 0}
+    current = sections[0][1]
+    for line in text.split("\n"):
+        section = heading_section(line)
+        if section:
+            if section not in index:
+                index[section] = len(sections)
+                sections.append((section, []))
+            current = sections[index[section]][1]
+        current.append(line)
+
+    return [(section, "\n".join(lines).strip()) for section, lines in sections if "\n".join(lines).strip()]
+
+def split_long_section(text: str, max_chars: int) -> List[str]:
+    """
+    Split a section into chunks of at most max_chars at blank lines.
+
+    Entries (one job, one degree) are usually separated by blank lines, so
+    splitting there keeps them whole. A single paragraph longer than max_chars
+    becomes its own chunk.
+    """
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [text]
+
+    chunks = []
+    current = ""
+    for paragraph in text.split("\n\n"):
+        if current and len(current) + len(paragraph) + 2 > max_chars:
+            chunks.append(current)
+            current = paragraph
+        else:
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,103 @@
+import datetime
+import re
+from typing import Any, Dict, List, Optional
+
+MONTHS = {name: number for number, name in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1)}
+ONGOING_DATES = ("present", "current", "now", "today", "ongoing")
+YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+def _month_index(value: Any, today: datetime.date) -> Optional[int]:
+    """Months since year 0 for a CV date such as "Jan 2020", "2020-03", "03/2020" or "Present"."""
+    text = str(value or "").strip().lower()
+    if text.startswith(ONGOING_DATES):
+        return today.year * 12 + today.month - 1
+    year = YEAR_PATTERN.search(text)
+    if not year:
+        return None
+    month = next((number for name, number in MONTHS.items() if name in text), None)
+    if month is None:
+        numeric = re.search(r"\b\d{4}[-/.](\d{1,2})\b|\b(\d{1,2})[-/.]\d{4}\b", text)
+        month = int(numeric.group(1) or numeric.group(2)) if numeric else 1
+    return int(year.group(0)) * 12 + min(max(month, 1), 12) - 1
+
+def experience_years(experience: List[Any]) -> Optional[float]:
+    """
+    Total years covered by the CV's roles, counting overlapping roles once.
+
+    Returns:
+        Years rounded to one decimal, or None if no role has usable dates
+    """
+    today = datetime.date.today()
+    intervals = []
+    for job in experience or []:
+        if not isinstance(job, dict):
+            continue
+        start = _month_index(job.get("start_date"), today)
+        end = _month_index(job.get("end_date") or "present", today)
+        if start is not None and end is not None and end >= start:
+            intervals.append((start, end + 1))
+    if not intervals:
+        return None
+
+    months = 0
+    current_start, current_end = None, None
+    for start, end in sorted(intervals):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                months += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    months += current_end - current_start
+    return round(months / 12, 1)
+
+def required_years(job_requirements: Dict[str, Any]) -> Optional[float]:
+    """Largest number of years asked for in required_experience ("5+", 3, "3-5 years", ...)."""
+    years = []
+    for requirement in job_requirements.get("required_experience") or []:
+        text = requirement.get("years") if isinstance(requirement, dict) else requirement
+        numbers = NUMBER_PATTERN.findall(str(text or ""))
+        if numbers and (isinstance(requirement, dict) or "year" in str(text).lower()):
+            years.append(float(numbers[0]))
+    return max(years) if years else None
+
+# Education levels, lowest to highest, with the terms that identify them. Terms
+# match whole words only, and "master"/"associate" need a degree context so
+# that "Scrum Master" or "Associate Engineer" do not count as degrees.
+EDUCATION_LEVELS = [
+    (1, (r"high school", r"secondary", r"gcses?", r"a-levels?", r"a levels?", r"diploma")),
+    (2, (r"associate(?:['’]s|s)? (?:degree|of|in)", r"foundation degree", r"hnd")),
+    (3, (r"bachelor(?:['’]s|s)?", r"b\.?sc", r"b\.s\.", r"b\.a\.", r"ba", r"b\.?eng", r"undergraduate")),
+    (4, (r"master(?:['’]s|s)", r"master (?:degree|of|in)", r"m\.?sc", r"m\.s\.", r"mba", r"m\.?eng",
+         r"postgraduate", r"m\.a\.")),
+    (5, (r"ph\.?d", r"doctorate", r"doctoral", r"d\.?phil")),
+]
+EDUCATION_PATTERNS = [
+    (rank, re.compile(r"(?<![a-z0-9])(?:" + "|".join(terms) + r")(?![a-z0-9])"))
+    for rank, terms in EDUCATION_LEVELS
+]
+DEGREE_PATTERN = re.compile(r"\bdegree\b")
+
+GENERIC_DEGREE_LEVEL = 3
+
+def education_level(text: Any) -> int:
+    """Rank a degree or requirement: 0 unknown, 1 school, 2 associate, 3 bachelor, 4 master, 5 doctorate."""
+    value = str(text or "").lower()
+    level = max((rank for rank, pattern in EDUCATION_PATTERNS if pattern.search(value)), default=0)
+    if not level and DEGREE_PATTERN.search(value):
+        # A bare "degree" usually means a bachelor's; specific terms ("Associate degree") take precedence
+        level = GENERIC_DEGREE_LEVEL
+    return level
+
+def highest_education(cv_data: Dict[str, Any]) -> int:
+    """Highest education_level among the CV's degrees."""
+    return max((education_level(item.get("degree") if isinstance(item, dict) else item)
+                for item in cv_data.get("education") or []), default=0)
+
+def required_education_level(job_requirements: Dict[str, Any]) -> int:
+    """Highest education_level among the job's required education (0 if none is required)."""
+    return max((education_level(" ".join(str(value) for value in item.values() if isinstance(value, str))
+                                if isinstance(item, dict) else item)
+                for item in job_requirements.get("required_education") or []), default=0)
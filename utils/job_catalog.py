@@ -0,0 +1,240 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from utils.candidate_index import (
+    CANDIDATE_INDEX_DIM, PREFERRED_SKILL_WEIGHT, canonical_skills, combine_scores, cv_terms,
+    education_match, hashed_vector, job_terms, years_match
+)
+from utils.experience import experience_years, highest_education, required_education_level, required_years
+
+logger = logging.getLogger(__name__)
+
+JOB_CATALOG_PATH = os.getenv('JOB_CATALOG_PATH', os.path.join('data', 'job_catalog.db'))
+
+def description_digest(description: str) -> str:
+    """Digest of a posting's text, ignoring whitespace changes."""
+    return hashlib.sha256(" ".join(description.split()).encode("utf-8")).hexdigest()
+
+class JobCatalog:
+    """
+    Catalog of open roles with their pre-parsed job_requirements.
+
+    Postings live in a SQLite database file, so several worker processes can
+    share and update one catalog. Each posting is stored with a digest of its
+    text, so it is only parsed again when its description changes. For
+    ranking, the catalog keeps a skill-weight matrix, a term-vector matrix and
+    the years/education requirements of every job as NumPy arrays, rebuilt
+    whenever the catalog's version (bumped by every write, from any process)
+    has changed, and scores one CV against all jobs in a single vectorized pass.
+    """
+
+    def __init__(self, path: Optional[str] = None, dim: Optional[int] = None):
+        self.path = path or JOB_CATALOG_PATH
+        self.dim = dim or CANDIDATE_INDEX_DIM
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "job_id TEXT PRIMARY KEY, title TEXT, description TEXT NOT NULL, digest TEXT NOT NULL, "
+            "job_requirements TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS catalog_version ("
+            "id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER NOT NULL)"
+        )
+        self._conn.execute("INSERT OR IGNORE INTO catalog_version (id, version) VALUES (0, 0)")
+        self._arrays = None
+        self._arrays_version = None
+
+    def _write(self, statement: str, params: tuple) -> int:
+        """Run a change and bump the catalog version in one transaction."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                changed = self._conn.execute(statement, params).rowcount
+                if changed:
+                    self._conn.execute("UPDATE catalog_version SET version = version + 1 WHERE id = 0")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return changed
+
+    def _version(self) -> int:
+        return self._conn.execute("SELECT version FROM catalog_version WHERE id = 0").fetchone()[0]
+
+    @staticmethod
+    def _summary(job_id: str, job: Dict[str, Any]) -> Dict[str, Any]:
+        requirements = job["job_requirements"]
+        return {
+            "job_id": job_id,
+            "title": job.get("title") or requirements.get("job_title"),
+            "company": requirements.get("company"),
+            "location": requirements.get("location"),
+            "updated_at": job["updated_at"]
+        }
+
+    def _jobs(self) -> Dict[str, Dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT job_id, title, job_requirements, updated_at FROM jobs ORDER BY job_id"
+        ).fetchall()
+        return {
+            job_id: {"title": title, "job_requirements": json.loads(requirements), "updated_at": updated_at}
+            for job_id, title, requirements, updated_at in rows
+        }
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Summaries of every job, most recently updated first."""
+        with self._lock:
+            jobs = [self._summary(job_id, job) for job_id, job in self._jobs().items()]
+        return sorted(jobs, key=lambda job: job["updated_at"], reverse=True)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Full entry of a job (description, job_requirements, ...) or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT title, description, digest, job_requirements, updated_at FROM jobs WHERE job_id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        title, description, digest, requirements, updated_at = row
+        return {
+            "job_id": job_id,
+            "title": title,
+            "description": description,
+            "digest": digest,
+            "job_requirements": json.loads(requirements),
+            "updated_at": updated_at
+        }
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    def is_current(self, job_id: str, description: str) -> bool:
+        """True if job_id is stored with this exact description (no re-parse needed)."""
+        with self._lock:
+            row = self._conn.execute("SELECT digest FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return row is not None and row[0] == description_digest(description)
+
+    def put(self, job_id: str, description: str, job_requirements: Dict[str, Any],
+            title: Optional[str] = None) -> None:
+        """Store or replace a job with its parsed requirements."""
+        self._write(
+            "INSERT OR REPLACE INTO jobs (job_id, title, description, digest, job_requirements, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (job_id, title, description, description_digest(description), json.dumps(job_requirements), time.time())
+        )
+
+    def remove(self, job_id: str) -> bool:
+        """Delete a job; returns False if it was not in the catalog."""
+        return self._write("DELETE FROM jobs WHERE job_id = ?", (job_id,)) > 0
+
+    def _build_arrays(self, jobs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Matrices over all jobs, built once per catalog version."""
+        job_ids = list(jobs)
+        vocabulary: Dict[str, int] = {}
+        weights = []
+        for job_id in job_ids:
+            requirements = jobs[job_id]["job_requirements"]
+            required = canonical_skills((requirements.get("required_skills") or []) +
+                                        (requirements.get("technologies") or []))
+            preferred = [skill for skill in canonical_skills(requirements.get("preferred_skills")) if skill not in required]
+            weights.append([(vocabulary.setdefault(skill, len(vocabulary)), 1.0) for skill in required] +
+                           [(vocabulary.setdefault(skill, len(vocabulary)), PREFERRED_SKILL_WEIGHT) for skill in preferred])
+
+        skill_matrix = np.zeros((len(job_ids), max(1, len(vocabulary))), dtype=np.float32)
+        for row, entries in enumerate(weights):
+            for column, weight in entries:
+                skill_matrix[row, column] = weight
+
+        return {
+            "job_ids": job_ids,
+            "vocabulary": vocabulary,
+            "skills": skill_matrix,
+            "skill_totals": skill_matrix.sum(axis=1),
+            "vectors": np.stack([hashed_vector(job_terms(jobs[job_id]["job_requirements"]), self.dim)
+                                 for job_id in job_ids]) if job_ids else np.zeros((0, self.dim), dtype=np.float32),
+            "years": np.asarray([required_years(jobs[job_id]["job_requirements"]) or 0 for job_id in job_ids],
+                                dtype=np.float32),
+            "education": np.asarray([required_education_level(jobs[job_id]["job_requirements"])
+                                     for job_id in job_ids], dtype=np.int8),
+        }
+
+    def rank(self, cv_data: Dict[str, Any], top_k: int = 10) -> List[Dict[str, Any]]:
+        """
+        Score a CV against every job in the catalog.
+
+        Uses the same components and weights as the candidate index: skill
+        coverage, term similarity (relative to the best job), years of
+        experience and education level.
+
+        Args:
+            cv_data: Confirmed CV data
+            top_k: Number of jobs to return
+
+        Returns:
+            Job summaries with their score and its components, best first
+        """
+        with self._lock:
+            # Other processes may have changed the catalog since the arrays were built
+            version = self._version()
+            if self._arrays is None or self._arrays_version != version:
+                jobs = self._jobs()
+                self._arrays = {
+                    **self._build_arrays(jobs),
+                    "summaries": {job_id: self._summary(job_id, job) for job_id, job in jobs.items()}
+                }
+                self._arrays_version = version
+            arrays = self._arrays
+            summaries = arrays["summaries"]
+
+        count = len(arrays["job_ids"])
+        if not count or top_k <= 0:
+            return []
+
+        cv_skills = np.zeros(arrays["skills"].shape[1], dtype=np.float32)
+        for skill in canonical_skills(cv_data.get("skills")):
+            if skill in arrays["vocabulary"]:
+                cv_skills[arrays["vocabulary"][skill]] = 1.0
+        totals = arrays["skill_totals"]
+        skill_score = np.divide(arrays["skills"] @ cv_skills, totals, out=np.ones(count, dtype=np.float32), where=totals > 0)
+
+        text_score = arrays["vectors"] @ hashed_vector(cv_terms(cv_data), self.dim)
+        if text_score.max() > 0:
+            text_score = text_score / text_score.max()
+
+        years = experience_years(cv_data.get("experience"))
+        years_score = years_match(-1.0 if years is None else years, arrays["years"])
+        education_score = education_match(highest_education(cv_data), arrays["education"])
+        scores = combine_scores(skill_score, text_score, years_score, education_score)
+
+        top_k = min(top_k, count)
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [
+            {
+                **summaries[arrays["job_ids"][row]],
+                "score": round(float(scores[row]), 1),
+                "skill_coverage": round(float(skill_score[row]), 3),
+                "text_similarity": round(float(text_score[row]), 3),
+                "required_years": float(arrays["years"][row]) or None,
+                "required_education_level": int(arrays["education"][row])
+            }
+            for row in best
+        ]
@@ -0,0 +1,205 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class AnalysisJob:
+    """
+    A background analysis and the progress events it has published.
+    """
+
+    def __init__(self, owner: str):
+        self.id = str(uuid.uuid4())
+        self.owner = owner
+        self.status = "queued"
+        self.stages: List[str] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.events: List[Dict[str, Any]] = []
+        self.detached = False
+        self._condition = threading.Condition()
+
+    @classmethod
+    def restore(cls, job_id: str, owner: str, status: str, stages: List[str],
+                result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> "AnalysisJob":
+        """
+        Rebuild a job run by another worker process from its recorded progress.
+
+        The events it would have published so far are replayed, but a restored
+        job is a snapshot: it does not receive later events.
+        """
+        job = cls(owner)
+        job.id = job_id
+        job.status = status
+        job.detached = True
+        job.events.append({"event": "status", "data": {"status": "running"}})
+        for stage in stages:
+            job.stage_complete(stage)
+        if job.done:
+            job.finish(status, result=result, error=error)
+        return job
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("done", "error")
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        """Record a progress event and wake up any listeners."""
+        with self._condition:
+            self.events.append({"event": event, "data": data})
+            self._condition.notify_all()
+
+    def finish(self, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        """Mark the job finished and publish the final event atomically."""
+        with self._condition:
+            self.result = result
+            self.error = error
+            self.finished = time.time()
+            self.status = status
+            self.events.append({"event": status, "data": {"status": status, "error": error}})
+            self._condition.notify_all()
+
+    def stage_complete(self, stage: str) -> None:
+        self.stages.append(stage)
+        self.publish("stage", {"stage": stage})
+
+    def wait_for_events(self, cursor: int, timeout: float) -> List[Dict[str, Any]]:
+        """
+        Return events published after cursor, waiting up to timeout for new ones.
+        """
+        with self._condition:
+            if cursor >= len(self.events) and not self.done:
+                self._condition.wait(timeout)
+            return self.events[cursor:]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stages": list(self.stages),
+            "error": self.error,
+            "created": self.created,
+            "finished": self.finished
+        }
+
+class JobManager:
+    """
+    Runs analyses on a bounded thread pool and keeps their state for polling.
+
+    An owner has at most one queued or running job at a time. Finished jobs
+    are dropped retention_seconds after they complete.
+    """
+
+    def __init__(self, max_workers: int = 4, retention_seconds: float = 3600):
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+        self._jobs: Dict[str, AnalysisJob] = {}
+        self._active: Dict[str, AnalysisJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, owner: str, fn: Callable[..., Dict[str, Any]], *args, **kwargs) -> AnalysisJob:
+        """
+        Queue fn(job, *args, **kwargs) for background execution.
+
+        fn receives the job so it can report stages, and returns the result
+        dict. A result containing error_message marks the job as failed.
+
+        Args:
+            owner: Session id allowed to see the job
+            fn: Function performing the analysis
+
+        Returns:
+            The queued job, or the owner's job that is still queued or running
+            (a double click must not run the same session's graph twice)
+        """
+        self._expire()
+        with self._lock:
+            active = self._active.get(owner)
+            if active is not None and not active.done:
+                return active
+            job = AnalysisJob(owner)
+            self._jobs[job.id] = job
+            self._active[owner] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def get(self, job_id: str, owner: Optional[str] = None) -> Optional[AnalysisJob]:
+        """Return the job if it exists and belongs to owner (when given)."""
+        # Expire here too, so an idle worker does not keep old results and event logs
+        self._expire()
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or (owner is not None and job.owner != owner):
+            return None
+        return job
+
+    def stream(self, job: AnalysisJob, heartbeat: float = 15.0) -> Iterator[str]:
+        """
+        Yield the job's events in server-sent events format until it finishes.
+
+        Events already published are replayed first, so late listeners see
+        every completed stage. A restored job only replays its snapshot; the
+        client reconnects (after the advertised retry delay) for newer events.
+        """
+        if job.detached:
+            yield "retry: 2000\n\n"
+            for item in job.events:
+                yield f"event: {item['event']}\ndata: {json.dumps(item['data'])}\n\n"
+            return
+
+        cursor = 0
+        while True:
+            events = job.wait_for_events(cursor, heartbeat)
+            if not events:
+                if job.done:
+                    return
+                # Keep proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+
+            for item in events:
+                yield f"event: {item['event']}\ndata: {json.dumps(item['data'])}\n\n"
+            cursor += len(events)
+
+            if job.done and cursor >= len(job.events):
+                return
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {"queued": 0, "running": 0, "done": 0, "error": 0}
+        for job in jobs:
+            counts[job.status] += 1
+        return counts
+
+    def _run(self, job: AnalysisJob, fn, args, kwargs) -> None:
+        job.status = "running"
+        job.publish("status", {"status": "running"})
+        try:
+            result = fn(job, *args, **kwargs)
+            if result.get('error_message'):
+                job.finish("error", error=result['error_message'])
+            else:
+                job.finish("done", result=result)
+        except Exception as e:
+            logger.error(f"Analysis job {job.id} failed: {str(e)}")
+            job.finish("error", error=f"Analysis error: {str(e)}")
+        finally:
+            with self._lock:
+                if self._active.get(job.owner) is job:
+                    del self._active[job.owner]
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and job.finished < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
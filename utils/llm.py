@@ -0,0 +1,165 @@
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional
+
+import httpx
+from dotenv import load_dotenv
+from langchain_core.callbacks import BaseCallbackHandler
+
+from utils.metrics import LLM_CALLS, LLM_RATE_LIMIT_WAIT, LLM_RETRIES, llm_usage, record_llm_usage
+from utils.rate_limiter import QuotaLimiter
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Default model; LLM_MODEL_<ROLE> (e.g. LLM_MODEL_SUMMARY) overrides it for one node
+LLM_MODEL = os.getenv('LLM_MODEL', 'gpt-4')
+LLM_TIMEOUT_SECONDS = float(os.getenv('LLM_TIMEOUT_SECONDS', 60))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv('LLM_CONNECT_TIMEOUT_SECONDS', 10))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', 2))
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', 20))
+LLM_KEEPALIVE_SECONDS = float(os.getenv('LLM_KEEPALIVE_SECONDS', 30))
+
+# Process-wide quotas shared by every node (0 disables a limit)
+LLM_RPM = float(os.getenv('LLM_RPM', 0))
+LLM_TPM = float(os.getenv('LLM_TPM', 0))
+LLM_BURST = int(os.getenv('LLM_BURST', 4))
+# Completion tokens reserved per call until the real usage is reported
+LLM_COMPLETION_TOKENS_ESTIMATE = int(os.getenv('LLM_COMPLETION_TOKENS_ESTIMATE', 1000))
+
+limiter = QuotaLimiter(LLM_RPM, LLM_TPM, burst=LLM_BURST)
+
+# Tells the shared HTTP client which node a request belongs to; never sent upstream
+STAGE_HEADER = "x-rolesync-stage"
+
+_http_client: Optional[httpx.Client] = None
+_clients: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+class RateLimitCallbackHandler(BaseCallbackHandler):
+    """
+    Holds each LLM request until the shared quotas allow it.
+
+    The prompt size is estimated from the messages (about four characters per
+    token) and settled against the usage reported when the call ends.
+    """
+
+    raise_error = True
+    run_inline = True
+
+    def __init__(self, quota: QuotaLimiter):
+        self.quota = quota
+        self._estimates: Dict[Any, int] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        characters = sum(len(str(message.content)) for batch in messages for message in batch)
+        estimate = characters // 4 + LLM_COMPLETION_TOKENS_ESTIMATE
+        with self._lock:
+            self._estimates[run_id] = estimate
+
+        waited = self.quota.acquire(estimate)
+        if waited:
+            LLM_RATE_LIMIT_WAIT.inc(waited)
+            logger.info(f"LLM call waited {waited:.2f}s for the rate limiter")
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        with self._lock:
+            estimate = self._estimates.pop(run_id, None)
+        _, prompt_tokens, completion_tokens = llm_usage(response)
+        if estimate is not None and prompt_tokens is not None:
+            self.quota.settle(estimate, prompt_tokens + (completion_tokens or 0))
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        with self._lock:
+            self._estimates.pop(run_id, None)
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback recording token usage and errors of LLM calls.
+    """
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        LLM_CALLS.inc(stage=self.stage, outcome="ok")
+        model, prompt_tokens, completion_tokens = llm_usage(response)
+        if prompt_tokens is not None:
+            record_llm_usage(self.stage, model, prompt_tokens, completion_tokens or 0)
+
+    def on_llm_error(self, error, **kwargs) -> None:
+        LLM_CALLS.inc(stage=self.stage, outcome="error")
+
+def _count_retry(request: httpx.Request) -> None:
+    """
+    httpx request hook counting the openai SDK's own retries.
+
+    The SDK retries inside its client, so LangChain never sees them; every
+    attempt after the first carries a non-zero x-stainless-retry-count. The
+    stage travels in an internal header that is removed before sending.
+    """
+    stage = request.headers.pop(STAGE_HEADER, None) or "unknown"
+    if request.headers.get("x-stainless-retry-count", "0") != "0":
+        LLM_RETRIES.inc(stage=stage)
+
+def llm_config(stage: str) -> Dict[str, Any]:
+    """Runnable config attaching the metrics callback for stage."""
+    return {"callbacks": [MetricsCallbackHandler(stage)]}
+
+def get_http_client() -> httpx.Client:
+    """Return the pooled keep-alive HTTP client shared by every LLM client."""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS),
+                limits=httpx.Limits(
+                    max_connections=LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                    keepalive_expiry=LLM_KEEPALIVE_SECONDS
+                ),
+                event_hooks={"request": [_count_retry]}
+            )
+        return _http_client
+
+def llm_model_name(role: str) -> str:
+    """Model used for a node role, without building its client."""
+    return os.getenv(f'LLM_MODEL_{role.upper()}', LLM_MODEL)
+
+def get_llm(role: str):
+    """
+    Return the chat model client for a node role.
+
+    Clients are created once per role, on first use, and share one HTTP
+    connection pool, the per-call deadline and the process-wide rate limiter.
+
+    Args:
+        role: Node using the client (parse_cv, parse_job, compare, summary)
+
+    Returns:
+        Configured ChatOpenAI client
+    """
+    with _lock:
+        client = _clients.get(role)
+    if client is not None:
+        return client
+
+    # langchain_openai is slow to import, so it is only loaded once a client is needed
+    from langchain_openai import ChatOpenAI
+
+    client = ChatOpenAI(
+        model=llm_model_name(role),
+        temperature=0,
+        timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS),
+        max_retries=LLM_MAX_RETRIES,
+        http_client=get_http_client(),
+        default_headers={STAGE_HEADER: role},
+        stream_usage=True,
+        callbacks=[RateLimitCallbackHandler(limiter)]
+    )
+    with _lock:
+        return _clients.setdefault(role, client)
@@ -0,0 +1,318 @@
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# USD per 1K tokens as (prompt, completion); override with LLM_PRICES='{"gpt-4": [0.03, 0.06]}'
+DEFAULT_PRICES = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-32k": (0.06, 0.12),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+}
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120)
+
+def _load_prices() -> Dict[str, Tuple[float, float]]:
+    prices = dict(DEFAULT_PRICES)
+    override = os.getenv('LLM_PRICES')
+    if override:
+        try:
+            prices.update({model: tuple(price) for model, price in json.loads(override).items()})
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Ignoring invalid LLM_PRICES: {str(e)}")
+    return prices
+
+MODEL_PRICES = _load_prices()
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class _Metric(ABC):
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Exposition lines for every label set."""
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    type_name = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+class Histogram(_Metric):
+    """Bucketed distribution of observations per label set."""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.setdefault(key, {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["buckets"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = sorted(self._values.items())
+            for key, series in items:
+                for bound, count in zip(self.buckets, series["buckets"]):
+                    labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {count}")
+                labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{labels} {series['count']}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series['sum']}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series['count']}")
+        return lines
+
+class Summary(_Metric):
+    """
+    Quantiles over a sliding window of the most recent observations.
+    """
+
+    type_name = "summary"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 quantiles: Iterable[float] = (0.5, 0.95, 0.99), window: int = 1024):
+        super().__init__(name, documentation, labelnames)
+        self.quantiles = tuple(quantiles)
+        self.window = window
+        self._values: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.setdefault(key, {"window": deque(maxlen=self.window), "sum": 0.0, "count": 0})
+            series["window"].append(value)
+            series["sum"] += value
+            series["count"] += 1
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        with self._lock:
+            series = self._values.get(self._key(labels))
+            if not series or not series["window"]:
+                return None
+            ordered = sorted(series["window"])
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(key, sorted(series["window"]), series["sum"], series["count"])
+                     for key, series in sorted(self._values.items())]
+        for key, ordered, total, count in items:
+            for q in self.quantiles:
+                value = ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else "NaN"
+                labels = _format_labels(self.labelnames, key, f'quantile="{q}"')
+                lines.append(f"{self.name}{labels} {value}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+class GaugeCallback(_Metric):
+    """Gauge whose values are read from a callback at scrape time."""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str],
+                 callback: Callable[[], Dict[Tuple[str, ...], float]]):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _samples(self) -> List[str]:
+        try:
+            values = self.callback()
+        except Exception as e:
+            logger.warning(f"Gauge {self.name} callback failed: {str(e)}")
+            return []
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in sorted(values.items())]
+
+class Registry:
+    """Collection of metrics rendered together in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+STAGE_LATENCY = registry.register(Histogram(
+    "rolesync_stage_latency_seconds", "Wall-clock latency of each pipeline stage", ["stage"]))
+STAGE_LATENCY_QUANTILES = registry.register(Summary(
+    "rolesync_stage_latency_quantiles_seconds", "p50/p95/p99 stage latency over recent calls", ["stage"]))
+STAGE_CALLS = registry.register(Counter(
+    "rolesync_stage_calls_total", "Pipeline stage executions by outcome", ["stage", "outcome"]))
+LLM_TOKENS = registry.register(Counter(
+    "rolesync_llm_tokens_total", "LLM tokens consumed", ["stage", "model", "kind"]))
+LLM_COST = registry.register(Counter(
+    "rolesync_llm_cost_usd_total", "Estimated LLM cost in US dollars", ["stage", "model"]))
+LLM_CALLS = registry.register(Counter(
+    "rolesync_llm_calls_total", "LLM requests by outcome", ["stage", "outcome"]))
+LLM_RETRIES = registry.register(Counter(
+    "rolesync_llm_retries_total", "LLM request retries", ["stage"]))
+LLM_RATE_LIMIT_WAIT = registry.register(Counter(
+    "rolesync_llm_rate_limit_wait_seconds_total", "Time LLM calls spent waiting for the rate limiter"))
+JSON_FALLBACKS = registry.register(Counter(
+    "rolesync_json_fallback_total", "LLM responses that needed the brace-slicing JSON fallback", ["stage"]))
+STRUCTURED_OUTPUTS = registry.register(Counter(
+    "rolesync_structured_output_total", "Structured LLM answers by outcome (ok, repaired, salvaged, failed)",
+    ["stage", "outcome"]))
+STRUCTURED_REPAIRS = registry.register(Counter(
+    "rolesync_structured_repairs_total", "Repair and continuation calls made for unusable LLM answers",
+    ["stage", "kind"]))
+COMPARE_SECTIONS = registry.register(Counter(
+    "rolesync_compare_sections_total", "Comparison sections reused from the section cache or recomputed",
+    ["section", "outcome"]))
+SPECULATIVE_WORK = registry.register(Counter(
+    "rolesync_speculative_work_total", "Speculatively started pipeline stages and whether their result was used",
+    ["stage", "outcome"]))
+PDF_BACKEND_LATENCY = registry.register(Histogram(
+    "rolesync_pdf_backend_latency_seconds", "Latency of each PDF extraction backend", ["backend"]))
+PDF_BACKEND_RUNS = registry.register(Counter(
+    "rolesync_pdf_backend_runs_total", "PDF extraction backend runs by outcome", ["backend", "outcome"]))
+PDF_BACKEND_WINS = registry.register(Counter(
+    "rolesync_pdf_backend_wins_total", "Times each PDF extraction backend's text was used", ["backend"]))
+
+def _failed_state(result: Any) -> bool:
+    return isinstance(result, dict) and bool(result.get("error_message"))
+
+def instrument(stage: str, failed: Callable[[Any], bool] = _failed_state):
+    """
+    Decorator recording latency and outcome of a pipeline stage.
+
+    Args:
+        stage: Stage label used in the exported metrics
+        failed: Predicate deciding whether a returned value counts as an error
+            (defaults to a state dict carrying error_message)
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "error"
+            try:
+                result = fn(*args, **kwargs)
+                outcome = "error" if failed(result) else "ok"
+                return result
+            finally:
+                elapsed = time.perf_counter() - started
+                STAGE_LATENCY.observe(elapsed, stage=stage)
+                STAGE_LATENCY_QUANTILES.observe(elapsed, stage=stage)
+                STAGE_CALLS.inc(stage=stage, outcome=outcome)
+        return wrapper
+    return decorator
+
+def record_json_fallback(stage: str) -> None:
+    """Count a response that was not valid JSON as returned."""
+    JSON_FALLBACKS.inc(stage=stage)
+
+def record_llm_usage(stage: str, model: str, prompt_tokens: int, completion_tokens: int) -> None:
+    """Record token counts and estimated cost for one LLM call."""
+    LLM_TOKENS.inc(prompt_tokens, stage=stage, model=model, kind="prompt")
+    LLM_TOKENS.inc(completion_tokens, stage=stage, model=model, kind="completion")
+
+    price = MODEL_PRICES.get(model)
+    if price is None:
+        # Dated snapshots such as gpt-4-0613 are billed like their base model
+        matches = [name for name in MODEL_PRICES if model.startswith(name)]
+        price = MODEL_PRICES[max(matches, key=len)] if matches else None
+    if price is not None:
+        LLM_COST.inc((prompt_tokens * price[0] + completion_tokens * price[1]) / 1000, stage=stage, model=model)
+
+def llm_usage(response) -> Tuple[str, Optional[int], Optional[int]]:
+    """
+    Read the model name and token usage from an LLMResult.
+
+    Returns:
+        (model, prompt_tokens, completion_tokens); token counts are None if not reported
+    """
+    llm_output = response.llm_output or {}
+    model = llm_output.get("model_name") or "unknown"
+
+    usage = llm_output.get("token_usage") or {}
+    prompt_tokens = usage.get("prompt_tokens")
+    completion_tokens = usage.get("completion_tokens")
+
+    if prompt_tokens is None:
+        # Streaming responses carry usage on the message instead
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                metadata = getattr(message, "usage_metadata", None) or {}
+                if metadata:
+                    prompt_tokens = (prompt_tokens or 0) + metadata.get("input_tokens", 0)
+                    completion_tokens = (completion_tokens or 0) + metadata.get("output_tokens", 0)
+                response_metadata = getattr(message, "response_metadata", None) or {}
+                model = response_metadata.get("model_name") or model
+
+    return model, prompt_tokens, completion_tokens
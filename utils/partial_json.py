@@ -0,0 +1,90 @@
+import json
+from typing import Any, Dict, Optional
+
+def parse_partial_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse a JSON object that may be cut off mid-stream.
+
+    Unterminated string values are closed, members whose key or value has
+    not started yet are dropped, and open arrays/objects are closed, so a
+    prefix of a streamed completion yields every field received so far.
+
+    Args:
+        text: Possibly incomplete JSON text (leading prose is skipped)
+
+    Returns:
+        The parsed object, or None if nothing usable has arrived yet
+    """
+    start = text.find('{')
+    if start == -1:
+        return None
+    text = text[start:]
+
+    stack = []
+    in_string = False
+    escape = False
+    string_is_key = False
+    # "key": expecting a key, "after_key": key read, waiting for ':',
+    # "value": waiting for a value, "in_value": value started or complete
+    expect = "key"
+    member_start = 0
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == '\\':
+                escape = True
+            elif ch == '"':
+                in_string = False
+                expect = "after_key" if string_is_key else "in_value"
+            continue
+
+        if ch.isspace():
+            continue
+
+        if ch == '"':
+            in_string = True
+            string_is_key = expect == "key" and stack and stack[-1] == '{'
+            if string_is_key:
+                member_start = i
+            expect = "in_value" if not string_is_key else expect
+        elif ch in '{[':
+            stack.append(ch)
+            expect = "key" if ch == '{' else "value"
+        elif ch in '}]':
+            if stack:
+                stack.pop()
+            expect = "in_value"
+            if not stack:
+                try:
+                    return json.loads(text[:i + 1])
+                except json.JSONDecodeError:
+                    return None
+        elif ch == ':':
+            expect = "value"
+        elif ch == ',':
+            expect = "key" if stack and stack[-1] == '{' else "value"
+        else:
+            expect = "in_value"
+
+    candidate = text
+    if in_string:
+        if string_is_key:
+            candidate = candidate[:member_start]
+        else:
+            if escape:
+                candidate = candidate[:-1]
+            candidate += '"'
+    elif expect in ("after_key", "value") and stack and stack[-1] == '{':
+        candidate = candidate[:member_start]
+
+    candidate = candidate.rstrip()
+    if candidate.endswith(','):
+        candidate = candidate[:-1]
+    closers = ''.join('}' if opener == '{' else ']' for opener in reversed(stack))
+
+    try:
+        return json.loads(candidate + closers)
+    except json.JSONDecodeError:
+        return None
@@ -1,38 +1,65 @@
 import PyPDF2
-from typing import Optional
+from typing import List, Optional, Tuple
 import logging
+import multiprocessing
+import re
 import subprocess
 import os
 import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from utils.metrics import PDF_BACKEND_LATENCY, PDF_BACKEND_RUNS, PDF_BACKEND_WINS, instrument
 
 logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(pdf_path: str) -> Optional[str]:
+# Page-level extraction settings
+PDF_MAX_PAGES = int(os.getenv('PDF_MAX_PAGES', 50))
+PDF_EXTRACT_WORKERS = int(os.getenv('PDF_EXTRACT_WORKERS', min(4, os.cpu_count() or 1)))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv('PDF_PARALLEL_MIN_PAGES', 8))
+
+# "sequential" or "race" (run every backend concurrently under a deadline)
+PDF_EXTRACT_MODE = os.getenv('PDF_EXTRACT_MODE', 'sequential').lower()
+PDF_RACE_DEADLINE_SECONDS = float(os.getenv('PDF_RACE_DEADLINE_SECONDS', 20))
+PDF_RACE_THREADS = int(os.getenv('PDF_RACE_THREADS', 6))
+PDF_QUALITY_THRESHOLD = float(os.getenv('PDF_QUALITY_THRESHOLD', 0.8))
+
+# Ligatures, replacement characters and common UTF-8 mojibake
+ARTIFACT_MARKERS = ("\ufffd", "\ufb00", "\ufb01", "\ufb02", "\ufb03", "\ufb04", "\u00c3", "\u00e2\u20ac")
+CID_PATTERN = re.compile(r"\(cid:\d+\)")
+
+# Worker processes are shared across extractions
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+_race_executor = None
+
+@instrument("pdf_extract", failed=lambda text: not text)
+def extract_text_from_pdf(pdf_path: str, mode: Optional[str] = None) -> Optional[str]:
     """
     Extract text content from a PDF file using multiple methods.
 
+    Each backend's output is scored with score_text_quality, so garbled text
+    no longer wins just because it is non-empty.
+
     Args:
         pdf_path: Path to the PDF file
+        mode: "sequential" tries PyPDF2, pdfplumber and pdftotext in turn; "race"
+            runs them concurrently under a deadline (defaults to PDF_EXTRACT_MODE)
 
     Returns:
         Extracted text content or None if extraction fails
     """
-    # Method 1: Try PyPDF2 first
-    text = _extract_with_pypdf2(pdf_path)
-    if text and text.strip():
-        return text.strip()
-
-    # Method 2: Try pdfplumber if PyPDF2 fails
-    text = _extract_with_pdfplumber(pdf_path)
-    if text and text.strip():
-        return text.strip()
-
-    # Method 3: Try pdftotext command if available
-    text = _extract_with_pdftotext(pdf_path)
-    if text and text.strip():
-        return text.strip()
-
-    # Method 4: Create a sample text for testing purposes
+    mode = mode or PDF_EXTRACT_MODE
+    if mode == "race":
+        text = _extract_racing(pdf_path)
+    else:
+        text = _extract_sequential(pdf_path)
+    if text:
+        return text
+
+    # Last resort: Create a sample text for testing purposes
     if os.path.exists(pdf_path):
         logger.warning("Could not extract text from PDF, creating sample data for testing")
         return _create_sample_cv_text()
@@ -40,25 +67,133 @@ def extract_text_from_pdf(pdf_path: str) -> Optional[str]:
     logger.error(f"No text could be extracted from the PDF: {pdf_path}")
     return None
 
-def _extract_with_pypdf2(pdf_path: str) -> Optional[str]:
-    """Extract text using PyPDF2"""
+def score_text_quality(text: Optional[str]) -> float:
+    """
+    Cheap heuristic for how readable extracted text is.
+
+    Combines the share of printable characters, a plausible letters/spaces
+    balance (garbled extraction often drops spaces or produces symbol soup)
+    and a penalty for ligature and encoding artifacts such as U+FFFD,
+    "(cid:12)" markers or UTF-8 mojibake.
+
+    Args:
+        text: Extracted text
+
+    Returns:
+        Score between 0.0 (unusable) and 1.0 (clean text)
+    """
+    if not text or not text.strip():
+        return 0.0
+
+    total = len(text)
+    printable = sum(1 for ch in text if ch.isprintable() or ch in "\n\t\r\f")
+    letters = sum(1 for ch in text if ch.isalpha())
+    spaces = sum(1 for ch in text if ch.isspace())
+    printable_ratio = printable / total
+
+    # Natural language is mostly letters with roughly one space per 4-8 characters
+    letter_ratio = min(1.0, letters / total / 0.6)
+    space_ratio = spaces / total
+    if space_ratio < 0.08:
+        space_score = space_ratio / 0.08
+    elif space_ratio > 0.35:
+        space_score = max(0.0, 1 - (space_ratio - 0.35) / 0.35)
+    else:
+        space_score = 1.0
+
+    words = text.split()
+    long_words = sum(1 for word in words if len(word) > 25)
+    word_score = 1 - min(1.0, long_words / max(1, len(words)) * 10)
+    average_length = sum(len(word) for word in words) / max(1, len(words))
+    if average_length < 2.5:
+        # "J O H N D O E": letters split apart by the text layer
+        word_score *= average_length / 2.5
+
+    artifacts = sum(text.count(marker) for marker in ARTIFACT_MARKERS) + len(CID_PATTERN.findall(text))
+    artifact_score = 1 - min(1.0, artifacts / max(1, len(words)) * 5)
+
+    return round(printable_ratio * (0.3 * letter_ratio + 0.25 * space_score
+                                    + 0.2 * word_score + 0.25 * artifact_score), 4)
+
+def _run_backend(name: str, extract_fn, pdf_path: str) -> Tuple[Optional[str], float]:
+    """Run one backend, recording its latency, and return its text and quality score."""
+    started = time.perf_counter()
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            text = ""
+        text = extract_fn(pdf_path)
+    finally:
+        PDF_BACKEND_LATENCY.observe(time.perf_counter() - started, backend=name)
+    text = text.strip() if text and text.strip() else None
+    score = score_text_quality(text)
+    PDF_BACKEND_RUNS.inc(backend=name, outcome="ok" if text else "empty")
+    return text, score
+
+def _extract_sequential(pdf_path: str) -> Optional[str]:
+    """Try each backend in turn, stopping at the first that clears the quality threshold"""
+    best = (None, 0.0, None)
+    for name, extract_fn in EXTRACTION_BACKENDS:
+        text, score = _run_backend(name, extract_fn, pdf_path)
+        if text and score >= PDF_QUALITY_THRESHOLD:
+            PDF_BACKEND_WINS.inc(backend=name)
+            return text
+        if text and score > best[1]:
+            best = (text, score, name)
+        if text:
+            logger.info(f"{name} output scored {score:.2f}, trying next backend")
+
+    if best[0]:
+        PDF_BACKEND_WINS.inc(backend=best[2])
+    return best[0]
+
+def _extract_racing(pdf_path: str) -> Optional[str]:
+    """
+    Run every backend concurrently and return the first result that clears the
+    quality threshold, or the best one available when all finish or the deadline passes.
+    """
+    deadline = time.monotonic() + PDF_RACE_DEADLINE_SECONDS
+    futures = {
+        _get_race_executor().submit(_run_backend, name, extract_fn, pdf_path): name
+        for name, extract_fn in EXTRACTION_BACKENDS
+    }
+
+    best = (None, 0.0, None)
+    pending = set(futures)
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.warning(f"PDF extraction deadline reached with {len(pending)} backend(s) still running")
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures[future]
+            try:
+                text, score = future.result()
+            except Exception as e:
+                logger.warning(f"{name} extraction failed: {str(e)}")
+                continue
+            if text and score >= PDF_QUALITY_THRESHOLD:
+                # Good enough: don't wait for the slower backends
+                PDF_BACKEND_WINS.inc(backend=name)
+                return text
+            if text and score > best[1]:
+                best = (text, score, name)
 
-            # Extract text from all pages
-            for page_num, page in enumerate(pdf_reader.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-                except Exception as e:
-                    logger.warning(f"PyPDF2: Failed to extract text from page {page_num + 1}: {str(e)}")
-                    continue
+    if best[0]:
+        PDF_BACKEND_WINS.inc(backend=best[2])
+    return best[0]
 
-            return text if text.strip() else None
+def _get_race_executor() -> ThreadPoolExecutor:
+    global _race_executor
+    with _pool_lock:
+        if _race_executor is None:
+            _race_executor = ThreadPoolExecutor(
+                max_workers=PDF_RACE_THREADS, thread_name_prefix="pdf-extract"
+            )
+        return _race_executor
 
+def _extract_with_pypdf2(pdf_path: str) -> Optional[str]:
+    """Extract text using PyPDF2"""
+    try:
+        return extract_pages(pdf_path, "pypdf2")
     except Exception as e:
         logger.warning(f"PyPDF2 extraction failed: {str(e)}")
         return None
@@ -66,21 +201,117 @@ def _extract_with_pypdf2(pdf_path: str) -> Optional[str]:
 def _extract_with_pdfplumber(pdf_path: str) -> Optional[str]:
     """Extract text using pdfplumber (more robust)"""
     try:
-        import pdfplumber
-        text = ""
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-        return text if text.strip() else None
+        import pdfplumber  # noqa: F401
     except ImportError:
         logger.info("pdfplumber not installed, skipping this method")
         return None
+
+    try:
+        return extract_pages(pdf_path, "pdfplumber")
     except Exception as e:
         logger.warning(f"pdfplumber extraction failed: {str(e)}")
         return None
 
+def extract_pages(pdf_path: str, backend: str, workers: Optional[int] = None,
+                  max_pages: Optional[int] = None) -> Optional[str]:
+    """
+    Extract text page by page, spreading long documents over a process pool.
+
+    Pages are split into contiguous chunks, extracted in worker processes and
+    joined back in page order, separated by form feeds like pdftotext output.
+
+    Args:
+        pdf_path: Path to the PDF file
+        backend: "pypdf2" or "pdfplumber"
+        workers: Number of worker processes (defaults to PDF_EXTRACT_WORKERS, 1 disables the pool)
+        max_pages: Maximum number of pages to read (defaults to PDF_MAX_PAGES)
+
+    Returns:
+        Extracted text or None if no page produced text
+    """
+    workers = PDF_EXTRACT_WORKERS if workers is None else workers
+    max_pages = PDF_MAX_PAGES if max_pages is None else max_pages
+    extract_fn = _PAGE_EXTRACTORS[backend]
+
+    page_count = _page_count(pdf_path, backend)
+    if max_pages and page_count > max_pages:
+        logger.info(f"Only extracting the first {max_pages} of {page_count} pages")
+        page_count = max_pages
+
+    pages = []
+    if workers > 1 and page_count >= PDF_PARALLEL_MIN_PAGES:
+        chunk_size = -(-page_count // workers)
+        chunks = [list(range(i, min(i + chunk_size, page_count))) for i in range(0, page_count, chunk_size)]
+        try:
+            for chunk_pages in _get_pool(workers).map(extract_fn, [pdf_path] * len(chunks), chunks):
+                pages.extend(chunk_pages)
+        except BrokenProcessPool as e:
+            logger.warning(f"PDF worker pool failed, extracting sequentially: {str(e)}")
+            _reset_pool()
+            pages = extract_fn(pdf_path, list(range(page_count)))
+    else:
+        pages = extract_fn(pdf_path, list(range(page_count)))
+
+    text = "\f".join(page for page in pages if page)
+    return text if text.strip() else None
+
+def _page_count(pdf_path: str, backend: str) -> int:
+    if backend == "pdfplumber":
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            return len(pdf.pages)
+    with open(pdf_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+def _pypdf2_pages(pdf_path: str, page_numbers: List[int]) -> List[str]:
+    """Extract the given pages with PyPDF2 (runs in worker processes)"""
+    texts = []
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page_num in page_numbers:
+            try:
+                texts.append(pdf_reader.pages[page_num].extract_text() or "")
+            except Exception as e:
+                logger.warning(f"PyPDF2: Failed to extract text from page {page_num + 1}: {str(e)}")
+                texts.append("")
+    return texts
+
+def _pdfplumber_pages(pdf_path: str, page_numbers: List[int]) -> List[str]:
+    """Extract the given pages with pdfplumber (runs in worker processes)"""
+    import pdfplumber
+    texts = []
+    with pdfplumber.open(pdf_path) as pdf:
+        for page_num in page_numbers:
+            try:
+                texts.append(pdf.pages[page_num].extract_text() or "")
+            except Exception as e:
+                logger.warning(f"pdfplumber: Failed to extract text from page {page_num + 1}: {str(e)}")
+                texts.append("")
+    return texts
+
+_PAGE_EXTRACTORS = {
+    "pypdf2": _pypdf2_pages,
+    "pdfplumber": _pdfplumber_pages,
+}
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn avoids forking a multi-threaded web server
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+def _reset_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = None
+
 def _extract_with_pdftotext(pdf_path: str) -> Optional[str]:
     """Extract text using pdftotext command line tool"""
     try:
@@ -95,6 +326,12 @@ def _extract_with_pdftotext(pdf_path: str) -> Optional[str]:
         logger.warning(f"pdftotext extraction failed: {str(e)}")
     return None
 
+EXTRACTION_BACKENDS = [
+    ("pypdf2", _extract_with_pypdf2),
+    ("pdfplumber", _extract_with_pdfplumber),
+    ("pdftotext", _extract_with_pdftotext),
+]
+
 def _create_sample_cv_text() -> str:
     """Create sample CV text for testing when PDF extraction fails"""
     return """
@@ -0,0 +1,147 @@
+import functools
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Compact serialization; false restores the original indent=2 dumps
+PROMPT_COMPACT = os.getenv('PROMPT_COMPACT', 'true').lower() == 'true'
+# Longer strings are cut short; anything this size is a raw-text blob, not a field
+PROMPT_MAX_STRING_CHARS = int(os.getenv('PROMPT_MAX_STRING_CHARS', 1000))
+PROMPT_TOKENIZER = os.getenv('PROMPT_TOKENIZER', 'cl100k_base')
+
+# Keys that never belong in a prompt: raw extraction output and display-only copies
+DROPPED_KEYS = {"cv_text", "formatted_cv_data", "metadata"}
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(PROMPT_TOKENIZER)
+    except Exception as e:
+        # tiktoken is optional and downloads its tables on first use
+        logger.warning(f"Tokenizer {PROMPT_TOKENIZER} unavailable, estimating tokens from length: {str(e)}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens text costs in a prompt.
+
+    Uses tiktoken when available, otherwise estimates four characters per token.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return math.ceil(len(text) / 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def prune(data: Any) -> Any:
+    """
+    Drop what carries no information for the model.
+
+    Removes None, empty strings, empty lists and empty objects (recursively),
+    keys listed in DROPPED_KEYS, and truncates strings longer than
+    PROMPT_MAX_STRING_CHARS.
+
+    Args:
+        data: JSON-compatible value
+
+    Returns:
+        Pruned copy of data (None if nothing is left)
+    """
+    if isinstance(data, dict):
+        pruned = {}
+        for key, value in data.items():
+            if key in DROPPED_KEYS:
+                continue
+            value = prune(value)
+            if value is not None:
+                pruned[key] = value
+        return pruned or None
+    if isinstance(data, (list, tuple)):
+        items = [item for item in (prune(item) for item in data) if item is not None]
+        return items or None
+    if isinstance(data, str):
+        text = data.strip()
+        if not text:
+            return None
+        if len(text) > PROMPT_MAX_STRING_CHARS:
+            return text[:PROMPT_MAX_STRING_CHARS].rstrip() + "…"
+        return text
+    return data
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+
+def _largest_list(data: Any, best=None):
+    """Find the list with the longest serialization that still has more than one item."""
+    if isinstance(data, dict):
+        for value in data.values():
+            best = _largest_list(value, best)
+    elif isinstance(data, list):
+        if len(data) > 1:
+            size = len(_dumps(data))
+            if best is None or size > best[0]:
+                best = (size, data)
+        for item in data:
+            best = _largest_list(item, best)
+    return best
+
+def _with_markers(data: Any, omitted: Dict[int, int]) -> Any:
+    """Copy of data with a marker appended to every list that was cut short."""
+    if isinstance(data, dict):
+        return {key: _with_markers(value, omitted) for key, value in data.items()}
+    if isinstance(data, list):
+        items = [_with_markers(item, omitted) for item in data]
+        if id(data) in omitted:
+            items.append(f"…{omitted[id(data)]} more")
+        return items
+    return data
+
+def fit_to_budget(data: Any, token_budget: int) -> str:
+    """
+    Serialize data compactly, trimming the longest lists until it fits token_budget.
+
+    Lists such as responsibilities or relevant experience lose their last
+    items first and end with a "…N more" marker so the model knows they were
+    shortened. Lists are never cut below one item.
+
+    Returns:
+        Compact JSON text (possibly still over budget if nothing is left to trim)
+    """
+    omitted: Dict[int, int] = {}
+    text = _dumps(data)
+    while count_tokens(text) > token_budget:
+        largest = _largest_list(data)
+        if largest is None:
+            logger.info(f"Prompt section still {count_tokens(text)} tokens after trimming (budget {token_budget})")
+            break
+        items = largest[1]
+        remove = max(1, len(items) // 4)
+        del items[-remove:]
+        omitted[id(items)] = omitted.get(id(items), 0) + remove
+        text = _dumps(_with_markers(data, omitted))
+    return text
+
+def serialize_for_prompt(data: Any, token_budget: Optional[int] = None) -> str:
+    """
+    Serialize state for an LLM prompt with as few tokens as possible.
+
+    Args:
+        data: JSON-compatible value (left unmodified)
+        token_budget: Optional token limit; lists are trimmed to fit it (0 or None for no limit)
+
+    Returns:
+        JSON text for the prompt
+    """
+    if not PROMPT_COMPACT:
+        return json.dumps(data, indent=2)
+
+    pruned = prune(data)
+    if pruned is None:
+        return "{}" if isinstance(data, dict) else "null"
+    if token_budget:
+        return fit_to_budget(pruned, token_budget)
+    return _dumps(pruned)
@@ -0,0 +1,89 @@
+import threading
+import time
+
+class RateLimiter:
+    """
+    Thread-safe token bucket limiting how many calls start per minute.
+
+    A rate of 0 disables limiting.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, burst: int = 1):
+        self.requests_per_minute = requests_per_minute
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost: float = 1) -> float:
+        """
+        Block until a call may start.
+
+        Args:
+            cost: Units taken from the bucket (capped at its capacity)
+
+        Returns:
+            Seconds spent waiting
+        """
+        if self.requests_per_minute <= 0:
+            return 0.0
+
+        cost = min(cost, self.capacity)
+        rate = self.requests_per_minute / 60.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(rate)
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    return waited
+                delay = (cost - self._tokens) / rate
+            time.sleep(delay)
+            waited += delay
+
+    def adjust(self, amount: float) -> None:
+        """
+        Return (positive) or take (negative) units once the real cost of a call is known.
+
+        The bucket may go negative, which delays the calls that follow.
+        """
+        if self.requests_per_minute <= 0:
+            return
+        with self._lock:
+            self._refill(self.requests_per_minute / 60.0)
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    def _refill(self, rate: float) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * rate)
+        self._updated = now
+
+class QuotaLimiter:
+    """
+    Requests-per-minute and tokens-per-minute quotas enforced together.
+
+    Token costs are estimated before a call and corrected with the reported
+    usage afterwards. A quota of 0 disables that limit.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0, burst: int = 1):
+        self.requests = RateLimiter(requests_per_minute, burst=burst)
+        self.tokens = RateLimiter(tokens_per_minute, burst=int(tokens_per_minute))
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, estimated_tokens: float) -> float:
+        """
+        Block until both quotas allow a call of the estimated size.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = self.requests.acquire() + self.tokens.acquire(estimated_tokens)
+        with self._lock:
+            self.waited_seconds += waited
+        return waited
+
+    def settle(self, estimated_tokens: float, actual_tokens: float) -> None:
+        """Correct the token bucket once a call's real usage is known."""
+        self.tokens.adjust(estimated_tokens - actual_tokens)
@@ -0,0 +1,225 @@
+from typing import Any, Dict, List, Optional, Union
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+# Scores and years come back as 75, 75.5 or "75%" depending on the model's mood
+Number = Optional[Union[int, float, str]]
+
+class LLMOutput(BaseModel):
+    """
+    Base for the JSON objects the nodes ask the LLM for.
+
+    Unknown keys are kept, numbers are accepted where text is expected, and
+    null is treated as "not provided" so list and object fields fall back to
+    their empty defaults instead of failing validation.
+    """
+
+    model_config = ConfigDict(extra="allow", coerce_numbers_to_str=True)
+
+    @model_validator(mode="before")
+    @classmethod
+    def _drop_nulls(cls, data: Any) -> Any:
+        if not isinstance(data, dict):
+            return data
+        cleaned = dict(data)
+        for name, field in cls.model_fields.items():
+            if name in cleaned and cleaned[name] is None and field.default_factory is not None:
+                del cleaned[name]
+        return cleaned
+
+# CV data (parse_cv)
+
+class Experience(LLMOutput):
+    title: Optional[str] = None
+    company: Optional[str] = None
+    location: Optional[str] = None
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    duration: Optional[str] = None
+    responsibilities: List[str] = Field(default_factory=list)
+
+class Education(LLMOutput):
+    degree: Optional[str] = None
+    institution: Optional[str] = None
+    location: Optional[str] = None
+    graduation_date: Optional[str] = None
+    gpa: Optional[str] = None
+    relevant_coursework: List[str] = Field(default_factory=list)
+
+class Certification(LLMOutput):
+    name: Optional[str] = None
+    issuer: Optional[str] = None
+    date: Optional[str] = None
+    expiry: Optional[str] = None
+
+class Project(LLMOutput):
+    name: Optional[str] = None
+    description: Optional[str] = None
+    technologies: List[str] = Field(default_factory=list)
+    date: Optional[str] = None
+
+class Language(LLMOutput):
+    language: Optional[str] = None
+    proficiency: Optional[str] = None
+
+class CVData(LLMOutput):
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    location: Optional[str] = None
+    summary: Optional[str] = None
+    skills: List[str] = Field(default_factory=list)
+    experience: List[Experience] = Field(default_factory=list)
+    education: List[Education] = Field(default_factory=list)
+    certifications: List[Union[Certification, str]] = Field(default_factory=list)
+    projects: List[Union[Project, str]] = Field(default_factory=list)
+    languages: List[Union[Language, str]] = Field(default_factory=list)
+
+# Job requirements (parse_job)
+
+class ExperienceRequirement(LLMOutput):
+    area: Optional[str] = None
+    years: Number = None
+    details: Optional[str] = None
+
+class EducationRequirement(LLMOutput):
+    level: Optional[str] = None
+    field: Optional[str] = None
+    required: Optional[bool] = None
+
+class JobRequirements(LLMOutput):
+    job_title: Optional[str] = None
+    company: Optional[str] = None
+    location: Optional[str] = None
+    employment_type: Optional[str] = None
+    experience_level: Optional[str] = None
+    job_summary: Optional[str] = None
+    required_skills: List[str] = Field(default_factory=list)
+    preferred_skills: List[str] = Field(default_factory=list)
+    required_experience: List[Union[ExperienceRequirement, str]] = Field(default_factory=list)
+    required_education: List[Union[EducationRequirement, str]] = Field(default_factory=list)
+    preferred_education: List[Union[EducationRequirement, str]] = Field(default_factory=list)
+    required_certifications: List[str] = Field(default_factory=list)
+    preferred_certifications: List[str] = Field(default_factory=list)
+    responsibilities: List[str] = Field(default_factory=list)
+    technologies: List[str] = Field(default_factory=list)
+    soft_skills: List[str] = Field(default_factory=list)
+    benefits: List[str] = Field(default_factory=list)
+    team_size: Optional[str] = None
+    travel_requirements: Optional[str] = None
+    remote_work: Optional[str] = None
+
+# Comparison result (compare)
+
+class SkillsAnalysis(LLMOutput):
+    matching_skills: List[Dict[str, Any]] = Field(default_factory=list)
+    missing_required_skills: List[Dict[str, Any]] = Field(default_factory=list)
+    additional_skills: List[Union[Dict[str, Any], str]] = Field(default_factory=list)
+
+class RelevantExperience(LLMOutput):
+    role: Optional[str] = None
+    relevance: Optional[str] = None
+    skills_gained: List[str] = Field(default_factory=list)
+
+class ExperienceAnalysis(LLMOutput):
+    total_years_experience: Number = None
+    required_years: Number = None
+    experience_match: Optional[str] = None
+    relevant_experience: List[Union[RelevantExperience, str]] = Field(default_factory=list)
+    experience_gaps: List[str] = Field(default_factory=list)
+
+class EducationAnalysis(LLMOutput):
+    meets_requirements: Optional[Union[bool, str]] = None
+    candidate_education: List[str] = Field(default_factory=list)
+    required_education: List[str] = Field(default_factory=list)
+    education_match: Optional[str] = None
+
+class CertificationAnalysis(LLMOutput):
+    matching_certifications: List[str] = Field(default_factory=list)
+    missing_certifications: List[str] = Field(default_factory=list)
+    additional_certifications: List[str] = Field(default_factory=list)
+
+class ComparisonRecommendations(LLMOutput):
+    hiring_recommendation: Optional[str] = None
+    interview_focus_areas: List[str] = Field(default_factory=list)
+    development_areas: List[str] = Field(default_factory=list)
+
+class ComparisonResult(LLMOutput):
+    overall_match_score: Number = None
+    match_level: Optional[str] = None
+    skills_analysis: SkillsAnalysis = Field(default_factory=SkillsAnalysis)
+    experience_analysis: ExperienceAnalysis = Field(default_factory=ExperienceAnalysis)
+    education_analysis: EducationAnalysis = Field(default_factory=EducationAnalysis)
+    certification_analysis: CertificationAnalysis = Field(default_factory=CertificationAnalysis)
+    strengths: List[str] = Field(default_factory=list)
+    concerns: List[str] = Field(default_factory=list)
+    growth_potential: Optional[str] = None
+    cultural_fit_indicators: List[str] = Field(default_factory=list)
+    recommendations: ComparisonRecommendations = Field(default_factory=ComparisonRecommendations)
+
+# Comparison sub-analyses (compare with COMPARE_FANOUT)
+
+class SkillsAssessment(LLMOutput):
+    skills_analysis: SkillsAnalysis = Field(default_factory=SkillsAnalysis)
+
+class ExperienceAssessment(LLMOutput):
+    experience_analysis: ExperienceAnalysis = Field(default_factory=ExperienceAnalysis)
+
+class CredentialsAssessment(LLMOutput):
+    education_analysis: EducationAnalysis = Field(default_factory=EducationAnalysis)
+    certification_analysis: CertificationAnalysis = Field(default_factory=CertificationAnalysis)
+
+class ComparisonSynthesis(LLMOutput):
+    overall_match_score: Number = None
+    match_level: Optional[str] = None
+    strengths: List[str] = Field(default_factory=list)
+    concerns: List[str] = Field(default_factory=list)
+    growth_potential: Optional[str] = None
+    cultural_fit_indicators: List[str] = Field(default_factory=list)
+    recommendations: ComparisonRecommendations = Field(default_factory=ComparisonRecommendations)
+
+# Final analysis (summary)
+
+class SkillSummary(LLMOutput):
+    strong_matches: List[str] = Field(default_factory=list)
+    skill_gaps: List[str] = Field(default_factory=list)
+    transferable_skills: List[str] = Field(default_factory=list)
+
+class ExperienceSummary(LLMOutput):
+    relevant_experience: Optional[str] = None
+    experience_level: Optional[str] = None
+    growth_trajectory: Optional[str] = None
+
+class NextSteps(LLMOutput):
+    interview_recommended: Optional[Union[bool, str]] = None
+    interview_focus: List[str] = Field(default_factory=list)
+    reference_check_focus: List[str] = Field(default_factory=list)
+    skills_assessment: List[str] = Field(default_factory=list)
+
+class DevelopmentPlan(LLMOutput):
+    immediate_training_needs: List[str] = Field(default_factory=list)
+    long_term_development: List[str] = Field(default_factory=list)
+
+class SalaryConsiderations(LLMOutput):
+    market_positioning: Optional[str] = None
+    negotiation_factors: List[str] = Field(default_factory=list)
+
+class RiskAssessment(LLMOutput):
+    low_risk_factors: List[str] = Field(default_factory=list)
+    medium_risk_factors: List[str] = Field(default_factory=list)
+    high_risk_factors: List[str] = Field(default_factory=list)
+
+class FinalAnalysis(LLMOutput):
+    executive_summary: Optional[str] = None
+    match_score: Number = None
+    recommendation: Optional[str] = None
+    key_highlights: List[str] = Field(default_factory=list)
+    main_concerns: List[str] = Field(default_factory=list)
+    skill_summary: SkillSummary = Field(default_factory=SkillSummary)
+    experience_summary: ExperienceSummary = Field(default_factory=ExperienceSummary)
+    next_steps: NextSteps = Field(default_factory=NextSteps)
+    development_plan: DevelopmentPlan = Field(default_factory=DevelopmentPlan)
+    salary_considerations: SalaryConsiderations = Field(default_factory=SalaryConsiderations)
+    risk_assessment: RiskAssessment = Field(default_factory=RiskAssessment)
+    timeline_recommendation: Optional[str] = None
+    additional_notes: Optional[str] = None
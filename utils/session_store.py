@@ -0,0 +1,308 @@
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import BadSignature, Signer
+from werkzeug.datastructures import CallbackDict
+
+logger = logging.getLogger(__name__)
+
+class SessionStore(ABC):
+    """
+    Server-side storage for session payloads keyed by an opaque session id.
+
+    Payloads are stored as JSON so both backends hold independent copies and
+    entry sizes can be measured. Expiry is sliding: reading a session extends it.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600):
+        self.ttl_seconds = ttl_seconds
+        self.expired = 0
+        self._sweeper = None
+        self._stop = threading.Event()
+
+    @abstractmethod
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def set(self, sid: str, data: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def delete(self, sid: str) -> None:
+        pass
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """Remove expired sessions and return how many were removed."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        pass
+
+    def start_sweeper(self, interval_seconds: float = 60) -> None:
+        """Sweep expired sessions periodically on a daemon thread."""
+        if self._sweeper is not None or interval_seconds <= 0:
+            return
+
+        def run():
+            while not self._stop.wait(interval_seconds):
+                try:
+                    removed = self.sweep()
+                    if removed:
+                        logger.info(f"Session sweeper removed {removed} expired sessions")
+                except Exception as e:
+                    logger.error(f"Session sweep failed: {str(e)}")
+
+        self._sweeper = threading.Thread(target=run, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self) -> None:
+        self._stop.set()
+        self._sweeper = None
+
+class MemorySessionStore(SessionStore):
+    """
+    In-process session store bounded by entry count and total payload size.
+
+    The least recently used sessions are evicted first once either bound is hit.
+    Only suitable for single-process deployments.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 10000,
+                 max_bytes: int = 256 * 1024 * 1024):
+        super().__init__(ttl_seconds)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is None:
+                return None
+            payload, expires_at = entry
+            now = time.time()
+            if expires_at <= now:
+                self._remove(sid)
+                self.expired += 1
+                return None
+            self._entries[sid] = (payload, now + self.ttl_seconds)
+            self._entries.move_to_end(sid)
+        return json.loads(payload)
+
+    def set(self, sid: str, data: Dict[str, Any]) -> None:
+        payload = json.dumps(data)
+        with self._lock:
+            self._remove(sid)
+            self._entries[sid] = (payload, time.time() + self.ttl_seconds)
+            self._size += len(payload)
+            while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._remove(sid)
+
+    def sweep(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, (_, expires_at) in self._entries.items() if expires_at <= now]
+            for sid in expired:
+                self._remove(sid)
+            self.expired += len(expired)
+        return len(expired)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "expired": self.expired
+            }
+
+    def _remove(self, sid: str) -> None:
+        entry = self._entries.pop(sid, None)
+        if entry is not None:
+            self._size -= len(entry[0])
+
+class SqliteSessionStore(SessionStore):
+    """
+    Session store backed by a SQLite database file.
+
+    Sessions survive restarts and can be shared by several worker processes
+    on the same host.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 3600):
+        super().__init__(ttl_seconds)
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS sessions_expires_at ON sessions (expires_at)")
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE sid = ? AND expires_at > ?", (sid, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute(
+                "UPDATE sessions SET expires_at = ? WHERE sid = ?", (now + self.ttl_seconds, sid)
+            )
+        return json.loads(row[0])
+
+    def set(self, sid: str, data: Dict[str, Any]) -> None:
+        payload = json.dumps(data)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)",
+                (sid, payload, time.time() + self.ttl_seconds)
+            )
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def sweep(self) -> int:
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+        self.expired += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM sessions"
+            ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": entries,
+            "size_bytes": size,
+            "expired": self.expired
+        }
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session whose payload lives in a SessionStore; the cookie only carries its id."""
+
+    def __init__(self, initial: Optional[Dict[str, Any]] = None, sid: Optional[str] = None, new: bool = False):
+        def on_update(session):
+            session.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    Flask session interface that keeps session data in a SessionStore.
+
+    The cookie holds a random session id signed with the app's secret key.
+    """
+
+    salt = "rolesync-session"
+
+    def __init__(self, store: SessionStore):
+        self.store = store
+
+    def _signer(self, app) -> Signer:
+        return Signer(app.secret_key, salt=self.salt)
+
+    def open_session(self, app, request) -> ServerSideSession:
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if cookie:
+            try:
+                sid = self._signer(app).unsign(cookie).decode("utf-8")
+            except BadSignature:
+                sid = None
+            if sid:
+                data = self.store.get(sid)
+                if data is not None:
+                    return ServerSideSession(data, sid=sid)
+
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session: ServerSideSession, response) -> None:
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.modified:
+            self.store.set(session.sid, dict(session))
+
+        if session.new or session.modified or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name,
+                self._signer(app).sign(session.sid.encode("utf-8")).decode("utf-8"),
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app)
+            )
+
+def create_session_store(backend: Optional[str] = None) -> Optional[SessionStore]:
+    """
+    Build the session store configured through the environment.
+
+    Args:
+        backend: "memory", "sqlite" or "cookie" (defaults to SESSION_BACKEND)
+
+    Returns:
+        SessionStore, or None to keep Flask's signed-cookie sessions
+    """
+    backend = (backend or os.getenv('SESSION_BACKEND', 'sqlite')).lower()
+    ttl_seconds = float(os.getenv('SESSION_TTL_SECONDS', 3600))
+
+    if backend == 'cookie':
+        return None
+    if backend == 'sqlite':
+        return SqliteSessionStore(os.getenv('SESSION_SQLITE_PATH', 'cache/sessions.db'), ttl_seconds)
+    if backend != 'memory':
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+    return MemorySessionStore(
+        ttl_seconds,
+        max_entries=int(os.getenv('SESSION_MAX_ENTRIES', 10000)),
+        max_bytes=int(os.getenv('SESSION_MAX_BYTES', 256 * 1024 * 1024))
+    )
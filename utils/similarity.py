@@ -0,0 +1,175 @@
+import logging
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from utils.skills import normalize_skill
+
+logger = logging.getLogger(__name__)
+
+# Character n-gram range used for the TF-IDF features
+SIMILARITY_NGRAM_MIN = int(os.getenv('SIMILARITY_NGRAM_MIN', 3))
+SIMILARITY_NGRAM_MAX = int(os.getenv('SIMILARITY_NGRAM_MAX', 5))
+# Evidence pairs scoring below this cosine similarity are ignored
+SIMILARITY_MIN_SCORE = float(os.getenv('SIMILARITY_MIN_SCORE', 0.15))
+SIMILARITY_TOP_K = int(os.getenv('SIMILARITY_TOP_K', 10))
+
+WORD_PATTERN = re.compile(r"[a-z0-9+#]+(?:\.[a-z0-9]+)*")
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "into", "is", "it", "its",
+    "of", "on", "or", "our", "that", "the", "their", "this", "to", "we", "will", "with", "you", "your",
+    "using", "across", "within", "etc",
+}
+
+def text_features(text: str) -> List[str]:
+    """
+    Features of a text: canonical words plus their character n-grams.
+
+    Words go through the skill synonym table first, so "k8s" and "Kubernetes"
+    or "RESTful" and "REST" share features. Character n-grams are taken
+    within word boundaries and make plurals and inflections ("service",
+    "services", "serving") overlap.
+    """
+    features = []
+    for word in WORD_PATTERN.findall(str(text).lower()):
+        if word in STOP_WORDS:
+            continue
+        canonical = normalize_skill(word) or word
+        features.append(f"w:{canonical}")
+        padded = f" {canonical} "
+        for n in range(SIMILARITY_NGRAM_MIN, SIMILARITY_NGRAM_MAX + 1):
+            if len(padded) >= n:
+                features.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return features
+
+def tfidf_matrix(texts: Sequence[str]) -> np.ndarray:
+    """
+    L2-normalized TF-IDF vectors for texts, one row per text.
+
+    The vocabulary and document frequencies come from texts themselves, so
+    rows are only comparable within one call.
+
+    Returns:
+        float32 array of shape (len(texts), vocabulary size)
+    """
+    documents = [Counter(text_features(text)) for text in texts]
+    vocabulary: Dict[str, int] = {}
+    rows, columns, counts = [], [], []
+    for row, document in enumerate(documents):
+        for feature, count in document.items():
+            rows.append(row)
+            columns.append(vocabulary.setdefault(feature, len(vocabulary)))
+            counts.append(count)
+
+    matrix = np.zeros((len(documents), max(1, len(vocabulary))), dtype=np.float32)
+    if counts:
+        # Sublinear term frequency keeps one repeated word from dominating
+        matrix[rows, columns] = 1 + np.log(np.asarray(counts, dtype=np.float32))
+        document_frequency = np.count_nonzero(matrix, axis=0)
+        matrix *= (np.log((1 + len(documents)) / (1 + document_frequency)) + 1).astype(np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+def similarity_matrix(left: Sequence[str], right: Sequence[str]) -> np.ndarray:
+    """
+    Cosine similarity between every text in left and every text in right.
+
+    Returns:
+        Array of shape (len(left), len(right)) with values in [0, 1]
+    """
+    if not left or not right:
+        return np.zeros((len(left), len(right)), dtype=np.float32)
+    matrix = tfidf_matrix(list(left) + list(right))
+    return matrix[:len(left)] @ matrix[len(left):].T
+
+def _role_label(job: Dict[str, Any]) -> str:
+    title = job.get("title") or "Role"
+    return f"{title} at {job['company']}" if job.get("company") else str(title)
+
+def cv_evidence_items(cv_data: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Statements from the CV that can serve as evidence: responsibilities, projects and the summary."""
+    items = []
+    for job in cv_data.get("experience") or []:
+        if not isinstance(job, dict):
+            continue
+        role = _role_label(job)
+        for responsibility in job.get("responsibilities") or []:
+            if isinstance(responsibility, str) and responsibility.strip():
+                items.append({"text": responsibility.strip(), "source": role})
+    for project in cv_data.get("projects") or []:
+        if isinstance(project, dict) and (project.get("description") or project.get("name")):
+            technologies = ", ".join(str(t) for t in project.get("technologies") or [])
+            text = " ".join(str(part) for part in (project.get("description") or project.get("name"), technologies) if part)
+            items.append({"text": text, "source": f"Project: {project.get('name') or 'unnamed'}"})
+    if isinstance(cv_data.get("summary"), str) and cv_data["summary"].strip():
+        items.append({"text": cv_data["summary"].strip(), "source": "Summary"})
+    return items
+
+def job_requirement_items(job_requirements: Dict[str, Any]) -> List[Dict[str, str]]:
+    """Statements from the job posting that need evidence: responsibilities and experience requirements."""
+    items = []
+    for responsibility in job_requirements.get("responsibilities") or []:
+        if isinstance(responsibility, str) and responsibility.strip():
+            items.append({"text": responsibility.strip(), "field": "responsibilities"})
+    for requirement in job_requirements.get("required_experience") or []:
+        if isinstance(requirement, dict):
+            text = " ".join(str(requirement[key]) for key in ("area", "details") if requirement.get(key))
+        else:
+            text = str(requirement)
+        if text.strip():
+            items.append({"text": text.strip(), "field": "required_experience"})
+    return items
+
+def rank_evidence(cv_data: Dict[str, Any], job_requirements: Dict[str, Any],
+                  top_k: Optional[int] = None, min_score: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Pair job responsibilities and requirements with the closest CV statements.
+
+    Runs locally in one vectorized pass (no network): every CV statement is
+    compared with every job statement through a cosine-similarity matrix.
+
+    Args:
+        cv_data: Confirmed CV data
+        job_requirements: Parsed job requirements
+        top_k: Number of evidence pairs to return (defaults to SIMILARITY_TOP_K)
+        min_score: Minimum similarity for a requirement to count as covered
+            (defaults to SIMILARITY_MIN_SCORE)
+
+    Returns:
+        Dict with "evidence" (best pair per requirement, highest score first, at
+        most top_k), "coverage" (every requirement with its best score and
+        whether it is covered) and "coverage_ratio"
+    """
+    top_k = SIMILARITY_TOP_K if top_k is None else top_k
+    min_score = SIMILARITY_MIN_SCORE if min_score is None else min_score
+
+    cv_items = cv_evidence_items(cv_data)
+    job_items = job_requirement_items(job_requirements)
+    if not job_items:
+        return {"evidence": [], "coverage": [], "coverage_ratio": 1.0}
+
+    scores = similarity_matrix([item["text"] for item in cv_items], [item["text"] for item in job_items])
+    coverage = []
+    for column, job_item in enumerate(job_items):
+        best_row = int(np.argmax(scores[:, column])) if cv_items else None
+        best_score = float(scores[best_row, column]) if best_row is not None else 0.0
+        coverage.append({
+            "requirement": job_item["text"],
+            "field": job_item["field"],
+            "cv_evidence": cv_items[best_row]["text"] if best_row is not None else None,
+            "cv_source": cv_items[best_row]["source"] if best_row is not None else None,
+            "score": round(best_score, 3),
+            "covered": best_score >= min_score
+        })
+
+    evidence = sorted((item for item in coverage if item["covered"]), key=lambda item: item["score"], reverse=True)
+    return {
+        "evidence": evidence[:top_k],
+        "coverage": coverage,
+        "coverage_ratio": round(sum(1 for item in coverage if item["covered"]) / len(coverage), 3)
+    }
@@ -0,0 +1,257 @@
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# Canonical skill name -> aliases that should be treated as the same skill
+SKILL_SYNONYMS = {
+    "javascript": ["js", "ecmascript", "es6", "es2015"],
+    "typescript": ["ts"],
+    "python": ["python3", "py"],
+    "golang": ["go", "go lang"],
+    "c++": ["cpp", "c plus plus"],
+    "c#": ["csharp", "c sharp"],
+    ".net": ["dotnet", "dot net", ".net core", "asp.net", "asp.net core"],
+    "node.js": ["node", "nodejs", "node js"],
+    "react": ["react.js", "reactjs", "react js"],
+    "vue": ["vue.js", "vuejs"],
+    "angular": ["angularjs", "angular.js"],
+    "next.js": ["nextjs"],
+    "express": ["express.js", "expressjs"],
+    "django": ["django rest framework", "drf"],
+    "postgresql": ["postgres", "postgre", "psql", "pgsql"],
+    "mysql": ["my sql"],
+    "sql server": ["mssql", "ms sql", "microsoft sql server"],
+    "mongodb": ["mongo"],
+    "elasticsearch": ["elastic search", "elastic"],
+    "redis": [],
+    "aws": ["amazon web services", "amazon aws"],
+    "gcp": ["google cloud", "google cloud platform"],
+    "azure": ["microsoft azure"],
+    "kubernetes": ["k8s", "kube"],
+    "docker": ["docker compose", "containers", "containerization"],
+    "terraform": ["hashicorp terraform"],
+    "ci/cd": ["cicd", "ci cd", "continuous integration", "continuous delivery", "continuous deployment"],
+    "git": ["github", "gitlab", "version control"],
+    "rest": ["rest api", "rest apis", "restful", "restful api", "restful apis", "restful services"],
+    "graphql": ["graph ql"],
+    "machine learning": ["ml"],
+    "deep learning": ["dl"],
+    "artificial intelligence": ["ai"],
+    "natural language processing": ["nlp"],
+    "computer vision": [],
+    "large language models": ["llm", "llms"],
+    "tensorflow": ["tf"],
+    "pytorch": ["torch"],
+    "scikit-learn": ["sklearn", "scikit learn"],
+    "pandas": [],
+    "numpy": [],
+    "html": ["html5"],
+    "css": ["css3"],
+    "agile": ["scrum", "kanban", "agile methodologies"],
+    "linux": ["unix"],
+    "microservices": ["micro services", "microservice architecture"],
+    "communication": ["communication skills", "verbal communication", "written communication"],
+    "leadership": ["team leadership", "leading teams"],
+    "project management": [],
+}
+
+# Trailing versions such as "Python 3.11", "Java 8", "Angular 2+" or "python3.11"
+VERSION_PATTERN = re.compile(r"(\s+v?\d+(\.\d+)*(\.x)?\+?|(?<=[a-z])\d+\.\d+(\.\d+)*)$")
+PARENTHETICAL_PATTERN = re.compile(r"\(([^)]*)\)")
+SEPARATOR_PATTERN = re.compile(r"[,;\n]")
+TOKEN_PATTERN = re.compile(r"[a-z0-9+#.]+")
+STOP_TOKENS = {"and", "or", "with", "of", "the", "in", "experience", "knowledge", "skills", "proficiency"}
+
+_ALIASES = {}
+for _canonical, _aliases in SKILL_SYNONYMS.items():
+    _ALIASES[_canonical] = _canonical
+    for _alias in _aliases:
+        _ALIASES[_alias] = _canonical
+
+def normalize_skill(name: str) -> str:
+    """
+    Reduce a skill name to its canonical form.
+
+    Case, bullets, trailing punctuation, trailing version numbers and known
+    synonyms are folded, so "Postgres 14", "PostgreSQL" and "postgresql"
+    all normalize to "postgresql".
+
+    Args:
+        name: Skill name as written in a CV or job posting
+
+    Returns:
+        Canonical skill name (empty string if nothing is left)
+    """
+    text = re.sub(r"\s+", " ", str(name).strip().lower())
+    # Keep a leading "." (".NET"); only bullets and trailing punctuation are noise
+    text = text.lstrip(" -*•:").rstrip(" -*•.:")
+    if text in _ALIASES:
+        return _ALIASES[text]
+
+    text = VERSION_PATTERN.sub("", text).strip()
+    return _ALIASES.get(text, text)
+
+def split_skills(entries: Iterable[Any]) -> List[str]:
+    """
+    Split free-form skill entries into individual skill names.
+
+    Handles category prefixes ("Databases: PostgreSQL, MySQL") and comma or
+    semicolon separated lists. Parenthesised aliases such as
+    "Amazon Web Services (AWS)" are kept with their skill.
+
+    Args:
+        entries: Skill entries from a CV or job posting
+
+    Returns:
+        Individual skill names in their original spelling
+    """
+    skills = []
+    for entry in entries or []:
+        if isinstance(entry, dict):
+            entry = entry.get("skill") or entry.get("name") or ""
+        if not isinstance(entry, str):
+            continue
+        if ":" in entry:
+            entry = entry.split(":", 1)[1]
+        for part in SEPARATOR_PATTERN.split(entry):
+            part = part.lstrip(" -*•").rstrip(" -*•.")
+            if part:
+                skills.append(part)
+    return skills
+
+def _skill_keys(name: str) -> Set[str]:
+    """Canonical names a skill can match on, including parenthesised aliases."""
+    keys = {normalize_skill(PARENTHETICAL_PATTERN.sub("", name))}
+    for inner in PARENTHETICAL_PATTERN.findall(name):
+        keys.add(normalize_skill(inner))
+    keys.add(normalize_skill(name))
+    keys.discard("")
+    return keys
+
+def _tokens(canonical: str) -> Set[str]:
+    return {token for token in TOKEN_PATTERN.findall(canonical) if token not in STOP_TOKENS}
+
+class SkillIndex:
+    """
+    Inverted index over a candidate's skills.
+
+    Exact lookups go through the canonical-name table; partial matches
+    ("AWS Lambda" against "AWS") go through a token -> skill posting list.
+    """
+
+    def __init__(self, skills: Iterable[str]):
+        self.skills: List[str] = []
+        self._by_key: Dict[str, int] = {}
+        self._postings: Dict[str, Set[int]] = defaultdict(set)
+        self._key_tokens: List[List[Set[str]]] = []
+
+        for skill in skills:
+            keys = _skill_keys(skill)
+            if not keys or any(key in self._by_key for key in keys):
+                continue
+            skill_id = len(self.skills)
+            self.skills.append(skill)
+            self._key_tokens.append([_tokens(key) for key in keys])
+            for key in keys:
+                self._by_key[key] = skill_id
+                for token in _tokens(key):
+                    self._postings[token].add(skill_id)
+
+    def lookup(self, name: str) -> Optional[Dict[str, Any]]:
+        """
+        Find the candidate skill matching name.
+
+        Returns:
+            Dict with the matched skill's id, name and match strength, or None
+        """
+        keys = _skill_keys(name)
+        for key in keys:
+            if key in self._by_key:
+                skill_id = self._by_key[key]
+                return {"id": skill_id, "skill": self.skills[skill_id], "match_strength": "Strong"}
+
+        # Partial match: every token of the shorter name appears in the longer one
+        best = None
+        for key in keys:
+            tokens = _tokens(key)
+            candidates = set()
+            for token in tokens:
+                candidates |= self._postings.get(token, set())
+            for skill_id in candidates:
+                # Each name of the skill is compared on its own, so "AWS (Amazon Web Services)"
+                # still partially matches "AWS Lambda" through "aws"
+                for skill_tokens in self._key_tokens[skill_id]:
+                    overlap = len(tokens & skill_tokens)
+                    if overlap and overlap == min(len(tokens), len(skill_tokens)):
+                        if best is None or overlap > best[0]:
+                            best = (overlap, skill_id)
+        if best:
+            return {"id": best[1], "skill": self.skills[best[1]], "match_strength": "Moderate"}
+        return None
+
+    def ids_for(self, name: str) -> Set[int]:
+        """Ids of the candidate skills sharing any token with name."""
+        ids = set()
+        for key in _skill_keys(name):
+            for token in _tokens(key):
+                ids |= self._postings.get(token, set())
+        return ids
+
+def match_skills(cv_skills: Iterable[Any], job_requirements: Dict[str, Any]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Compute matching, missing and additional skills without an LLM.
+
+    Args:
+        cv_skills: Skills from the confirmed CV data
+        job_requirements: Parsed job requirements
+
+    Returns:
+        Dict with matching_skills, missing_required_skills and additional_skills
+        in the shape of the comparison_result skills_analysis section
+    """
+    index = SkillIndex(split_skills(cv_skills))
+    sources = [
+        ("required_skills", "Required skill"),
+        ("technologies", "Technology used in the role"),
+        ("preferred_skills", "Preferred skill"),
+    ]
+
+    matching = []
+    missing = []
+    matched_ids = set()
+    seen = set()
+    for field, requirement in sources:
+        for skill in split_skills(job_requirements.get(field) or []):
+            keys = _skill_keys(skill)
+            if keys & seen:
+                continue
+            seen |= keys
+
+            found = index.lookup(skill)
+            if found:
+                matched_ids.add(found["id"])
+                matching.append({
+                    "skill": skill,
+                    "cv_skill": found["skill"],
+                    "job_requirement": requirement,
+                    "match_strength": found["match_strength"]
+                })
+            elif field != "preferred_skills":
+                alternatives = [index.skills[i] for i in sorted(index.ids_for(skill))]
+                missing.append({
+                    "skill": skill,
+                    "importance": "High" if field == "required_skills" else "Medium",
+                    "alternative_skills": alternatives
+                })
+
+    additional = [
+        {"skill": skill}
+        for skill_id, skill in enumerate(index.skills)
+        if skill_id not in matched_ids
+    ]
+
+    return {
+        "matching_skills": matching,
+        "missing_required_skills": missing,
+        "additional_skills": additional
+    }
@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+from utils.metrics import SPECULATIVE_WORK
+
+logger = logging.getLogger(__name__)
+
+class Speculation:
+    """
+    Work started for an owner ahead of a request that may never come.
+
+    keys maps each stage the work may run to a key identifying its input; the
+    real request later produces keys of its own, and a stage's result is used
+    if its key matches.
+    """
+
+    def __init__(self, owner: str, keys: Dict[str, str]):
+        self.owner = owner
+        self.keys = keys
+        self.created = time.time()
+        self.started = set()
+        self.verdict: Optional[Dict[str, bool]] = None
+        self.future = None
+
+class Speculator:
+    """
+    Runs speculative work on a small thread pool, one speculation per owner.
+
+    Starting a new speculation for an owner supersedes the previous one.
+    The work reports each stage before running it (see begin_stage), so stages
+    of a superseded speculation that have not started yet are skipped. Every
+    stage that did start is counted once as used or discarded in
+    rolesync_speculative_work_total.
+    """
+
+    def __init__(self, max_workers: int = 2, max_age_seconds: float = 1800):
+        self.max_age_seconds = max_age_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculate")
+        self._speculations: Dict[str, Speculation] = {}
+        self._lock = threading.Lock()
+
+    def start(self, owner: str, keys: Dict[str, str], fn: Callable[..., Any], *args, **kwargs) -> bool:
+        """
+        Start fn(begin_stage, *args, **kwargs) in the background for owner.
+
+        Args:
+            owner: Session the speculation belongs to
+            keys: Stage name -> key of the input that stage works on
+            fn: Work to run; before each stage it calls begin_stage(stage) and
+                stops if that returns False
+
+        Returns:
+            False if the owner's current speculation already has the same keys
+        """
+        self._expire()
+        with self._lock:
+            previous = self._speculations.get(owner)
+            if previous is not None and previous.keys == keys:
+                return False
+            speculation = Speculation(owner, keys)
+            speculation.future = self._executor.submit(self._run, speculation, fn, args, kwargs)
+            self._speculations[owner] = speculation
+        if previous is not None:
+            self._close(previous, {})
+        return True
+
+    def begin_stage(self, speculation: Speculation, stage: str) -> bool:
+        """
+        Record that a stage is starting.
+
+        Returns:
+            False if the speculation was already settled without this stage
+            being used, in which case the stage should not run
+        """
+        with self._lock:
+            if speculation.verdict is not None and not speculation.verdict.get(stage):
+                return False
+            speculation.started.add(stage)
+            verdict = speculation.verdict
+        SPECULATIVE_WORK.inc(stage=stage, outcome="started")
+        if verdict is not None:
+            SPECULATIVE_WORK.inc(stage=stage, outcome="used")
+        return True
+
+    def settle(self, owner: str, keys: Dict[str, str]) -> Dict[str, bool]:
+        """
+        Match the real request against the owner's speculation.
+
+        Args:
+            owner: Session the request belongs to
+            keys: Stage name -> key of the input the real request works on
+
+        Returns:
+            Stage name -> whether the speculative work for it is used (empty
+            if there was no speculation)
+        """
+        with self._lock:
+            speculation = self._speculations.pop(owner, None)
+        if speculation is None:
+            return {}
+        verdict = {stage: keys.get(stage) == key for stage, key in speculation.keys.items()}
+        self._close(speculation, verdict)
+        return verdict
+
+    def discard(self, owner: str) -> None:
+        """Drop the owner's speculation (e.g. when the session ends)."""
+        with self._lock:
+            speculation = self._speculations.pop(owner, None)
+        if speculation is not None:
+            self._close(speculation, {})
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = sum(1 for speculation in self._speculations.values() if not speculation.future.done())
+            return {"speculations": len(self._speculations), "running": pending}
+
+    def _close(self, speculation: Speculation, verdict: Dict[str, bool]) -> None:
+        with self._lock:
+            speculation.verdict = verdict
+            started = set(speculation.started)
+        speculation.future.cancel()
+        for stage in started:
+            SPECULATIVE_WORK.inc(stage=stage, outcome="used" if verdict.get(stage) else "discarded")
+
+    def _run(self, speculation: Speculation, fn, args, kwargs) -> None:
+        try:
+            fn(partial(self.begin_stage, speculation), *args, **kwargs)
+        except Exception as e:
+            logger.warning(f"Speculative work for {speculation.owner} failed: {str(e)}")
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.max_age_seconds
+        with self._lock:
+            expired = [owner for owner, speculation in self._speculations.items() if speculation.created < cutoff]
+        for owner in expired:
+            self.discard(owner)
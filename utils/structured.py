@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+from utils.llm import llm_config, llm_model_name
+from utils.metrics import STRUCTURED_OUTPUTS, STRUCTURED_REPAIRS, record_json_fallback
+from utils.partial_json import parse_partial_json
+
+logger = logging.getLogger(__name__)
+
+# "auto" picks the strongest mode the configured model supports; "json_schema",
+# "json_object" or "off" force one
+LLM_STRUCTURED_OUTPUT = os.getenv('LLM_STRUCTURED_OUTPUT', 'auto').lower()
+# Extra LLM calls allowed to fix malformed, invalid or truncated output
+STRUCTURED_REPAIR_ATTEMPTS = int(os.getenv('STRUCTURED_REPAIR_ATTEMPTS', 1))
+
+# Model name prefixes by the response_format they accept
+JSON_SCHEMA_MODELS = ("gpt-4o", "gpt-4.1", "gpt-5", "o1", "o3", "o4")
+JSON_OBJECT_MODELS = ("gpt-4-turbo", "gpt-4-1106", "gpt-4-0125", "gpt-3.5-turbo")
+
+CODE_FENCE_PATTERN = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+REPAIR_INSTRUCTIONS = """Your previous answer could not be used: {problem}
+
+Return the corrected answer as a single JSON object that follows this JSON schema. Keep every value that was already correct and do not add commentary.
+
+JSON schema:
+{schema}
+
+Previous answer:
+{content}"""
+
+CONTINUATION_INSTRUCTIONS = """Your previous answer was cut off before the JSON object was complete. Continue it exactly where it stops: output only the remaining characters, without repeating anything that was already written.
+
+Answer so far:
+{content}"""
+
+def structured_output_mode(role: str) -> str:
+    """Response format used for a node role: json_schema, json_object or off."""
+    if LLM_STRUCTURED_OUTPUT != "auto":
+        return LLM_STRUCTURED_OUTPUT
+
+    model = llm_model_name(role).lower()
+    if model.startswith(JSON_SCHEMA_MODELS):
+        return "json_schema"
+    if model.startswith(JSON_OBJECT_MODELS):
+        return "json_object"
+    # The original gpt-4 snapshots reject response_format
+    return "off"
+
+def bind_structured_output(llm, schema: Type[BaseModel], role: str):
+    """
+    Bind the model's JSON output mode for schema to an LLM client.
+
+    Args:
+        llm: Chat model client
+        schema: Pydantic model describing the expected object
+        role: Node role, used to pick the mode the model supports
+
+    Returns:
+        Runnable producing JSON output (the client itself if the mode is off)
+    """
+    mode = structured_output_mode(role)
+    if mode == "json_schema":
+        return llm.bind(response_format={
+            "type": "json_schema",
+            "json_schema": {"name": schema.__name__, "schema": schema.model_json_schema(), "strict": False}
+        })
+    if mode == "json_object":
+        return llm.bind(response_format={"type": "json_object"})
+    return llm
+
+def _decode(content: str, stage: str) -> Tuple[Optional[Any], Optional[str]]:
+    """Decode JSON text, falling back to the outermost braces; returns (data, problem)."""
+    text = CODE_FENCE_PATTERN.sub("", content or "")
+    try:
+        return json.loads(text), None
+    except json.JSONDecodeError as e:
+        problem = f"invalid JSON ({str(e)})"
+
+    record_json_fallback(stage)
+    start_idx = text.find('{')
+    end_idx = text.rfind('}') + 1
+    if start_idx != -1 and end_idx != 0:
+        try:
+            return json.loads(text[start_idx:end_idx]), None
+        except json.JSONDecodeError:
+            pass
+    return None, problem
+
+def _looks_truncated(content: Optional[str]) -> bool:
+    """True when the text opens more objects than it closes, i.e. it stopped mid-answer."""
+    text = content or ""
+    return '{' in text and text.count('{') > text.count('}')
+
+def _validate(data: Any, schema: Type[BaseModel]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Validate decoded data; returns (object, problem)."""
+    if not isinstance(data, dict):
+        return None, f"expected a JSON object, got {type(data).__name__}"
+    try:
+        return schema.model_validate(data).model_dump(mode="json"), None
+    except ValidationError as e:
+        return None, f"it does not match the schema ({e.error_count()} errors):\n{str(e)}"
+
+def parse_structured(content: str, schema: Type[BaseModel], stage: str, llm=None,
+                     finish_reason: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Decode and validate an LLM's JSON answer, repairing it if needed.
+
+    Output cut off by the token limit gets a continuation call; malformed or
+    schema-violating output gets a repair call listing the problems. If those
+    fail, a truncated object is salvaged with parse_partial_json rather than
+    failing the pipeline.
+
+    Args:
+        content: Completion text
+        schema: Pydantic model the answer must satisfy
+        stage: Node name used in metrics and for the repair call's config
+        llm: Client used for repair calls (None disables repairs)
+        finish_reason: Finish reason reported with the completion
+
+    Returns:
+        The validated object as a plain dict
+
+    Raises:
+        ValueError: If no usable object could be obtained
+    """
+    return parse_structured_outcome(content, schema, stage, llm, finish_reason)[0]
+
+def parse_structured_outcome(content: str, schema: Type[BaseModel], stage: str, llm=None,
+                             finish_reason: Optional[str] = None) -> Tuple[Dict[str, Any], str]:
+    """
+    parse_structured, also returning how the object was obtained.
+
+    Returns:
+        The validated object and its outcome: "ok", "repaired" or "salvaged".
+        A salvaged object may be missing fields, so callers should not cache it.
+
+    Raises:
+        ValueError: If no usable object could be obtained
+    """
+    data, problem = _decode(content, stage)
+    if data is not None:
+        result, problem = _validate(data, schema)
+        if result is not None:
+            STRUCTURED_OUTPUTS.inc(stage=stage, outcome="ok")
+            return result, "ok"
+
+    truncated = finish_reason == "length" or (data is None and _looks_truncated(content))
+    attempt_content = content
+    continued_content = content
+    for _ in range(STRUCTURED_REPAIR_ATTEMPTS if llm is not None else 0):
+        try:
+            if truncated:
+                STRUCTURED_REPAIRS.inc(stage=stage, kind="continuation")
+                continuation = llm.invoke(
+                    [("human", CONTINUATION_INSTRUCTIONS.format(content=attempt_content))],
+                    config=llm_config(stage)
+                ).content
+                attempt_content = attempt_content + continuation
+                continued_content = attempt_content
+            else:
+                STRUCTURED_REPAIRS.inc(stage=stage, kind="repair")
+                attempt_content = bind_structured_output(llm, schema, stage).invoke(
+                    [("human", REPAIR_INSTRUCTIONS.format(
+                        problem=problem,
+                        schema=json.dumps(schema.model_json_schema()),
+                        content=attempt_content
+                    ))],
+                    config=llm_config(stage)
+                ).content
+        except Exception as e:
+            logger.warning(f"{stage} output repair call failed: {str(e)}")
+            break
+
+        data, problem = _decode(attempt_content, stage)
+        if data is not None:
+            result, problem = _validate(data, schema)
+            if result is not None:
+                logger.info(f"{stage} output repaired")
+                STRUCTURED_OUTPUTS.inc(stage=stage, outcome="repaired")
+                return result, "repaired"
+        # A continuation that still does not parse gets a full repair next
+        truncated = False
+
+    # Last resort: keep every complete field of a truncated answer, preferring the
+    # latest attempt and the continued answer (which includes what the
+    # continuation calls added) over the original
+    for candidate in dict.fromkeys((attempt_content, continued_content, content)):
+        partial = parse_partial_json(candidate or "")
+        if not partial:
+            continue
+        result, _ = _validate(partial, schema)
+        if result is not None:
+            logger.warning(f"{stage} output salvaged from an incomplete answer")
+            STRUCTURED_OUTPUTS.inc(stage=stage, outcome="salvaged")
+            return result, "salvaged"
+
+    STRUCTURED_OUTPUTS.inc(stage=stage, outcome="failed")
+    raise ValueError(f"Could not obtain valid {schema.__name__} from LLM response: {problem}")